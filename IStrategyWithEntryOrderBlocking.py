@@ -1,54 +1,73 @@
+from collections import Counter
 from datetime import datetime, timedelta
-import json
+import time
 from typing import Optional
 from freqtrade.strategy.interface import IStrategy
+from freqtrade.enums import RunMode
+from freqtrade.persistence import Order, Trade
 from pathlib import Path
 
+from trade_gate_store import TradeGate, TRADE_GATE_DB
+
 import pandas as pd
 from warnings import simplefilter
 simplefilter(action="ignore", category=pd.errors.PerformanceWarning)
 
 class IStrategyWithEntryOrderBlocking(IStrategy):
-    max_open_trades_per_pair = 3  # Max number of concurrent trades per pair
-    wait_time_after_trade = timedelta(minutes=60)  # 30 minutes wait time after a trade
-    trade_count_file = Path("trade_counts.json")  # File to track trade counts
-
-    def __init__(self):
-        # Initialize trade counts from file if exists, else start with an empty dict
-        if self.trade_count_file.exists():
-            with open(self.trade_count_file, 'r') as f:
-                self.trade_counts = json.load(f)
-        else:
-            self.trade_counts = {}
-
-    def _update_trade_count(self, pair: str):
-        """Updates the trade count for a given pair and saves to the file."""
-        self.trade_counts[pair] = self.trade_counts.get(pair, 0) + 1
-        with open(self.trade_count_file, 'w') as f:
-            json.dump(self.trade_counts, f)
-
-    def _can_open_trade(self, pair: str, current_time: datetime):
-        """Checks if a new trade can be opened for the given pair."""
-        if self.trade_counts.get(pair, 0) >= self.max_open_trades_per_pair:
-            return False
+    max_open_trades_per_pair = 3  # Max concurrent trades per pair, across all live bots on the host
+    wait_time_after_trade = timedelta(minutes=60)  # Wait time after any bot's entry on a pair
+    trade_gate_file = Path(TRADE_GATE_DB)  # SQLite store shared by all bots, see trade_gate_store.py
+    reconcile_interval = 60  # Seconds between syncing this bot's gate counts with its open trades
+
+    def __init__(self, config: dict) -> None:
+        super().__init__(config)
+        self._wait_secs = self.wait_time_after_trade.total_seconds()
+        self._last_reconcile = 0.0
+        # Backtests and hyperopt keep the gate in memory: no file I/O, and no state shared with live bots
+        self._backtesting = config.get('runmode') in (RunMode.BACKTEST, RunMode.HYPEROPT)
+        self.trade_gate = None if self._backtesting else TradeGate(self.trade_gate_file)
+        self._last_entry = {}  # Pair -> epoch seconds of the last entry, backtests only
+        self._last_entry_check = 0.0
+
+    @property
+    def _gate_name(self) -> str:
+        return self.__class__.__name__
 
-        last_trade_time = self.trade_counts.get(f"{pair}_last_trade_time")
-        if last_trade_time:
-            last_trade_time = datetime.fromisoformat(last_trade_time)
-            if current_time - last_trade_time < self.wait_time_after_trade:
-                return False
+    def _reconcile_trade_gate(self):
+        """Resets this bot's gate counts to its open trades, dropping entries that never filled."""
+        open_counts = Counter(trade.pair for trade in Trade.get_trades_proxy(is_open=True))
+        self.trade_gate.reconcile(self._gate_name, open_counts)
+        self._last_reconcile = time.monotonic()
 
+    def _can_open_trade_backtest(self, pair: str, now: float) -> bool:
+        """Checks and records an entry against this backtest's own trades only."""
+        if now < self._last_entry_check:
+            self._last_entry.clear()  # Time went back: a new backtest (e.g. the next hyperopt epoch) started
+        self._last_entry_check = now
+
+        last_entry = self._last_entry.get(pair)
+        if last_entry is not None and now - last_entry < self._wait_secs:
+            return False
+        if len(Trade.get_trades_proxy(pair=pair, is_open=True)) >= self.max_open_trades_per_pair:
+            return False
+        self._last_entry[pair] = now
         return True
 
     def confirm_trade_entry(self, pair: str, order_type: str, amount: float, rate: float,
                             time_in_force: str, current_time: datetime, entry_tag: Optional[str] = None, side: str = 'long', **kwargs) -> bool:
-        if not self._can_open_trade(pair, current_time):
-            return False  # Abort trade if conditions are not met
+        if self._backtesting:
+            return self._can_open_trade_backtest(pair, current_time.timestamp())
+        # Checks and records the entry in one transaction, so bots can't race for a pair's last slot
+        return self.trade_gate.try_enter(self._gate_name, pair, current_time.timestamp(),
+                                         self.max_open_trades_per_pair, self._wait_secs)
 
-        # Update trade count and last trade time
-        self._update_trade_count(pair)
-        self.trade_counts[f"{pair}_last_trade_time"] = current_time.isoformat()
-        with open(self.trade_count_file, 'w') as f:
-            json.dump(self.trade_counts, f)
+    def order_filled(self, pair: str, trade: Trade, order: Order, current_time: datetime, **kwargs) -> None:
+        if self.trade_gate and order.ft_order_side == trade.exit_side and not trade.is_open:
+            self.trade_gate.release(self._gate_name, pair)
 
-        return True  # Confirm trade entry
+    def bot_loop_start(self, current_time: datetime, **kwargs) -> None:
+        """Keeps the shared trade gate in step with this bot's open trades."""
+        if self._backtesting:
+            return
+        if time.monotonic() - self._last_reconcile > self.reconcile_interval:
+            self._reconcile_trade_gate()
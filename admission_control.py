@@ -0,0 +1,206 @@
+import asyncio
+import json
+import os
+import time
+
+import psutil
+from aiohttp import ClientError, ClientSession, ClientTimeout, BasicAuth
+
+HEALTH_PATH = "/api/v1/health"  # freqtrade API: {"last_process_ts": epoch seconds of the last completed loop}
+
+
+class BotSample:
+    """One measurement of a running bot: CPU %, RSS in MB and how late its trading loop is."""
+
+    def __init__(self, cpu_percent, rss_mb, loop_lag):
+        self.cpu_percent = cpu_percent
+        self.rss_mb = rss_mb
+        self.loop_lag = loop_lag  # Seconds past the expected next loop, None when unknown
+
+
+class AdmissionController:
+    """
+    Decides how many strategies the host can run, instead of a fixed max_parallel_processes.
+
+    Strategies are admitted in ranked order, in batches as large as the host's headroom: as
+    many bots as keep CPU and memory under their limits (each estimated to cost what the bots
+    already running cost on average), while no bot's trading loop is running late. The first
+    batch, before anything can be measured, is the supervisor's start_concurrency. The next
+    batch waits until the previous one is up and settle_seconds have passed. Once a pressure signal
+    persists for pressure_samples checks, the lowest-ranked bot is stopped and goes back in
+    the queue. It is only re-admitted after cooldown seconds.
+
+    Attributes:
+        supervisor (BotSupervisor): Starts and stops the bots.
+        ranked (list): Strategy rows in rank order, best first.
+        running (list): Names of admitted strategies, in rank order.
+        samples (dict): Bot name -> latest BotSample.
+    """
+
+    def __init__(self, supervisor, ranked_strategies, api_auth=None, max_cpu_percent=80.0, min_available_mb=1024,
+                 max_loop_lag=30.0, check_interval=15, settle_seconds=60, pressure_samples=3, cooldown=600,
+                 max_bots=None):
+        self.supervisor = supervisor
+        self.ranked = list(ranked_strategies)
+        self.rank = {strategy['strategy_name']: index for index, strategy in enumerate(self.ranked)}
+        self.api_auth = BasicAuth(*api_auth) if api_auth else None
+        self.max_cpu_percent = max_cpu_percent
+        self.min_available_mb = min_available_mb
+        self.max_loop_lag = max_loop_lag
+        self.check_interval = check_interval
+        self.settle_seconds = settle_seconds
+        self.pressure_samples = pressure_samples
+        self.cooldown = cooldown
+        self.max_bots = max_bots
+        self.running = []
+        self.samples = {}
+        self.evicted_at = {}
+        self.pressure_streak = 0
+        self.host_cpu = 0.0
+        self.last_admitted = 0.0
+        self.processes = {}  # pid -> psutil.Process, kept so cpu_percent measures since the last check
+        self.loop_allowances = {}  # bot name -> (config mtime, seconds between loops its config allows)
+
+    def process_usage(self, bot):
+        """Returns (cpu %, rss MB) of a bot's process and its children, or None if it isn't running."""
+        if bot.process is None or bot.process.returncode is not None:
+            return None
+        try:
+            process = self.processes.get(bot.process.pid)
+            if process is None:
+                process = self.processes[bot.process.pid] = psutil.Process(bot.process.pid)
+            members = [process] + process.children(recursive=True)
+            cpu = sum(member.cpu_percent(None) for member in members)
+            rss = sum(member.memory_info().rss for member in members) / (1024 * 1024)
+        except psutil.Error:
+            return None
+        return cpu, rss
+
+    def loop_allowance(self, bot):
+        """
+        Seconds a healthy bot may go between completed loops, from the config the supervisor
+        generated for it: its loop interval. Re-read when a restart rewrote it.
+        """
+        if not bot.config_path:
+            return 5
+        try:
+            mtime = os.path.getmtime(bot.config_path)
+        except OSError:
+            return 5
+        cached = self.loop_allowances.get(bot.name)
+        if cached is None or cached[0] != mtime:
+            with open(bot.config_path, 'r') as file:
+                config = json.load(file)
+            cached = self.loop_allowances[bot.name] = (
+                mtime, config.get('internals', {}).get('process_throttle_secs', 5))
+        return cached[1]
+
+    async def loop_lag(self, session, bot):
+        """Seconds the bot's last completed loop is overdue, from freqtrade's health endpoint."""
+        try:
+            async with session.get(f"{bot.url}{HEALTH_PATH}", auth=self.api_auth) as response:
+                if response.status != 200:
+                    return None
+                health = await response.json(content_type=None)
+        except (ClientError, OSError, asyncio.TimeoutError, ValueError):
+            return None
+        last_process_ts = health.get('last_process_ts')
+        if not last_process_ts:
+            return None
+        return max(0.0, time.time() - last_process_ts - self.loop_allowance(bot))
+
+    async def sample(self, session):
+        """Measures every running bot."""
+        bots = [self.supervisor.bots[name] for name in self.running
+                if name in self.supervisor.bots and self.supervisor.bots[name].state == "running"]
+        lags = await asyncio.gather(*(self.loop_lag(session, bot) for bot in bots))
+        self.samples = {}
+        live_pids = {bot.process.pid for bot in bots if bot.process is not None}
+        self.processes = {pid: process for pid, process in self.processes.items() if pid in live_pids}
+        for bot, lag in zip(bots, lags):
+            usage = self.process_usage(bot)
+            if usage is not None:
+                self.samples[bot.name] = BotSample(usage[0], usage[1], lag)
+
+    def pressure(self):
+        """Returns the reason the host is overloaded, or None."""
+        # Host CPU since the previous check; headroom() reuses it
+        self.host_cpu = psutil.cpu_percent(None)
+        available_mb = psutil.virtual_memory().available / (1024 * 1024)
+        if self.host_cpu > self.max_cpu_percent:
+            return f"CPU at {self.host_cpu:.0f}%"
+        if available_mb < self.min_available_mb:
+            return f"only {available_mb:.0f} MB memory available"
+        late = [name for name, sample in self.samples.items()
+                if sample.loop_lag is not None and sample.loop_lag > self.max_loop_lag]
+        if late:
+            return f"trading loop late for {', '.join(late)}"
+        return None
+
+    def headroom(self):
+        """How many more bots fit, each costing what the running bots cost on average."""
+        limit = len(self.ranked) if self.max_bots is None else max(0, self.max_bots - len(self.running))
+        if not self.samples:
+            # Measure the first batch before adding more
+            return 0 if self.running else min(limit, self.supervisor.start_concurrency)
+        n_cpus = psutil.cpu_count() or 1
+        bot_cpu = sum(sample.cpu_percent for sample in self.samples.values()) / len(self.samples) / n_cpus
+        bot_rss = sum(sample.rss_mb for sample in self.samples.values()) / len(self.samples)
+        available_mb = psutil.virtual_memory().available / (1024 * 1024)
+        fit_cpu = (self.max_cpu_percent - self.host_cpu) // bot_cpu if bot_cpu > 0 else limit
+        fit_memory = (available_mb - self.min_available_mb) // bot_rss if bot_rss > 0 else limit
+        return max(0, int(min(limit, fit_cpu, fit_memory)))
+
+    def next_candidate(self):
+        now = time.monotonic()
+        for strategy in self.ranked:
+            name = strategy['strategy_name']
+            if name not in self.running and now - self.evicted_at.get(name, -self.cooldown) >= self.cooldown:
+                return strategy
+        return None
+
+    async def step(self, session):
+        """One control decision: admit the next batch of strategies, evict the lowest-ranked one, or hold."""
+        await self.sample(session)
+        reason = self.pressure()
+        self.pressure_streak = self.pressure_streak + 1 if reason else 0
+
+        if self.pressure_streak >= self.pressure_samples and len(self.running) > 1:
+            name = self.running.pop()
+            self.evicted_at[name] = time.monotonic()
+            self.pressure_streak = 0
+            print(f"Admission: stopping {name} ({reason}); {len(self.running)} bots left.")
+            await self.supervisor.remove(name)
+            return
+
+        starting = any(self.supervisor.bots[name].state in ("pending", "starting")
+                       for name in self.running if name in self.supervisor.bots)
+        settled = time.monotonic() - self.last_admitted >= self.settle_seconds
+        if reason or starting or not settled:
+            return
+
+        admitted = []
+        for _ in range(self.headroom()):
+            candidate = self.next_candidate()
+            if candidate is None:
+                break
+            self.running.append(candidate['strategy_name'])
+            admitted.append(candidate)
+        if admitted:
+            self.running.sort(key=self.rank.get)
+            self.last_admitted = time.monotonic()
+            print(f"Admission: starting {', '.join(strategy['strategy_name'] for strategy in admitted)} "
+                  f"({len(self.running)} bots).")
+            for candidate in admitted:
+                self.supervisor.add(candidate)
+
+    async def run(self):
+        """Admits and evicts bots until the supervisor stops."""
+        psutil.cpu_percent(None)  # Prime the host-wide CPU counter
+        async with ClientSession(timeout=ClientTimeout(total=10)) as session:
+            while not self.supervisor.stopping.is_set():
+                await self.step(session)
+                try:
+                    await asyncio.wait_for(self.supervisor.stopping.wait(), self.check_interval)
+                except asyncio.TimeoutError:
+                    pass
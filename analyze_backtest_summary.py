@@ -1,48 +1,66 @@
+import json
+from pathlib import Path
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-import matplotlib.pyplot as plt
+from results_index import open_results_index
+from portfolio_selection import return_series, correlation_matrix, select_uncorrelated
+from portfolio_simulation import TradeBook, optimize_portfolio
 
-# Load the data
-file_path = 'MY_HELPER_SCRIPTS/MY_BACKTESTING_RESULTS/TOP_STRATEGIES/results.csv'
-data = pd.read_csv(file_path)
+# Candidates are the same top 80 summarize_backtest.py selects, straight from the results index
+results_dir = 'MY_HELPER_SCRIPTS/MY_BACKTESTING_RESULTS'
+data = open_results_index(results_dir).dataframe("positive_ev > ? AND profit_total_abs > ?", (0.5, 100), limit=80)
 
 # Convert 'duration_avg' to Timedelta for comparison and apply filters
-data['duration_avg'] = pd.to_timedelta(data['duration_avg'])
+data['duration_avg'] = pd.to_timedelta(data['duration_avg_s'], unit='s')
 data = data[(data['duration_avg'] <= pd.Timedelta(days=7)) &
             (data['trades'] >= 30) & (data['positive_ev'] > 2)]
 
-# Select columns relevant for clustering
-features = data[['profit_mean', 'profit_mean_pct', 'profit_sum', 'profit_sum_pct',
-                 'profit_total_abs', 'profit_total', 'profit_total_pct',
-                 'max_drawdown_account', 'winrate']]
+# live_run_strategies.py runs each bot at the timeframe its results were backtested at
+unknown_timeframe = data['timeframe'].isna()
+if unknown_timeframe.any():
+    print(f"Skipping {unknown_timeframe.sum()} strategies whose timeframe isn't recorded; "
+          f"rerun backtest_strategies.py to write {results_dir}/params.json.")
+    data = data[~unknown_timeframe]
 
-# Standardize the data
-scaler = StandardScaler()
-features_scaled = scaler.fit_transform(features)
+# Pick strategies whose trades don't move together, using the Parquet trades kept by the backtests
+returns_by = '1D'  # Or a candle length such as '5min' for per-candle returns
+n_strategies = 20
+n_candidates = 3 * n_strategies  # Low-correlation pool the portfolio simulation chooses from
+max_correlation = 0.5
 
-# Apply K-means clustering
-kmeans = KMeans(n_clusters=20, random_state=0)
-clusters = kmeans.fit_predict(features_scaled)
+# The live bots share the wallet and slot limits of the base config live_run_strategies.py uses
+with open('user_data/configs/config_kraken_backtest.json', 'r') as file:
+    live_config = json.load(file)
+simulation = {
+    'starting_balance': float(live_config.get('dry_run_wallet', 1000)),
+    'max_open_trades': int(live_config.get('max_open_trades', 10)),
+    'max_open_trades_per_pair': 3,  # IStrategyWithEntryOrderBlocking.max_open_trades_per_pair
+}
 
-# Add cluster information to the original dataframe
-data['cluster'] = clusters
+data = data.set_index('strategy_name', drop=False)
+trades_dir = Path(results_dir) / 'trades'
+names, periods, returns = return_series(data.index, trades_dir, freq=returns_by)
+print(f"{len(names)} of {len(data)} candidate strategies have exported trades over {len(periods)} periods.")
 
-# Function to select the most profitable strategy from each cluster
+pool = select_uncorrelated(returns, data.loc[names, 'positive_ev'].to_numpy(), n_candidates, max_correlation)
 
+# Grow the portfolio one strategy at a time on its simulated combined positive_ev
+book = TradeBook([names[index] for index in pool], trades_dir)
+portfolio, portfolio_stats = optimize_portfolio(book, book.strategies, n_strategies, **simulation)
+if portfolio_stats:
+    print(f"Simulated portfolio of {len(portfolio)}: profit {portfolio_stats['profit_total_abs']:.2f}, "
+          f"max drawdown {portfolio_stats['max_drawdown_abs']:.2f} ({portfolio_stats['max_drawdown_pct']:.1%}), "
+          f"{portfolio_stats['trades']} trades, {portfolio_stats['rejected']} skipped for lack of slots, "
+          f"{portfolio_stats['mean_open_trades']:.1f} open on average")
 
-def select_top_strategies(df, n_strategies=1):
-    selected_strategies = pd.DataFrame()
-    for cluster in df['cluster'].unique():
-        cluster_data = df[df['cluster'] == cluster]
-        top_strategies = cluster_data.nlargest(n_strategies, 'profit_total_pct')
-        selected_strategies = pd.concat([selected_strategies, top_strategies], axis=0)
-    return selected_strategies
+selected = [names.index(strategy) for strategy in portfolio]
+correlations = correlation_matrix(returns[selected])
+off_diagonal = correlations[~np.eye(len(selected), dtype=bool)]
+if len(off_diagonal):
+    print(f"Selected {len(selected)} strategies: mean pairwise correlation {off_diagonal.mean():.2f}, "
+          f"max {off_diagonal.max():.2f}")
 
-
-# Select the most profitable strategy from each cluster
-top_strategies = select_top_strategies(data)
-top_strategies['timeframe'] = '5m'  # Add hardcoded 'timeframe'
+top_strategies = data.loc[portfolio].reset_index(drop=True)
 print(top_strategies)
 
 # Save to CSV
@@ -0,0 +1,160 @@
+import ast
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+# Content-addressed store of strategy_comparison records. An entry's key hashes everything
+# that can change a backtest result: the strategy source, the local helper modules it
+# imports, the run parameters and the merged freqtrade config.
+
+_digest_memo = {}  # path -> (mtime_ns, size, sha256), so shared helpers are hashed once
+_imports_memo = {}  # (path, sha256) -> local imports, so shared helpers are parsed once
+
+
+def file_digest(path):
+    """Returns the sha256 of a file, reusing the previous hash while mtime and size are unchanged."""
+    path = Path(path)
+    stat = path.stat()
+    memo = _digest_memo.get(path)
+    if memo and memo[0] == stat.st_mtime_ns and memo[1] == stat.st_size:
+        return memo[2]
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    _digest_memo[path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def local_imports(source_file, search_dirs):
+    """Returns the local .py files a source file imports, e.g. IStrategyWithEntryOrderBlocking.py."""
+    memo_key = (Path(source_file), file_digest(source_file))
+    if memo_key in _imports_memo:
+        return _imports_memo[memo_key]
+
+    try:
+        tree = ast.parse(Path(source_file).read_text())
+    except (SyntaxError, UnicodeDecodeError):
+        _imports_memo[memo_key] = []
+        return []
+
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.add(node.module.split('.')[0])
+
+    found = []
+    for module in sorted(modules):
+        for directory in search_dirs:
+            candidate = Path(directory) / f"{module}.py"
+            if candidate.exists():
+                found.append(candidate)
+                break
+    _imports_memo[memo_key] = found
+    return found
+
+
+def strategy_dependencies(strategy_file, search_dirs):
+    """Returns the strategy file plus every local module it imports, transitively."""
+    seen = []
+    stack = [Path(strategy_file)]
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.append(current)
+        stack.extend(local_imports(current, search_dirs))
+    return seen
+
+
+def deep_merge(base, override):
+    """Merges config dicts the way freqtrade layers multiple --config files."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def merged_config(config_files):
+    """Loads and merges the given config files in order."""
+    config = {}
+    for config_file in config_files:
+        with open(config_file, 'r') as file:
+            config = deep_merge(config, json.load(file))
+    return config
+
+
+def cache_key(strategy, strategy_dir, run_params, config, search_dirs=None):
+    """Builds the content hash identifying one strategy backtest under one set of run parameters."""
+    search_dirs = search_dirs or [strategy_dir, '.']
+    dependencies = strategy_dependencies(Path(strategy_dir) / f"{strategy}.py", search_dirs)
+
+    hasher = hashlib.sha256()
+    hasher.update(strategy.encode())
+    for dependency in sorted(dependencies, key=lambda path: path.name):
+        hasher.update(dependency.name.encode())
+        hasher.update(file_digest(dependency).encode())
+    hasher.update(json.dumps(run_params, sort_keys=True).encode())
+    hasher.update(json.dumps(config, sort_keys=True).encode())
+    return hasher.hexdigest()
+
+
+def dependencies_mtime(strategy, strategy_dir, search_dirs=None):
+    """Returns the newest modification time among a strategy's source and helper files."""
+    search_dirs = search_dirs or [strategy_dir, '.']
+    dependencies = strategy_dependencies(Path(strategy_dir) / f"{strategy}.py", search_dirs)
+    return max(path.stat().st_mtime for path in dependencies)
+
+
+def cache_lookup(cache_dir, key):
+    """Returns the cache entry for a key, or None on a miss.
+
+    An entry's "result" is None when freqtrade ran but produced no results for the strategy.
+    A hit refreshes the entry's age for eviction.
+    """
+    entry_file = Path(cache_dir) / f"{key}.json"
+    try:
+        with open(entry_file, 'r') as file:
+            entry = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    os.utime(entry_file)
+    return entry
+
+
+def cache_store(cache_dir, key, strategy, result):
+    """Stores a strategy's result under its content key."""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_dir / f"{key}.tmp"
+    with open(tmp_file, 'w') as file:
+        json.dump({"strategy": strategy, "created": time.time(), "result": result}, file)
+    os.replace(tmp_file, cache_dir / f"{key}.json")
+
+
+def cache_evict(cache_dir, max_bytes):
+    """Deletes the least recently used entries until the cache fits in max_bytes. Returns the count removed."""
+    cache_dir = Path(cache_dir)
+    if not cache_dir.exists():
+        return 0
+
+    entries = []
+    total_bytes = 0
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.json'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_bytes += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        os.remove(path)
+        total_bytes -= size
+        removed += 1
+    return removed
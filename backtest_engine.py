@@ -0,0 +1,230 @@
+import os
+import time
+import traceback
+from copy import deepcopy
+
+import pandas as pd
+from freqtrade.commands.optimize_commands import setup_optimize_configuration
+from freqtrade.data import history
+from freqtrade.data.history import get_timerange
+from freqtrade.configuration import TimeRange
+from freqtrade.enums import RunMode
+from freqtrade.exchange import timeframe_to_seconds
+from freqtrade.optimize.backtesting import Backtesting
+from freqtrade.optimize.optimize_reports import generate_backtest_stats
+from freqtrade.resolvers import StrategyResolver
+
+from backtest_results_io import save_trades_columnar
+from ohlcv_cache import candle_type_of, open_dataset, prepare_dataset
+
+# Warmup candles loaded at least. Data is shared by every strategy a worker runs, so it is
+# loaded with this much history unless a batch needs more, and reloaded only then.
+DEFAULT_STARTUP_CANDLES = 500
+
+
+class InProcessBacktester:
+    """
+    Runs freqtrade backtests inside the current interpreter, replacing run_backtest.sh.
+
+    One instance lives for the whole life of a worker process. It keeps a configured
+    Backtesting object and the loaded OHLCV data per (pairs, timeframe, timerange),
+    so freqtrade start-up, config parsing and candle loading are paid once per worker
+    rather than once per batch.
+
+    Candles are loaded from the config alone, with at least startup_candles of warmup.
+    Each batch is backtested on exactly the warmup run_backtest.sh would give it, the largest
+    startup_candle_count in the batch; candles are reloaded when that is more than was loaded.
+
+    With an OHLCV cache directory, candles prepared by ohlcv_cache.prepare_dataset are
+    memory-mapped instead of decoded, so all workers on a host share one copy of them.
+
+    Attributes:
+        config_files (list): freqtrade config files, merged in order.
+        startup_candles (int): Least warmup candles loaded ahead of every timerange.
+        ohlcv_cache_dir (str): Where prepared datasets live, or None to always use freqtrade's loader.
+        configs (dict): Run-parameter key -> processed freqtrade config.
+        engines (dict): Run-parameter key -> Backtesting.
+        strategy_configs (dict): Run-parameter key -> the engine's config before any strategy was
+            applied to it, copied for every strategy loaded.
+        candles (dict): Run-parameter key -> (warmup candles loaded, {pair: DataFrame}).
+    """
+
+    def __init__(self, config_files, startup_candles=DEFAULT_STARTUP_CANDLES, ohlcv_cache_dir=None):
+        self.config_files = list(config_files)
+        self.startup_candles = startup_candles
+        self.ohlcv_cache_dir = ohlcv_cache_dir
+        self.configs = {}
+        self.engines = {}
+        self.strategy_configs = {}
+        self.candles = {}
+
+    @staticmethod
+    def dataset_key(params):
+        """Identifies the candles a set of run parameters needs. The fee is applied per run."""
+        return (tuple(params["pairs"]), params["timeframe"], params["timerange"])
+
+    def _config(self, params):
+        """The processed freqtrade config for the run parameters, without any strategy."""
+        key = self.dataset_key(params)
+        if key not in self.configs:
+            args = {
+                "config": self.config_files,
+                "timerange": params["timerange"],
+                "timeframe": params["timeframe"],
+                "fee": params["fee"],
+                "pairs": list(params["pairs"]),
+                "export": "none",
+            }
+            self.configs[key] = setup_optimize_configuration(args, RunMode.BACKTEST)
+        return self.configs[key]
+
+    def _engine(self, params, strategies, errors):
+        """
+        The Backtesting object for the run parameters. freqtrade builds it around a strategy,
+        so the first of strategies that loads is used; the ones that don't are added to errors.
+
+        It is built through strategy_list, which loads the strategy from a copy of the config.
+        With config["strategy"] instead, the strategy's minimal_roi, stoploss and order types
+        would be written into the engine's config and inherited by every later strategy.
+        """
+        key = self.dataset_key(params)
+        for strategy_name in strategies:
+            if key in self.engines:
+                break
+            config = deepcopy(self._config(params))
+            config["strategy_list"] = [strategy_name]
+            try:
+                backtesting = Backtesting(config)
+                backtesting.load_bt_data_detail()
+            except Exception:
+                errors[strategy_name] = traceback.format_exc()
+                continue
+            self.engines[key] = backtesting
+            self.strategy_configs[key] = deepcopy(backtesting.config)
+        return self.engines.get(key)
+
+    def _strategy_config(self, params, strategy_name):
+        """A fresh config for loading one strategy, sharing nothing with the others."""
+        strategy_config = deepcopy(self.strategy_configs[self.dataset_key(params)])
+        strategy_config.pop("strategy_list", None)
+        strategy_config["strategy"] = strategy_name
+        strategy_config["fee"] = params["fee"]
+        return strategy_config
+
+    def _load_candles(self, config, params, startup_candles):
+        """
+        (warmup candles, {pair: DataFrame}) with at least startup_candles ahead of the timerange, as
+        Backtesting.load_bt_data() loads them. A prepared dataset short of warmup is rebuilt first.
+        """
+        if self.ohlcv_cache_dir:
+            cache = open_dataset(config, params, startup_candles, self.ohlcv_cache_dir)
+            if cache is None:
+                prepare_dataset(config, params, startup_candles, self.ohlcv_cache_dir)
+                cache = open_dataset(config, params, startup_candles, self.ohlcv_cache_dir)
+            if cache is not None:
+                return cache.manifest["startup_candles"], cache.dataframes()
+        return startup_candles, history.load_data(
+            datadir=config["datadir"],
+            pairs=list(params["pairs"]),
+            timeframe=params["timeframe"],
+            timerange=TimeRange.parse_timerange(params["timerange"]),
+            startup_candles=startup_candles,
+            fail_without_data=True,
+            data_format=config.get("dataformat_ohlcv", "feather"),
+            candle_type=candle_type_of(config),
+        )
+
+    def _candles(self, params, required_startup):
+        """
+        (data, timerange) with exactly required_startup warmup candles, as load_bt_data() returns
+        them for a strategy list needing that much. The data are views of the loaded candles.
+        """
+        key = self.dataset_key(params)
+        loaded = self.candles.get(key)
+        if loaded is None or loaded[0] < required_startup:
+            startup = max(required_startup, self.startup_candles)
+            loaded = self.candles[key] = self._load_candles(self._config(params), params, startup)
+        data = loaded[1]
+
+        timerange = TimeRange.parse_timerange(params["timerange"])
+        timeframe_secs = timeframe_to_seconds(params["timeframe"])
+        if timerange.startts:
+            window_start = pd.Timestamp(timerange.startts - required_startup * timeframe_secs, unit="s", tz="UTC")
+            data = {pair: dataframe.iloc[dataframe["date"].searchsorted(window_start):]
+                    for pair, dataframe in data.items()}
+            data = {pair: dataframe for pair, dataframe in data.items() if len(dataframe)}
+        min_date, _ = get_timerange(data)
+        timerange.adjust_start_if_necessary(timeframe_secs, required_startup, min_date)
+        return data, timerange
+
+    def run_batch(self, strategies, params, trades_dir=None):
+        """Backtests strategies against the cached data for params.
+
+        Returns {"comparison": [...], "errors": {strategy: traceback}, "seconds": {strategy: s}}.
+        The comparison records are the same strategy_comparison entries run_backtest.sh exports.
+        A strategy that fails to load or run is reported in "errors" without affecting the rest.
+        """
+        errors = {}
+        seconds = {}
+        backtesting = self._engine(params, strategies, errors)
+        if backtesting is None:
+            return {"comparison": [], "errors": errors, "seconds": {strategy: 0.0 for strategy in strategies}}
+        backtesting.all_results = {}
+        backtesting.fee = params["fee"]
+        backtesting.config["fee"] = params["fee"]
+
+        loaded = {}
+        for strategy_name in strategies:
+            if strategy_name in errors:
+                seconds[strategy_name] = 0.0
+                continue
+            start = time.monotonic()
+            try:
+                loaded[strategy_name] = StrategyResolver.load_strategy(self._strategy_config(params, strategy_name))
+            except Exception:
+                errors[strategy_name] = traceback.format_exc()
+            seconds[strategy_name] = time.monotonic() - start
+        if not loaded:
+            return {"comparison": [], "errors": errors, "seconds": seconds}
+
+        # run_backtest.sh warms every strategy of a batch up with the batch's largest startup period
+        backtesting.required_startup = max(strategy.startup_candle_count for strategy in loaded.values())
+        data, timerange = self._candles(params, backtesting.required_startup)
+
+        min_date = max_date = None
+        for strategy_name, strategy in loaded.items():
+            start = time.monotonic()
+            try:
+                min_date, max_date = backtesting.backtest_one_strategy(strategy, data, timerange)
+            except Exception:
+                errors[strategy_name] = traceback.format_exc()
+            seconds[strategy_name] += time.monotonic() - start
+
+        if not backtesting.all_results:
+            return {"comparison": [], "errors": errors, "seconds": seconds}
+
+        stats = generate_backtest_stats(data, backtesting.all_results, min_date=min_date, max_date=max_date)
+        if trades_dir is not None:
+            for strategy_name, strategy_stats in stats["strategy"].items():
+                save_trades_columnar(strategy_name, strategy_stats.get("trades", []), trades_dir)
+
+        return {"comparison": stats["strategy_comparison"], "errors": errors, "seconds": seconds}
+
+
+# Long-lived worker process state, set up once by init_worker
+_backtester = None
+
+
+def init_worker(config_files, startup_candles=DEFAULT_STARTUP_CANDLES, ohlcv_cache_dir=None):
+    """Process pool initializer: creates the worker's backtester."""
+    global _backtester
+    _backtester = InProcessBacktester(config_files, startup_candles, ohlcv_cache_dir)
+
+
+def run_batch_in_worker(strategies, params, trades_dir=None):
+    """Process pool task: backtests one batch in this worker and tags the result with the worker pid."""
+    start = time.monotonic()
+    result = _backtester.run_batch(strategies, params, trades_dir)
+    result["worker"] = os.getpid()
+    result["wall_seconds"] = time.monotonic() - start
+    return result
@@ -0,0 +1,64 @@
+import hashlib
+import itertools
+import json
+
+# A sweep matrix is a JSON file such as:
+# {
+#     "timeranges": ["20230101-20230201", "20230601-20230701"],
+#     "pair_sets": {"majors": ["BTC/USDT", "ETH/USDT"], "alts": ["SOL/USDT", "ADA/USDT"]},
+#     "timeframes": ["5m", "15m"],
+#     "fees": [0.001]
+# }
+# Every axis is optional and falls back to the single value of the base run parameters.
+# pair_sets may also be a plain list of pair lists, which are then named set0, set1, ...
+
+
+def load_matrix(matrix_file):
+    """Loads a sweep matrix definition."""
+    with open(matrix_file, 'r') as file:
+        return json.load(file)
+
+
+def named_pair_sets(matrix, base_params):
+    """Returns [(name, pairs)] for the matrix, de-duplicating identical pair sets."""
+    pair_sets = matrix.get("pair_sets", {"base": base_params["pairs"]})
+    if isinstance(pair_sets, list):
+        pair_sets = {f"set{index}": pairs for index, pairs in enumerate(pair_sets)}
+
+    named = []
+    seen = set()
+    for name, pairs in pair_sets.items():
+        key = tuple(sorted(pairs))
+        if key not in seen:
+            seen.add(key)
+            named.append((name, sorted(pairs)))
+    return named
+
+
+def cell_id(params, pair_set_name):
+    """Readable, filesystem-safe identifier of one matrix cell."""
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:8]
+    return f"{params['timeframe']}_{params['timerange']}_{pair_set_name}_fee{params['fee']}_{digest}"
+
+
+def expand_matrix(matrix, base_params):
+    """Expands a matrix into de-duplicated cells: [{"id", "params"}].
+
+    Cells come out grouped by dataset (pairs, timeframe, timerange) so jobs that need the
+    same candles are scheduled next to each other.
+    """
+    timeranges = list(dict.fromkeys(matrix.get("timeranges", [base_params["timerange"]])))
+    timeframes = list(dict.fromkeys(matrix.get("timeframes", [base_params["timeframe"]])))
+    fees = list(dict.fromkeys(matrix.get("fees", [base_params["fee"]])))
+    pair_sets = named_pair_sets(matrix, base_params)
+
+    cells = []
+    for (name, pairs), timeframe, timerange, fee in itertools.product(pair_sets, timeframes, timeranges, fees):
+        params = dict(base_params, pairs=pairs, timeframe=timeframe, timerange=timerange, fee=fee)
+        cells.append({"id": cell_id(params, name), "params": params})
+    return cells
+
+
+def dataset_key(params):
+    """Cells with the same dataset key backtest on the same candles."""
+    return (tuple(params["pairs"]), params["timeframe"], params["timerange"])
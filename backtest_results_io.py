@@ -0,0 +1,98 @@
+import json
+import os
+from pathlib import Path
+
+try:
+    import ijson  # Streams per-strategy trades without loading the whole export; see requirements.txt
+except ImportError:
+    ijson = None
+
+COMPARISON_KEY = b'"strategy_comparison"'
+TAIL_BLOCK_BYTES = 1024 * 1024
+MAX_TAIL_BYTES = 64 * 1024 * 1024  # Give up on the tail scan and parse the full file past this
+
+
+def positive_ev(result):
+    """profit_total_abs / max_drawdown_abs of a strategy_comparison record, or the profit without drawdown."""
+    profit_total_abs = float(result.get('profit_total_abs', 0))
+    max_drawdown_abs = result.get('max_drawdown_abs')
+
+    # Handle missing or zero max_drawdown_abs by falling back to profit_total_abs
+    if max_drawdown_abs is None or float(str(max_drawdown_abs).replace('"', '')) == 0:
+        return profit_total_abs
+    return profit_total_abs / float(str(max_drawdown_abs).replace('"', ''))
+
+
+def read_strategy_comparison(result_file):
+    """Reads only the strategy_comparison block of a freqtrade --export trades file.
+
+    freqtrade writes strategy_comparison after the per-strategy trade lists, so the block is
+    located by scanning backwards from the end of the file and decoded on its own. The
+    trades, which make up nearly all of the file, are never parsed.
+    """
+    with open(result_file, 'rb') as file:
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        tail = b''
+        while position > 0 and len(tail) <= MAX_TAIL_BYTES:
+            read_size = min(TAIL_BLOCK_BYTES, position)
+            position -= read_size
+            file.seek(position)
+            tail = file.read(read_size) + tail
+
+            key_index = tail.rfind(COMPARISON_KEY)
+            if key_index == -1:
+                continue
+            text = tail[key_index + len(COMPARISON_KEY):].decode('utf-8')
+            colon = text.find(':')
+            value_start = colon + 1
+            while text[value_start].isspace():
+                value_start += 1
+            try:
+                comparison, _ = json.JSONDecoder().raw_decode(text, value_start)
+                return comparison
+            except json.JSONDecodeError:
+                break  # Key text appeared inside a value; fall back to a full parse
+
+    with open(result_file, 'r') as file:
+        return json.load(file).get("strategy_comparison", [])
+
+
+def iter_strategy_trades(result_file, strategies=None):
+    """Yields (strategy, trades) from a --export trades file, one strategy at a time.
+
+    Only one strategy's stats are held in memory at once. Raises ImportError without ijson
+    rather than parsing the whole export, which is what keeping trades must not cost.
+    """
+    if ijson is None:
+        raise ImportError("ijson is required to stream trades from the export")
+    with open(result_file, 'rb') as file:
+        for strategy, stats in ijson.kvitems(file, 'strategy', use_float=True):
+            if strategies is None or strategy in strategies:
+                yield strategy, stats.get("trades", [])
+
+
+def save_trades_columnar(strategy, trades, trades_dir):
+    """Writes a strategy's trades to <trades_dir>/<strategy>.parquet. Returns the path."""
+    import pandas as pd
+
+    trades_dir = Path(trades_dir)
+    trades_dir.mkdir(parents=True, exist_ok=True)
+
+    df = pd.DataFrame(trades)
+    for column in ("open_date", "close_date"):
+        if column in df:
+            df[column] = pd.to_datetime(df[column], utc=True)
+    # Nested per-trade columns (e.g. orders) don't map to a flat columnar layout
+    df = df.drop(columns=[column for column in ("orders",) if column in df])
+
+    trades_file = trades_dir / f"{strategy}.parquet"
+    df.to_parquet(trades_file, index=False)
+    return trades_file
+
+
+def load_trades(strategy, trades_dir, columns=None):
+    """Loads the trades kept for a strategy by save_trades_columnar."""
+    import pandas as pd
+
+    return pd.read_parquet(Path(trades_dir) / f"{strategy}.parquet", columns=columns)
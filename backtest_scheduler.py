@@ -0,0 +1,152 @@
+import heapq
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Per-strategy cost history: {"strategies": {name: {"seconds", "rss_mb", "runs"}}, "base_rss_mb": float}
+history_lock = threading.Lock()
+
+DEFAULT_STRATEGY_SECONDS = 30.0  # Cost assumed for strategies that were never timed
+EMA_ALPHA = 0.5  # Weight of the newest observation when updating a runtime estimate
+
+
+def run_with_rusage(command, env=None, cwd=None):
+    """Runs a command and returns (returncode, stdout, stderr, wall_seconds, peak_rss_mb).
+
+    The child is reaped with os.wait4 so its peak RSS (including the freqtrade process
+    spawned by run_backtest.sh) is measured per batch, even when batches run in parallel.
+    """
+    with tempfile.TemporaryFile(mode='w+') as out, tempfile.TemporaryFile(mode='w+') as err:
+        start = time.monotonic()
+        process = subprocess.Popen(command, stdout=out, stderr=err, text=True, env=env, cwd=cwd)
+        _, status, usage = os.wait4(process.pid, 0)
+        wall_seconds = time.monotonic() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        out.seek(0)
+        err.seek(0)
+        stdout, stderr = out.read(), err.read()
+
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    peak_rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return process.returncode, stdout, stderr, wall_seconds, peak_rss_mb
+
+
+def load_runtime_history(history_file):
+    """Loads the runtime history file, or an empty history if it doesn't exist."""
+    history_file = Path(history_file)
+    if history_file.exists():
+        with open(history_file, 'r') as file:
+            return json.load(file)
+    return {"strategies": {}, "base_rss_mb": None}
+
+
+def save_runtime_history(history, history_file):
+    """Saves the runtime history atomically."""
+    history_file = Path(history_file)
+    tmp_file = history_file.with_suffix('.tmp')
+    with open(tmp_file, 'w') as file:
+        json.dump(history, file, indent=4)
+    os.replace(tmp_file, history_file)
+
+
+def estimate_costs(history, strategies):
+    """Returns {strategy: (seconds, rss_mb)} using history, with defaults for unseen strategies."""
+    known = history.get("strategies", {})
+    timed = sorted(entry["seconds"] for entry in known.values() if entry.get("seconds"))
+    default_seconds = timed[len(timed) // 2] if timed else DEFAULT_STRATEGY_SECONDS
+    base_rss_mb = history.get("base_rss_mb") or 0.0
+
+    costs = {}
+    for strategy in strategies:
+        entry = known.get(strategy, {})
+        costs[strategy] = (entry.get("seconds") or default_seconds, entry.get("rss_mb") or base_rss_mb)
+    return costs
+
+
+def record_batch_runtime(history, strategy_batch, wall_seconds, peak_rss_mb):
+    """Folds one batch measurement into the per-strategy runtime history.
+
+    Wall time is split across the batch in proportion to the current estimates. A batch's
+    peak RSS is an upper bound for each member, so the tightest bound seen is kept; a
+    single-strategy batch therefore records that strategy's exact peak. peak_rss_mb may be
+    None when only timing is known.
+    """
+    with history_lock:
+        known = history.setdefault("strategies", {})
+        costs = estimate_costs(history, strategy_batch)
+        total_estimate = sum(seconds for seconds, _ in costs.values()) or 1.0
+
+        for strategy in strategy_batch:
+            observed = wall_seconds * costs[strategy][0] / total_estimate
+            entry = known.setdefault(strategy, {"seconds": None, "rss_mb": None, "runs": 0})
+            if entry["seconds"] is None:
+                entry["seconds"] = observed
+            else:
+                entry["seconds"] = EMA_ALPHA * observed + (1 - EMA_ALPHA) * entry["seconds"]
+            if peak_rss_mb is not None:
+                entry["rss_mb"] = peak_rss_mb if entry["rss_mb"] is None else min(entry["rss_mb"], peak_rss_mb)
+            entry["runs"] += 1
+
+        if peak_rss_mb is None:
+            return
+        # The smallest peak ever seen approximates freqtrade's baseline (interpreter + candles)
+        base = history.get("base_rss_mb")
+        history["base_rss_mb"] = peak_rss_mb if base is None else min(base, peak_rss_mb)
+
+
+def pack_batches(strategies, batch_size, history, memory_budget_mb=None):
+    """Packs strategies into batches of similar expected runtime, longest batches first.
+
+    Uses longest-processing-time-first greedy assignment: strategies are sorted by expected
+    runtime and each one goes into the currently lightest batch that still has room and stays
+    under the memory budget. A strategy that fits nowhere opens a new batch.
+    """
+    if not strategies:
+        return []
+
+    costs = estimate_costs(history, strategies)
+    base_rss_mb = history.get("base_rss_mb") or 0.0
+    n_batches = math.ceil(len(strategies) / batch_size)
+
+    batches = [[] for _ in range(n_batches)]
+    batch_rss = [base_rss_mb] * n_batches
+    heap = [(0.0, index) for index in range(n_batches)]  # (expected seconds, batch index)
+
+    for strategy in sorted(strategies, key=lambda name: costs[name][0], reverse=True):
+        seconds, rss_mb = costs[strategy]
+        increment = max(rss_mb - base_rss_mb, 0.0)
+
+        skipped = []
+        placed = False
+        while heap:
+            load, index = heapq.heappop(heap)
+            fits_memory = (memory_budget_mb is None or not batches[index]
+                           or batch_rss[index] + increment <= memory_budget_mb)
+            if len(batches[index]) < batch_size and fits_memory:
+                batches[index].append(strategy)
+                batch_rss[index] += increment
+                heapq.heappush(heap, (load + seconds, index))
+                placed = True
+                break
+            if len(batches[index]) < batch_size:
+                skipped.append((load, index))
+            # Full batches are dropped from the heap for good
+
+        for item in skipped:
+            heapq.heappush(heap, item)
+
+        if not placed:
+            batches.append([strategy])
+            batch_rss.append(base_rss_mb + increment)
+            heapq.heappush(heap, (seconds, len(batches) - 1))
+
+    batches = [batch for batch in batches if batch]
+    batches.sort(key=lambda batch: sum(costs[name][0] for name in batch), reverse=True)
+    return batches
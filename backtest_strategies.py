@@ -1,15 +1,66 @@
 import argparse
-import sys
 import os
-import subprocess
+import socket
+import time
+import shutil
+import queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
 from pathlib import Path
 import json
 from tqdm import tqdm  # Import tqdm for progress tracking
+from backtest_scheduler import (load_runtime_history, save_runtime_history, record_batch_runtime,
+                                pack_batches, estimate_costs, run_with_rusage, history_lock)
+from success_tracker_store import SuccessTracker
+from backtest_results_io import read_strategy_comparison, iter_strategy_trades, save_trades_columnar
+from backtest_cache import (cache_key, cache_lookup, cache_store, cache_evict, merged_config,
+                            dependencies_mtime)
+from backtest_matrix import load_matrix, expand_matrix, dataset_key
+from successive_halving import build_stages, stage_scores, promote
+from strategy_prescreen import prescreen_strategies, rejection_reason, PRESCREEN_STATUS_PREFIX
+from ohlcv_cache import OHLCV_CACHE_DIR
+from work_queue import WorkQueue, WORK_QUEUE_DB, print_progress
 
 # Constants
 STRATEGY_DIR = "user_data/strategies"
 RESULTS_DIR = "MY_HELPER_SCRIPTS/MY_BACKTESTING_RESULTS"
-SUCCESS_TRACKER_FILE = Path(RESULTS_DIR) / "success_tracker.json"
+SUCCESS_TRACKER_FILE = Path(RESULTS_DIR) / "success_tracker.json"  # Legacy tracker, migrated on first run
+SUCCESS_TRACKER_DB = Path(RESULTS_DIR) / "success_tracker.sqlite"
+WORKERS_DIR = Path(RESULTS_DIR) / "workers"  # One export directory per parallel worker
+ERRORS_DIR_NAME = "errors"  # stderr tail of each strategy that failed on its own, per results directory
+ERROR_TAIL_CHARS = 4000
+RUNTIME_HISTORY_FILE = Path(RESULTS_DIR) / "runtime_history.json"  # Wall time / peak RSS per strategy
+TRADES_DIR_NAME = "trades"  # Per-strategy trades kept as Parquet for later analysis, per results directory
+CELLS_DIR = Path(RESULTS_DIR) / "cells"  # Results of each sweep matrix cell live in cells/<cell id>/
+STAGES_DIR = Path(RESULTS_DIR) / "stages"  # Results of each successive halving screening stage
+CACHE_DIR = Path(RESULTS_DIR) / "cache"  # Results keyed by hash of strategy source + run parameters
+PRESCREEN_CACHE_FILE = Path(RESULTS_DIR) / "prescreen_cache.json"  # Static strategy checks keyed by file hash
+
+# Parameters handed to run_backtest.sh; every one of them is part of the result cache key
+BACKTEST_PARAMS = {
+    "timerange": "20230101-20230201",
+    "timeframe": "5m",
+    "fee": 0.001,
+    "pairs": ["BTC/USDT", "SOL/USDT", "ETH/USDT"],
+    "configs": ["user_data/configs/config_binance_backtest.json",
+                "user_data/configs/config_static_pairlist.json"],
+}
+
+# Cache key of every (cell id, strategy) scheduled in this run, filled by resolve_cached_strategies
+cache_keys = {}
+
+# Pre-screen verdict of every pending strategy (timeframe, startup_candle_count, ...), used to group batches
+strategy_metadata = {}
+
+# Whether exported trades are kept as Parquet before the export file is deleted
+keep_trades = True
+
+# Where the in-process engine memory-maps prepared candles from, or None to let each worker decode them
+ohlcv_cache_dir = OHLCV_CACHE_DIR
+
+# Shared work queue that batches are handed to for workers on other hosts, or None to run them here
+queue_file = None
+QUEUE_POLL_SECONDS = 10
+
 
 
 def initialize_directories():
@@ -18,48 +69,358 @@ def initialize_directories():
 
 
 def initialize_success_tracker():
-    """Initializes or loads the success tracker."""
-    if SUCCESS_TRACKER_FILE.exists():
-        with open(SUCCESS_TRACKER_FILE, 'r') as file:
-            return json.load(file)
-    else:
-        return {file[:-3]: 0 for file in os.listdir(STRATEGY_DIR) if file.endswith(".py")}
-
-
-def save_success_tracker(tracker):
-    """Saves the success tracker to file."""
-    with open(SUCCESS_TRACKER_FILE, 'w') as file:
-        json.dump(tracker, file, indent=4)
-
-
-def backtest_strategies(strategies, batch_size):
-    """Backtests strategies in batches."""
-    for batch in tqdm([strategies[i:i + batch_size] for i in range(0, len(strategies), batch_size)], desc="Backtesting"):
-        execute_backtest_batch(batch)
+    """Initializes or loads the success tracker, migrating success_tracker.json if present."""
+    is_new = not SUCCESS_TRACKER_DB.exists()
+    tracker = SuccessTracker(SUCCESS_TRACKER_DB, legacy_json_file=SUCCESS_TRACKER_FILE)
+    if is_new and len(tracker) == 0:
+        tracker.add_missing(file[:-3] for file in os.listdir(STRATEGY_DIR) if file.endswith(".py"))
+    return tracker
+
+
+def make_cell(cell_id, params, results_dir, tracker):
+    """
+    Bundles one set of run parameters with where its results and statuses are kept. The
+    parameters are written to the results directory, so summaries know what the results are of.
+    """
+    with open(Path(results_dir) / "params.json", 'w') as file:
+        json.dump(params, file, indent=4)
+    return {"id": cell_id, "params": params, "results_dir": Path(results_dir), "tracker": tracker}
+
+
+def initialize_matrix_cells(matrix_file):
+    """Expands a sweep matrix into cells, each with its own results directory and tracker."""
+    cells = []
+    for cell in expand_matrix(load_matrix(matrix_file), BACKTEST_PARAMS):
+        results_dir = CELLS_DIR / cell["id"]
+        results_dir.mkdir(parents=True, exist_ok=True)
+        tracker = SuccessTracker(results_dir / "success_tracker.sqlite")
+        tracker.add_missing(file[:-3] for file in os.listdir(STRATEGY_DIR) if file.endswith(".py"))
+        cells.append(make_cell(cell["id"], cell["params"], results_dir, tracker))
+    return cells
+
+
+def backtest_env(params):
+    """Returns the environment that passes the run parameters to run_backtest.sh."""
+    env = dict(os.environ)
+    env.update({
+        "TIMERANGE": params["timerange"],
+        "TIMEFRAME": params["timeframe"],
+        "FEE": str(params["fee"]),
+        "PAIRS": " ".join(params["pairs"]),
+        "CONFIGS": " ".join(params["configs"]),
+    })
+    return env
+
+
+def worker_export_dir(worker_id):
+    """Returns a clean export directory reserved for a single worker."""
+    export_dir = WORKERS_DIR / f"worker_{worker_id}"
+    shutil.rmtree(export_dir, ignore_errors=True)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    return export_dir
+
+
+def startup_groups(strategies):
+    """Groups strategies by startup_candle_count, in power-of-two buckets.
+
+    freqtrade loads and analyses every strategy of a batch with the largest startup period
+    in the batch, so one long-warmup strategy makes the whole batch slower.
+    """
+    groups = {}
+    for strategy in strategies:
+        startup = (strategy_metadata.get(strategy) or {}).get("startup_candle_count") or 0
+        groups.setdefault(startup.bit_length(), []).append(strategy)
+    return [groups[bucket] for bucket in sorted(groups)]
+
+
+def plan_batches(strategies, batch_size, memory_budget_mb=None):
+    """Splits strategies into batches of similar warm-up, bin-packing by historical cost once any history exists."""
+    batches = []
+    for group in startup_groups(strategies):
+        if runtime_history.get("strategies"):
+            batches.extend(pack_batches(group, batch_size, runtime_history, memory_budget_mb))
+        else:
+            batches.extend(group[i:i + batch_size] for i in range(0, len(group), batch_size))
+    if runtime_history.get("strategies"):
+        costs = estimate_costs(runtime_history, strategies)
+        batches.sort(key=lambda batch: sum(costs[name][0] for name in batch), reverse=True)
+    return batches
+
+
+def prescreen_pending(pending_by_cell, workers=None):
+    """Drops pending strategies that can't run, before any batch is scheduled.
+
+    Strategies whose file doesn't define a matching class, whose imports don't resolve, or
+    whose timeframe differs from the cell's are marked in the cell's tracker instead; they
+    are screened again when their file changes. Returns the filtered pending_by_cell.
+    """
+    pending = sorted({strategy for _, strategies in pending_by_cell for strategy in strategies})
+    verdicts = prescreen_strategies(pending, STRATEGY_DIR, PRESCREEN_CACHE_FILE, workers=workers)
+    strategy_metadata.update(verdicts)
+
+    screened = []
+    for cell, strategies in pending_by_cell:
+        reasons = {strategy: rejection_reason(verdicts[strategy], cell["params"]["timeframe"])
+                   for strategy in strategies}
+        rejected = {strategy: PRESCREEN_STATUS_PREFIX + reason for strategy, reason in reasons.items() if reason}
+        cell["tracker"].update(rejected)
+        for strategy, status in sorted(rejected.items()):
+            print(f"Skipping {strategy} ({cell['id']}): {status}")
+        screened.append((cell, [strategy for strategy in strategies if not reasons[strategy]]))
+    return screened
+
+
+def backtest_strategies(strategies, batch_size, workers=1, memory_budget_mb=None, bisect_failures=True,
+                        engine="script", cell=None):
+    """Backtests strategies in batches, running up to `workers` batches in parallel.
+
+    A batch that fails is split in halves which go back into the same pool, until the
+    strategies that break freqtrade are isolated and the rest have produced results.
+    """
+    cell = cell or default_cell
+    jobs = [(cell, batch) for batch in plan_batches(strategies, batch_size, memory_budget_mb)]
+    run_backtest_jobs(jobs, workers, bisect_failures, engine)
+
+
+def backtest_matrix(pending_by_cell, batch_size, workers=1, memory_budget_mb=None, bisect_failures=True,
+                    engine="script"):
+    """Backtests the pending strategies of every matrix cell in one shared worker pool.
+
+    Jobs are ordered so cells sharing a dataset (pairs, timeframe, timerange) run back to back,
+    which lets in-process workers reuse the candles they already loaded.
+    """
+    jobs = []
+    for cell, strategies in sorted(pending_by_cell, key=lambda item: dataset_key(item[0]["params"])):
+        jobs.extend((cell, batch) for batch in plan_batches(strategies, batch_size, memory_budget_mb))
+    run_backtest_jobs(jobs, workers, bisect_failures, engine)
+
+
+def backtest_successive_halving(strategies, stages, metric="positive_ev", retry_errors=False, use_cache=True,
+                                **run_kwargs):
+    """Screens strategies on progressively longer windows and returns the ones that survive every stage.
+
+    Each stage backtests the remaining candidates on its timerange and promotes those ranked
+    in the best keep_fraction by `metric` (at least min_keep). Ranks are taken over every
+    strategy with a result for the stage, not only this run's candidates, so resuming or
+    adding a few strategies later gives the same decisions as one run over the whole library.
+    Stage results live in their own results directory and tracker, and strategies dropped
+    along the way are marked in the main tracker.
+    """
+    candidates = list(strategies)
+    for stage in stages:
+        if not candidates:
+            break
+
+        results_dir = STAGES_DIR / f"stage{stage['index']}_{stage['timerange']}"
+        results_dir.mkdir(parents=True, exist_ok=True)
+        params = dict(BACKTEST_PARAMS, timerange=stage["timerange"])
+        cell = make_cell(f"stage{stage['index']}", params, results_dir,
+                         SuccessTracker(results_dir / "success_tracker.sqlite"))
+        cell["tracker"].add_missing(candidates)
+
+        if use_cache:
+            to_run = resolve_cached_strategies(cell["tracker"], retry_errors=retry_errors, cell=cell,
+                                               strategies=candidates)
+        else:
+            candidate_set = set(candidates)
+            to_run = [strategy for strategy in find_pending_strategies(cell["tracker"], retry_errors=retry_errors)
+                      if strategy in candidate_set]
+        backtest_strategies(to_run, cell=cell, **run_kwargs)
+
+        statuses = dict(cell["tracker"].items())
+        errored = [strategy for strategy in candidates if statuses.get(strategy) == "error"]
+        population = [strategy for strategy, status in statuses.items() if status == 1]
+        promoted_set = set(promote(stage_scores(results_dir, population, metric),
+                                   stage["keep_fraction"], stage["min_keep"]))
+        promoted = [strategy for strategy in candidates if strategy in promoted_set]
+
+        updates = {strategy: "error" for strategy in errored}
+        updates.update({strategy: f"screened out at stage {stage['index']}"
+                        for strategy in candidates if strategy not in promoted_set and strategy not in updates})
+        success_tracker.update(updates)
+
+        print(f"Stage {stage['index']} ({stage['timerange']}): {len(candidates)} screened, "
+              f"{len(errored)} errors, {len(promoted)} promoted.")
+        candidates = promoted
+    return candidates
+
+
+def run_backtest_jobs(jobs, workers, bisect_failures=True, engine="script"):
+    """Runs (cell, batch) jobs with the chosen engine."""
+    if queue_file:
+        backtest_via_queue(jobs, bisect_failures)
+        return
+    if engine == "inprocess":
+        backtest_batches_in_process(jobs, workers)
+        return
 
+    # Each worker slot owns its export directory, so concurrent freqtrade runs never
+    # read each other's BACKTESTING_RESULT files.
+    free_slots = queue.Queue()
+    for worker_id in range(workers):
+        free_slots.put(worker_id)
+
+    def run_batch_in_slot(cell, batch):
+        worker_id = free_slots.get()
+        try:
+            return execute_backtest_batch(batch, export_dir=worker_export_dir(worker_id),
+                                          bisect_failures=bisect_failures, cell=cell)
+        finally:
+            free_slots.put(worker_id)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor, \
+            tqdm(total=len(jobs), desc=f"Backtesting ({workers} workers)") as progress:
+        running = {executor.submit(run_batch_in_slot, cell, batch): cell for cell, batch in jobs}
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                cell = running.pop(future)
+                sub_batches = future.result()
+                if sub_batches:
+                    progress.total += len(sub_batches)
+                    progress.refresh()
+                    running.update({executor.submit(run_batch_in_slot, cell, batch): cell for batch in sub_batches})
+                progress.update(1)
+
+
+def backtest_via_queue(jobs, bisect_failures=True):
+    """Hands (cell, batch) jobs to the shared work queue and saves results as workers return them.
+
+    Workers (python work_queue.py worker) on any host with the repo on the shared filesystem
+    lease the batches; see WorkQueue. Batches still queued when this run is interrupted are
+    withdrawn, so workers don't keep backtesting for a coordinator that is gone.
+    """
+    work_queue = WorkQueue(queue_file)
+    run_id = f"{socket.gethostname()}-{os.getpid()}-{int(time.time())}"
+    cells = {cell["id"]: cell for cell, _ in jobs}
+    work_queue.enqueue(run_id, [(cell["id"], batch, cell["params"],
+                                 cell["results_dir"] / TRADES_DIR_NAME if keep_trades else None, bisect_failures)
+                                for cell, batch in jobs])
+    print(f"Queued {len(jobs)} batches as run {run_id} in {queue_file}")
 
-def execute_backtest_batch(strategy_batch):
-    """Executes backtesting for a batch of strategies and logs results."""
-    command = ['./run_backtest.sh', " ".join(strategy_batch)]
     try:
-        result = subprocess.run(command, capture_output=True, text=True)
-        if result.returncode == 0:
-            extract_and_save_results(strategy_batch)
+        while True:
+            active = work_queue.active(run_id)
+            for job in work_queue.collect(run_id):
+                cell = cells[job["cell_id"]]
+                if job["status"] == "failed":
+                    log_error(job["strategies"], job["error"] or "Failed without an error message", cell)
+                    continue
+                result = job["result"]
+                record_batch_runtime(runtime_history, job["strategies"], result["wall_seconds"], result["peak_rss_mb"])
+                save_runtime_history(runtime_history, RUNTIME_HISTORY_FILE)
+                save_strategy_results(job["strategies"], result["comparison"], cell)
+            print_progress(work_queue.progress(run_id))
+            if not active:
+                break
+            time.sleep(QUEUE_POLL_SECONDS)
+    finally:
+        work_queue.cancel(run_id)
+
+
+def backtest_batches_in_process(jobs, workers):
+    """Backtests (cell, batch) jobs in long-lived worker processes that keep freqtrade and the candles loaded.
+
+    Strategies that fail are isolated by the engine itself, so no bisection is needed. Candles
+    of every dataset are first converted to the memory-mapped OHLCV cache, so the workers
+    share one copy of them instead of each decoding its own.
+    """
+    from backtest_engine import init_worker, run_batch_in_worker, DEFAULT_STARTUP_CANDLES
+
+    if ohlcv_cache_dir:
+        from freqtrade.configuration import Configuration
+        from ohlcv_cache import prepare_dataset
+
+        # Enough warmup for every strategy using the dataset, as far as the pre-screen knows; a worker
+        # rebuilds it if a strategy turns out to need more
+        startups = {}
+        for cell, batch in jobs:
+            key = dataset_key(cell["params"])
+            known = [(strategy_metadata.get(strategy) or {}).get("startup_candle_count") or 0 for strategy in batch]
+            startups[key] = (cell["params"], max([startups.get(key, (None, 0))[1], *known]))
+        config = Configuration.from_files(BACKTEST_PARAMS["configs"])
+        for params, startup in startups.values():
+            prepare_dataset(config, params, max(startup, DEFAULT_STARTUP_CANDLES), ohlcv_cache_dir)
+
+    throughput = {}  # worker pid -> [strategies, busy seconds]
+    with ProcessPoolExecutor(max_workers=max(workers, 1), initializer=init_worker,
+                             initargs=(BACKTEST_PARAMS["configs"], DEFAULT_STARTUP_CANDLES,
+                                       ohlcv_cache_dir)) as executor:
+        futures = {}
+        for cell, batch in jobs:
+            trades_dir = cell["results_dir"] / TRADES_DIR_NAME if keep_trades else None
+            futures[executor.submit(run_batch_in_worker, batch, cell["params"], trades_dir)] = (cell, batch)
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc=f"Backtesting in-process ({workers} workers)"):
+            cell, batch = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                log_error(batch, str(e), cell)
+                continue
+
+            for strategy, error_message in result["errors"].items():
+                log_error([strategy], error_message, cell)
+            completed = [strategy for strategy in batch if strategy not in result["errors"]]
+            for strategy in completed:
+                record_batch_runtime(runtime_history, [strategy], result["seconds"][strategy], None)
+            save_runtime_history(runtime_history, RUNTIME_HISTORY_FILE)
+            save_strategy_results(completed, result["comparison"], cell)
+
+            stats = throughput.setdefault(result["worker"], [0, 0.0])
+            stats[0] += len(batch)
+            stats[1] += result["wall_seconds"]
+
+    for worker, (count, busy_seconds) in sorted(throughput.items()):
+        print(f"Worker {worker}: {count} strategies in {busy_seconds:.0f}s "
+              f"({count / max(busy_seconds, 1e-9):.2f} strategies/s)")
+
+
+def execute_backtest_batch(strategy_batch, export_dir=None, bisect_failures=False, cell=None):
+    """Executes backtesting for a batch of strategies and logs results.
+
+    Returns the halves of the batch that should be re-run when it failed and bisecting
+    is enabled, otherwise an empty list.
+    """
+    cell = cell or default_cell
+    export_dir = Path(export_dir) if export_dir else Path(os.getcwd())
+    command = ['./run_backtest.sh', " ".join(strategy_batch), str(export_dir / 'BACKTESTING_RESULT.json')]
+    try:
+        returncode, _, stderr, wall_seconds, peak_rss_mb = run_with_rusage(command, env=backtest_env(cell["params"]))
+        print(f"Batch of {len(strategy_batch)} took {wall_seconds:.1f}s, peak RSS {peak_rss_mb:.0f} MB")
+
+        if returncode == 0:
+            # Failed runs exit early, so only completed batches say anything about cost
+            record_batch_runtime(runtime_history, strategy_batch, wall_seconds, peak_rss_mb)
+            with history_lock:
+                save_runtime_history(runtime_history, RUNTIME_HISTORY_FILE)
+            extract_and_save_results(strategy_batch, export_dir, cell)
+        elif bisect_failures and len(strategy_batch) > 1:
+            middle = len(strategy_batch) // 2
+            print(f"Batch of {len(strategy_batch)} failed, bisecting: {' '.join(strategy_batch)}")
+            return [strategy_batch[:middle], strategy_batch[middle:]]
         else:
-            log_error(strategy_batch, result.stderr)
+            log_error(strategy_batch, stderr, cell)
     except Exception as e:
-        log_error(strategy_batch, str(e))
+        log_error(strategy_batch, str(e), cell)
+    return []
 
 
-def extract_and_save_results(strategy_batch):
-    """Extracts backtesting results for each strategy and saves them."""
+def read_export(strategy_batch, export_dir, trades_dir=None):
+    """Reads the latest BACKTESTING_RESULT export in export_dir and deletes it.
+
+    Returns the strategy_comparison records, or None when there is no export. With trades_dir,
+    each strategy's trades are kept there as Parquet first.
+    """
+    export_dir = Path(export_dir)
+
     # Read in all files starting with 'BACKTESTING_RESULT'
-    backtest_files = [f for f in os.listdir(os.getcwd()) if f.startswith('BACKTESTING_RESULT')]
+    backtest_files = [f for f in os.listdir(export_dir) if f.startswith('BACKTESTING_RESULT')]
 
     # Filter out and delete .meta.json files
     meta_files = [f for f in backtest_files if f.endswith('.meta.json')]
     for meta_file in meta_files:
-        os.remove(os.path.join(os.getcwd(), meta_file))
+        os.remove(export_dir / meta_file)
         print(f"Deleted {meta_file}.")
 
     # Remaining files should only be .json files (excluding .meta.json files)
@@ -67,66 +428,200 @@ def extract_and_save_results(strategy_batch):
 
     if not backtest_json_files:
         print("No BACKTESTING_RESULT.json files found.")
-        return
+        return None
 
     # Sort JSON files to find the latest
     backtest_json_files.sort(reverse=True)
     latest_result_file = backtest_json_files[0]
 
-    with open(os.path.join(os.getcwd(), latest_result_file), 'r') as file:
-        results = json.load(file).get("strategy_comparison", [])
+    # Only the small comparison block is decoded, not the trades of every strategy
+    results = read_strategy_comparison(export_dir / latest_result_file)
+
+    if trades_dir is not None:
+        try:
+            for strategy, trades in iter_strategy_trades(export_dir / latest_result_file, set(strategy_batch)):
+                save_trades_columnar(strategy, trades, trades_dir)
+        except ImportError as e:
+            print(f"Trades not kept ({e}). Install the packages in requirements.txt or pass --no_keep_trades.")
 
+    # Delete the .json file used for extracting results
+    os.remove(export_dir / latest_result_file)
+    print(f"Deleted {latest_result_file} after processing.")
+    return results
+
+
+def extract_and_save_results(strategy_batch, export_dir=None, cell=None):
+    """Extracts backtesting results for each strategy and saves them."""
+    cell = cell or default_cell
+    export_dir = Path(export_dir) if export_dir else Path(os.getcwd())
+    trades_dir = cell["results_dir"] / TRADES_DIR_NAME if keep_trades else None
+    results = read_export(strategy_batch, export_dir, trades_dir)
+    if results is not None:
+        save_strategy_results(strategy_batch, results, cell)
+
+
+def save_strategy_results(strategy_batch, results, cell=None):
+    """Saves each strategy's strategy_comparison record and updates the cache and tracker."""
+    cell = cell or default_cell
+    statuses = {}
     for strategy in strategy_batch:
         result = next((item for item in results if item.get("key") == strategy), None)
+        if (cell["id"], strategy) in cache_keys:
+            cache_store(CACHE_DIR, cache_keys[(cell["id"], strategy)], strategy, result)
         if result:
-            with open(Path(RESULTS_DIR) / f"{strategy}_result.json", 'w') as result_file:
+            with open(cell["results_dir"] / f"{strategy}_result.json", 'w') as result_file:
                 json.dump(result, result_file, indent=4)
-            success_tracker[strategy] = 1
+            statuses[strategy] = 1
+            # Drop the log of an earlier failure
+            (cell["results_dir"] / ERRORS_DIR_NAME / f"{strategy}.log").unlink(missing_ok=True)
             print(f"Results saved for strategy: {strategy}")
         else:
-            success_tracker[strategy] = "No results found"
+            statuses[strategy] = "No results found"
             print(f"No results found for strategy: {strategy}")
 
-    # Update and save the success tracker
-    save_success_tracker(success_tracker)
+    # Update the success tracker in one transaction
+    cell["tracker"].update(statuses)
 
-    # Delete the .json file used for extracting results
-    os.remove(os.path.join(os.getcwd(), latest_result_file))
-    print(f"Deleted {latest_result_file} after processing.")
 
+def log_error(strategy_batch, error_message, cell=None):
+    """Logs errors for strategies in the batch and keeps the stderr tail for each of them."""
+    cell = cell or default_cell
+    errors_dir = cell["results_dir"] / ERRORS_DIR_NAME
+    errors_dir.mkdir(parents=True, exist_ok=True)
+    error_tail = error_message[-ERROR_TAIL_CHARS:]
+    for strategy in strategy_batch:
+        with open(errors_dir / f"{strategy}.log", 'w') as error_file:
+            error_file.write(error_tail)
 
-def log_error(strategy_batch, error_message):
-    """Logs errors for strategies in the batch."""
     for strategy in strategy_batch:
-        print(f"Error for {strategy}: {error_message}")
-        success_tracker[strategy] = "error"  # f"Error(1000 ch): {error_message[-1000:]} "
-    save_success_tracker(success_tracker)
+        print(f"Error for {strategy}: {error_tail}")
+    cell["tracker"].update({strategy: "error" for strategy in strategy_batch})
 
 
 def find_pending_strategies(tracker, retry_errors=False):
     """Lists strategies that haven't been successfully processed or have errors, based on the retry_errors flag."""
-    pending_strategies = [name for name, status in tracker.items() if status == 0]
+    pending_strategies = tracker.with_status(0)
     if retry_errors:
-        error_strategies = [name for name, status in tracker.items() if status == "error"]
-        for strategy in error_strategies:
-            tracker[strategy] = 0  # Reset the status to 0 for retrying
+        error_strategies = tracker.with_status("error")
+        tracker.update({strategy: 0 for strategy in error_strategies})  # Reset the status to 0 for retrying
         pending_strategies.extend(error_strategies)
     return pending_strategies
 
 
-# Set up argparse to handle command line arguments
-parser = argparse.ArgumentParser(description="Backtest strategies.")
-parser.add_argument('--retry_errors', action='store_true',
-                    help="Retry strategies that previously encountered errors.")
-parser.add_argument('--batch_size', type=int, default=20,
-                    help="Number of strategies to process in each batch. Default is 20.")
+def resolve_cached_strategies(tracker, retry_errors=False, cell=None, strategies=None):
+    """Serves strategies from the result cache and returns the ones that still need a backtest.
+
+    Completion is decided by content, not by name: a strategy marked done whose source,
+    helper modules or run parameters changed since its result was cached is re-run.
+    When `strategies` is given, only those are considered.
+    """
+    cell = cell or default_cell
+    config = merged_config(cell["params"]["configs"])
+    run_params = {key: value for key, value in cell["params"].items() if key != "configs"}
+
+    # Strategy files added since the tracker was created are picked up as pending
+    tracker.add_missing(file[:-3] for file in os.listdir(STRATEGY_DIR) if file.endswith(".py"))
+
+    items = tracker.items()
+    if strategies is not None:
+        wanted = set(strategies)
+        items = [(strategy, status) for strategy, status in items if strategy in wanted]
+
+    pending_strategies = []
+    updates = {}
+    hits = 0
+    for strategy, status in tqdm(items, desc="Checking result cache"):
+        if status == "error" and not retry_errors:
+            continue
+        if not (Path(STRATEGY_DIR) / f"{strategy}.py").exists():
+            continue
+
+        key = cache_key(strategy, STRATEGY_DIR, run_params, config)
+        cache_keys[(cell["id"], strategy)] = key
+        result_file = cell["results_dir"] / f"{strategy}_result.json"
+
+        entry = cache_lookup(CACHE_DIR, key)
+        if entry is not None:
+            hits += 1
+            if entry["result"] is None:
+                updates[strategy] = "No results found"
+            else:
+                if status != 1 or not result_file.exists():
+                    with open(result_file, 'w') as file:
+                        json.dump(entry["result"], file, indent=4)
+                updates[strategy] = 1
+        elif status == 1 and result_file.exists() and \
+                result_file.stat().st_mtime >= dependencies_mtime(strategy, STRATEGY_DIR):
+            # Result predates the cache but is newer than the code: adopt it instead of re-running
+            with open(result_file, 'r') as file:
+                cache_store(CACHE_DIR, key, strategy, json.load(file))
+            hits += 1
+        else:
+            updates[strategy] = 0
+            pending_strategies.append(strategy)
+
+    tracker.update(updates)
+    print(f"Result cache ({cell['id']}): {hits} hits, {len(pending_strategies)} strategies to backtest.")
+    return pending_strategies
 
-args = parser.parse_args()
 
 # Modify the main block to use the parsed arguments
 if __name__ == "__main__":
+    # Set up argparse to handle command line arguments
+    parser = argparse.ArgumentParser(description="Backtest strategies.")
+    parser.add_argument('--retry_errors', action='store_true',
+                        help="Retry strategies that previously encountered errors.")
+    parser.add_argument('--batch_size', type=int, default=20,
+                        help="Number of strategies to process in each batch. Default is 20.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of batches to backtest in parallel. Default is 1.")
+    parser.add_argument('--no_bisect', action='store_true',
+                        help="Mark a whole failed batch as errored instead of bisecting it to isolate the failing strategies.")
+    parser.add_argument('--no_cache', action='store_true',
+                        help="Track completion by strategy name only, ignoring the content-addressed result cache.")
+    parser.add_argument('--cache_max_mb', type=float, default=2048,
+                        help="Evict least recently used cache entries beyond this size. Default is 2048 MB.")
+    parser.add_argument('--no_keep_trades', action='store_true',
+                        help="Don't keep each strategy's exported trades as Parquet under the results directory.")
+    parser.add_argument('--engine', choices=["script", "inprocess"], default="script",
+                        help="'script' runs run_backtest.sh per batch; 'inprocess' drives freqtrade from long-lived "
+                             "workers that load the candles once. Default is script.")
+    parser.add_argument('--matrix', type=str, default=None,
+                        help="JSON sweep matrix of timeranges, pair_sets, timeframes and fees. Each cell's results "
+                             "are stored under cells/<cell id>/ in the results directory.")
+    parser.add_argument('--halving_timeranges', type=str, default=None,
+                        help="Comma-separated screening timeranges, shortest first. Pending strategies are backtested "
+                             "on each in turn and only the best move on to the next stage and the full run.")
+    parser.add_argument('--halving_keep', type=str, default="0.25",
+                        help="Fraction promoted from each screening stage, one value or one per stage. Default is 0.25.")
+    parser.add_argument('--halving_min_keep', type=str, default="20",
+                        help="Minimum number promoted from each screening stage, one value or one per stage. Default is 20.")
+    parser.add_argument('--halving_metric', type=str, default="positive_ev",
+                        help="strategy_comparison field (or positive_ev) used to rank screening results. Default is positive_ev.")
+    parser.add_argument('--memory_budget_mb', type=float, default=None,
+                        help="Keep each batch's expected peak RSS (from runtime history) under this many MB.")
+    parser.add_argument('--no_ohlcv_cache', action='store_true',
+                        help="With --engine inprocess, have every worker decode the candles itself instead of "
+                             "memory-mapping a shared prepared copy.")
+    parser.add_argument('--no_prescreen', action='store_true',
+                        help="Schedule every pending strategy without statically checking its file first.")
+    parser.add_argument('--queue', nargs='?', const=WORK_QUEUE_DB, default=None,
+                        help="Hand batches to workers on other hosts through this shared queue database "
+                             f"(default {WORK_QUEUE_DB}) instead of running them here. Start workers with "
+                             "'python work_queue.py worker' from the shared checkout.")
+
+    args = parser.parse_args()
+    if args.matrix and args.halving_timeranges:
+        parser.error("--matrix and --halving_timeranges can't be combined.")
+    if args.queue and args.engine == "inprocess":
+        parser.error("--queue runs batches with run_backtest.sh on the workers and can't use --engine inprocess.")
+
     initialize_directories()
     success_tracker = initialize_success_tracker()
+    runtime_history = load_runtime_history(RUNTIME_HISTORY_FILE)
+    keep_trades = not args.no_keep_trades
+    ohlcv_cache_dir = None if args.no_ohlcv_cache else OHLCV_CACHE_DIR
+    queue_file = args.queue
 
     # Use args.retry_errors to check if retry_errors was specified
     retry_errors = args.retry_errors
@@ -134,12 +629,40 @@ if __name__ == "__main__":
     # Use args.batch_size for the batch size, defaulting to 20 if not provided
     batch_size = args.batch_size
 
-    pending_strategies = find_pending_strategies(success_tracker, retry_errors=retry_errors)
-    print(f"Pending strategies: {pending_strategies}")
-
-    backtest_strategies(pending_strategies, batch_size=batch_size)
-
-    # Save any updates made to the success tracker
-    save_success_tracker(success_tracker)
+    default_cell = make_cell("default", BACKTEST_PARAMS, RESULTS_DIR, success_tracker)
+    cells = initialize_matrix_cells(args.matrix) if args.matrix else [default_cell]
+
+    pending_by_cell = []
+    for cell in cells:
+        if args.no_cache:
+            if not args.no_prescreen:
+                # Files may have been fixed since they were rejected; they are screened again below
+                cell["tracker"].update({strategy: 0 for strategy, status in cell["tracker"].items()
+                                        if str(status).startswith(PRESCREEN_STATUS_PREFIX)})
+            pending_strategies = find_pending_strategies(cell["tracker"], retry_errors=retry_errors)
+        else:
+            pending_strategies = resolve_cached_strategies(cell["tracker"], retry_errors=retry_errors, cell=cell)
+        print(f"Pending strategies ({cell['id']}): {pending_strategies}")
+        pending_by_cell.append((cell, pending_strategies))
+
+    if not args.no_prescreen:
+        pending_by_cell = prescreen_pending(pending_by_cell)
+
+    run_kwargs = dict(batch_size=batch_size, workers=args.workers, memory_budget_mb=args.memory_budget_mb,
+                      bisect_failures=not args.no_bisect, engine=args.engine)
+    if args.halving_timeranges:
+        stages = build_stages(args.halving_timeranges, args.halving_keep, args.halving_min_keep)
+        promoted = backtest_successive_halving(pending_by_cell[0][1], stages, metric=args.halving_metric,
+                                               retry_errors=retry_errors, use_cache=not args.no_cache,
+                                               **run_kwargs)
+        print(f"Promoted to the full timerange: {promoted}")
+        pending_by_cell = [(default_cell, promoted)]
+
+    backtest_matrix(pending_by_cell, **run_kwargs)
+
+    if not args.no_cache:
+        evicted = cache_evict(CACHE_DIR, args.cache_max_mb * 1024 * 1024)
+        if evicted:
+            print(f"Evicted {evicted} old entries from the result cache.")
 
     print(f"Backtesting completed. Results stored in {RESULTS_DIR}")
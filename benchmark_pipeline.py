@@ -0,0 +1,439 @@
+"""
+Throughput benchmark of the backtest orchestration, with a stub in place of freqtrade.
+
+Usage:
+
+    python benchmark_pipeline.py --sizes 100,1000,10000 --output benchmark_results.json
+
+For each library size a synthetic set of strategy files is generated in a scratch directory,
+next to a stub run_backtest.sh that writes realistic BACKTESTING_RESULT exports after a
+configurable delay. The pipeline stages are then timed there:
+
+    prescreen strategy_prescreen.prescreen_strategies, cold and warm verdict cache
+    schedule  backtest_strategies.py end to end (batching, workers, stub runs, extraction, cache)
+    extract   extract_and_save_results on one export per batch
+    tracker   SuccessTracker population and status updates
+    summary   summarize_backtest.generate_and_filter_summary, cold and warm results index
+    cluster   analyze_backtest_summary.py (return series, correlation, portfolio simulation)
+
+Every stage runs in its own process, so its wall time and peak RSS are measured in isolation.
+The JSON report records the commit it was taken on, so runs can be compared across commits.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+from backtest_scheduler import run_with_rusage
+
+REPO_DIR = Path(__file__).resolve().parent
+STRATEGY_DIR = "user_data/strategies"
+RESULTS_DIR = "MY_HELPER_SCRIPTS/MY_BACKTESTING_RESULTS"
+PAIRS = ["BTC/USDT", "SOL/USDT", "ETH/USDT"]
+TIMERANGE_START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+TIMERANGE_SECONDS = 31 * 86400
+STAKE_AMOUNT = 100.0
+STARTING_BALANCE = 1000.0
+STAGES = ["prescreen", "schedule", "extract", "tracker", "summary", "cluster"]
+
+# Stub settings, passed to the stub run_backtest.sh through the environment
+STUB_DEFAULTS = {
+    "BENCH_TRADES": 50,              # Mean trades per strategy in each export
+    "BENCH_BATCH_LATENCY": 0.1,      # Seconds per freqtrade run, e.g. loading candles
+    "BENCH_STRATEGY_LATENCY": 0.01,  # Seconds per strategy in the batch
+    "BENCH_FAIL_RATE": 0.0,          # Fraction of strategies that make their whole batch fail
+}
+
+STRATEGY_TEMPLATE = '''from pandas import DataFrame
+import talib.abstract as ta
+
+from IStrategyWithEntryOrderBlocking import IStrategyWithEntryOrderBlocking
+
+
+class {name}(IStrategyWithEntryOrderBlocking):
+    timeframe = "5m"
+    startup_candle_count = {startup}
+    minimal_roi = {{"0": {roi}}}
+    stoploss = -{stoploss}
+
+    def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        dataframe["rsi"] = ta.RSI(dataframe, timeperiod={period})
+        dataframe["ema"] = ta.EMA(dataframe, timeperiod={period} * 2)
+        return dataframe
+
+    def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        dataframe.loc[(dataframe["rsi"] < {entry_rsi}) & (dataframe["close"] > dataframe["ema"]), "enter_long"] = 1
+        return dataframe
+
+    def populate_exit_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        dataframe.loc[dataframe["rsi"] > {exit_rsi}, "exit_long"] = 1
+        return dataframe
+'''
+
+
+def stub_setting(name):
+    return type(STUB_DEFAULTS[name])(os.environ.get(name, STUB_DEFAULTS[name]))
+
+
+def strategy_rng(name):
+    """Random generator seeded by the strategy name, so every run produces the same results."""
+    return np.random.default_rng(zlib.crc32(name.encode()))
+
+
+def strategy_names(n_strategies):
+    return [f"BenchStrategy{number:05d}" for number in range(n_strategies)]
+
+
+def is_broken(name, fail_rate):
+    return zlib.crc32(name.encode()) / 2 ** 32 < fail_rate
+
+
+def format_date(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d %H:%M:%S+00:00")
+
+
+def synthetic_trades(name, mean_trades):
+    """freqtrade-shaped closed trades for one strategy, with a per-strategy edge."""
+    rng = strategy_rng(name)
+    n_trades = max(1, int(rng.poisson(mean_trades)))
+    edge = rng.normal(0.004, 0.01)
+    open_ts = np.sort(rng.uniform(0, TIMERANGE_SECONDS - 86400, n_trades)) + TIMERANGE_START.timestamp()
+    open_ts = open_ts // 300 * 300
+    durations = np.clip(rng.exponential(6 * 3600, n_trades), 300, 7 * 86400) // 300 * 300
+    profit_ratios = rng.normal(edge, 0.03, n_trades)
+    pair_indexes = rng.integers(0, len(PAIRS), n_trades)
+    open_rates = rng.uniform(10, 30000, n_trades)
+
+    trades = []
+    for i in range(n_trades):
+        open_rate, ratio = float(open_rates[i]), float(profit_ratios[i])
+        close_rate = open_rate * (1 + ratio)
+        amount = STAKE_AMOUNT / open_rate
+        open_epoch, close_epoch = float(open_ts[i]), float(open_ts[i] + durations[i])
+        trades.append({
+            "pair": PAIRS[pair_indexes[i]], "stake_amount": STAKE_AMOUNT, "max_stake_amount": STAKE_AMOUNT,
+            "amount": amount, "open_date": format_date(open_epoch), "close_date": format_date(close_epoch),
+            "open_rate": open_rate, "close_rate": close_rate, "fee_open": 0.001, "fee_close": 0.001,
+            "trade_duration": int(durations[i] // 60), "profit_ratio": ratio, "profit_abs": ratio * STAKE_AMOUNT,
+            "exit_reason": "roi" if ratio > 0 else "exit_signal", "initial_stop_loss_abs": open_rate * 0.9,
+            "initial_stop_loss_ratio": -0.1, "stop_loss_abs": open_rate * 0.9, "stop_loss_ratio": -0.1,
+            "min_rate": min(open_rate, close_rate), "max_rate": max(open_rate, close_rate), "is_open": False,
+            "enter_tag": "", "leverage": 1.0, "is_short": False,
+            "open_timestamp": int(open_epoch * 1000), "close_timestamp": int(close_epoch * 1000),
+            "orders": [
+                {"amount": amount, "safe_price": open_rate, "ft_order_side": "buy",
+                 "order_filled_timestamp": int(open_epoch * 1000), "ft_is_entry": True},
+                {"amount": amount, "safe_price": close_rate, "ft_order_side": "sell",
+                 "order_filled_timestamp": int(close_epoch * 1000), "ft_is_entry": False},
+            ],
+        })
+    return trades
+
+
+def comparison_record(name, trades):
+    """The strategy_comparison entry freqtrade reports for these trades."""
+    ratios = np.array([trade["profit_ratio"] for trade in trades])
+    profits = ratios * STAKE_AMOUNT
+    order = np.argsort([trade["close_timestamp"] for trade in trades], kind="stable")
+    balance = np.concatenate(([0.0], np.cumsum(profits[order])))
+    drawdowns = np.maximum.accumulate(balance) - balance
+    worst = int(np.argmax(drawdowns))
+    wins, losses = int((profits > 0).sum()), int((profits < 0).sum())
+    return {
+        "key": name, "trades": len(trades),
+        "profit_mean": float(ratios.mean()), "profit_mean_pct": round(float(ratios.mean()) * 100, 2),
+        "profit_sum": float(ratios.sum()), "profit_sum_pct": round(float(ratios.sum()) * 100, 2),
+        "profit_total_abs": float(profits.sum()), "profit_total": float(profits.sum()) / STARTING_BALANCE,
+        "profit_total_pct": round(float(profits.sum()) / STARTING_BALANCE * 100, 2),
+        "duration_avg": str(timedelta(seconds=int(np.mean([trade["trade_duration"] for trade in trades]) * 60))),
+        "wins": wins, "draws": len(trades) - wins - losses, "losses": losses,
+        "winrate": wins / len(trades),
+        "max_drawdown_account": float(drawdowns[worst] / (STARTING_BALANCE + balance[:worst + 1].max())),
+        "max_drawdown_abs": float(drawdowns[worst]),
+    }
+
+
+def write_export(strategies, export_filename, mean_trades):
+    """Writes a --export trades file and its .meta.json the way freqtrade names them."""
+    export_filename = Path(export_filename)
+    export_filename.parent.mkdir(parents=True, exist_ok=True)
+    stats = {}
+    comparison = []
+    for name in strategies:
+        trades = synthetic_trades(name, mean_trades)
+        stats[name] = {"trades": trades, "total_trades": len(trades), "stake_currency": "USDT",
+                       "timeframe": "5m", "timerange": "20230101-20230201"}
+        comparison.append(comparison_record(name, trades))
+
+    stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+    result_file = export_filename.with_name(f"{export_filename.stem}-{stamp}.json")
+    with open(result_file, 'w') as file:
+        # strategy_comparison comes after the trades, as in freqtrade's exports
+        json.dump({"metadata": {name: {"run_id": stamp} for name in strategies},
+                   "strategy": stats, "strategy_comparison": comparison}, file)
+    with open(result_file.with_suffix('.meta.json'), 'w') as file:
+        json.dump({name: {"run_id": stamp} for name in strategies}, file)
+    return result_file
+
+
+def stub_main():
+    """Entry point of the stub run_backtest.sh: "<Strategy1> <Strategy2> ..." [export_filename]."""
+    strategies = sys.argv[1].split()
+    export_filename = sys.argv[2] if len(sys.argv) > 2 else "BACKTESTING_RESULT.json"
+    time.sleep(stub_setting("BENCH_BATCH_LATENCY") + stub_setting("BENCH_STRATEGY_LATENCY") * len(strategies))
+
+    broken = [name for name in strategies if is_broken(name, stub_setting("BENCH_FAIL_RATE"))]
+    if broken:
+        print(f"freqtrade.exceptions.OperationalException: Impossible to load strategy {broken[0]}", file=sys.stderr)
+        sys.exit(2)
+    write_export(strategies, export_filename, stub_setting("BENCH_TRADES"))
+
+
+def make_library(workdir, n_strategies):
+    """Creates strategy files, configs and the stub run_backtest.sh in workdir."""
+    workdir = Path(workdir)
+    strategy_dir = workdir / STRATEGY_DIR
+    strategy_dir.mkdir(parents=True, exist_ok=True)
+    for helper in ("IStrategyWithEntryOrderBlocking.py", "trade_gate_store.py"):
+        shutil.copy(REPO_DIR / helper, strategy_dir)
+    for name in strategy_names(n_strategies):
+        rng = strategy_rng(name)
+        source = STRATEGY_TEMPLATE.format(
+            name=name, startup=int(rng.integers(20, 400)), roi=round(float(rng.uniform(0.01, 0.1)), 3),
+            stoploss=round(float(rng.uniform(0.02, 0.2)), 3), period=int(rng.integers(5, 50)),
+            entry_rsi=int(rng.integers(15, 40)), exit_rsi=int(rng.integers(60, 85)))
+        (strategy_dir / f"{name}.py").write_text(source)
+
+    configs_dir = workdir / "user_data/configs"
+    configs_dir.mkdir(parents=True, exist_ok=True)
+    configs = {
+        "config_binance_backtest.json": {"exchange": {"name": "binance"}, "stake_currency": "USDT",
+                                         "stake_amount": STAKE_AMOUNT, "dry_run_wallet": STARTING_BALANCE},
+        "config_static_pairlist.json": {"exchange": {"pair_whitelist": PAIRS},
+                                        "pairlists": [{"method": "StaticPairList"}]},
+        "config_kraken_backtest.json": {"exchange": {"name": "kraken"}, "max_open_trades": 10,
+                                        "dry_run_wallet": STARTING_BALANCE},
+    }
+    for file_name, config in configs.items():
+        with open(configs_dir / file_name, 'w') as file:
+            json.dump(config, file, indent=4)
+
+    stub = workdir / "run_backtest.sh"
+    stub.write_text(f"#!{sys.executable}\n"
+                    f"import sys\n"
+                    f"sys.path.insert(0, {str(REPO_DIR)!r})\n"
+                    f"from benchmark_pipeline import stub_main\n"
+                    f"stub_main()\n")
+    stub.chmod(0o755)
+
+
+def stage_prescreen():
+    """Times the static pre-screen with an empty verdict cache, then with a full one."""
+    from strategy_prescreen import prescreen_strategies
+
+    strategies = sorted(path.stem for path in Path(STRATEGY_DIR).glob("BenchStrategy*.py"))
+    cache_file = Path("bench_prescreen_cache.json")
+    cache_file.unlink(missing_ok=True)
+
+    timings = {}
+    for run in ("cold", "warm"):
+        start = time.perf_counter()
+        prescreen_strategies(strategies, STRATEGY_DIR, cache_file)
+        timings[f"{run}_seconds"] = time.perf_counter() - start
+    timings["seconds"] = timings["cold_seconds"]
+    return timings
+
+
+def stage_extract(batch_size):
+    """Times extract_and_save_results on one fresh export per batch. Exports are written untimed."""
+    import backtest_strategies
+    from success_tracker_store import SuccessTracker
+
+    strategies = sorted(path.stem for path in Path(STRATEGY_DIR).glob("BenchStrategy*.py"))
+    results_dir = Path("bench_extract")
+    results_dir.mkdir(exist_ok=True)
+    cell = backtest_strategies.make_cell("bench", backtest_strategies.BACKTEST_PARAMS, results_dir,
+                                         SuccessTracker(results_dir / "success_tracker.sqlite"))
+    export_dir = results_dir / "export"
+    seconds = 0.0
+    for i in range(0, len(strategies), batch_size):
+        batch = strategies[i:i + batch_size]
+        write_export(batch, export_dir / "BACKTESTING_RESULT.json", stub_setting("BENCH_TRADES"))
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            backtest_strategies.extract_and_save_results(batch, export_dir, cell)
+        seconds += time.perf_counter() - start
+    return {"seconds": seconds}
+
+
+def stage_tracker():
+    """Times tracker population, one-at-a-time status updates, a bulk update and a pending query."""
+    from success_tracker_store import SuccessTracker
+
+    strategies = sorted(path.stem for path in Path(STRATEGY_DIR).glob("BenchStrategy*.py"))
+    db_file = Path("bench_tracker.sqlite")
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{db_file}{suffix}").unlink(missing_ok=True)
+
+    timings = {}
+    start = time.perf_counter()
+    tracker = SuccessTracker(db_file)
+    tracker.add_missing(strategies)
+    timings["populate_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for strategy in strategies:
+        tracker[strategy] = 1
+    timings["single_updates_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tracker.update({strategy: 0 for strategy in strategies})
+    pending = tracker.with_status(0)
+    timings["bulk_update_seconds"] = time.perf_counter() - start
+    assert len(pending) == len(strategies)
+
+    timings["seconds"] = sum(timings.values())
+    return timings
+
+
+def stage_summary():
+    """Times the filtered summary with a cold results index, then again with a warm one."""
+    from results_index import INDEX_FILE_NAME
+    from summarize_backtest import generate_and_filter_summary
+
+    for suffix in ("", "-wal", "-shm"):
+        (Path(RESULTS_DIR) / f"{INDEX_FILE_NAME}{suffix}").unlink(missing_ok=True)
+
+    timings = {}
+    for run in ("cold", "warm"):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_and_filter_summary(RESULTS_DIR)
+        timings[f"{run}_seconds"] = time.perf_counter() - start
+    timings["seconds"] = timings["cold_seconds"]
+    return timings
+
+
+def run_stage(stage, workdir, n_strategies, settings):
+    """Runs one stage in its own process and returns its measurements."""
+    env = dict(os.environ, **{name: str(value) for name, value in settings["stub"].items()})
+    if stage == "schedule":
+        # The stub strategies only need to import where freqtrade is installed, so they aren't pre-screened here
+        command = [sys.executable, str(REPO_DIR / "backtest_strategies.py"), "--workers", str(settings["workers"]),
+                   "--batch_size", str(settings["batch_size"]), "--no_prescreen"]
+    elif stage == "cluster":
+        command = [sys.executable, str(REPO_DIR / "analyze_backtest_summary.py")]
+    else:
+        command = [sys.executable, str(Path(__file__).resolve()), "--stage", stage,
+                   "--batch_size", str(settings["batch_size"])]
+
+    returncode, stdout, stderr, wall_seconds, peak_rss_mb = run_with_rusage(command, env=env, cwd=workdir)
+    measurement = {"wall_seconds": round(wall_seconds, 4), "peak_rss_mb": round(peak_rss_mb, 1)}
+    if returncode != 0:
+        measurement["error"] = stderr[-2000:]
+        return measurement
+
+    seconds = wall_seconds
+    if stage in ("prescreen", "extract", "tracker", "summary"):
+        # The stage prints its own timings, excluding interpreter start-up and untimed setup
+        timings = json.loads(stdout.strip().splitlines()[-1])
+        measurement.update({key: round(value, 4) for key, value in timings.items()})
+        seconds = timings["seconds"]
+    measurement["strategies_per_second"] = round(n_strategies / max(seconds, 1e-9), 2)
+    return measurement
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+        return revision, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def run_benchmark(sizes, stages, settings, workdir_root=None, keep=False):
+    revision, dirty = git_revision()
+    report = {
+        "commit": revision, "dirty": dirty, "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(), "host": platform.node(), "cpus": os.cpu_count(),
+        "settings": settings, "results": {},
+    }
+    for n_strategies in sizes:
+        workdir = Path(tempfile.mkdtemp(prefix=f"bench_{n_strategies}_", dir=workdir_root))
+        try:
+            start = time.perf_counter()
+            make_library(workdir, n_strategies)
+            print(f"{n_strategies} strategies: library generated in {time.perf_counter() - start:.1f}s ({workdir})")
+
+            results = {}
+            for stage in stages:
+                results[stage] = run_stage(stage, workdir, n_strategies, settings)
+                status = "FAILED" if "error" in results[stage] else \
+                    f"{results[stage]['strategies_per_second']} strategies/s"
+                print(f"  {stage}: {results[stage]['wall_seconds']:.2f}s wall, "
+                      f"{results[stage]['peak_rss_mb']:.0f} MB peak RSS, {status}")
+            report["results"][str(n_strategies)] = results
+        finally:
+            if not keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the backtest orchestration with a stub freqtrade.")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Comma-separated strategy library sizes.")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of {','.join(STAGES)}.")
+    parser.add_argument("--workers", type=int, default=4, help="backtest_strategies.py --workers.")
+    parser.add_argument("--batch_size", type=int, default=20, help="backtest_strategies.py --batch_size.")
+    parser.add_argument("--trades", type=int, default=STUB_DEFAULTS["BENCH_TRADES"],
+                        help="Mean exported trades per strategy.")
+    parser.add_argument("--batch_latency", type=float, default=STUB_DEFAULTS["BENCH_BATCH_LATENCY"],
+                        help="Seconds the stub takes per freqtrade run.")
+    parser.add_argument("--strategy_latency", type=float, default=STUB_DEFAULTS["BENCH_STRATEGY_LATENCY"],
+                        help="Seconds the stub takes per strategy in a batch.")
+    parser.add_argument("--fail_rate", type=float, default=STUB_DEFAULTS["BENCH_FAIL_RATE"],
+                        help="Fraction of strategies that fail their batch, to exercise bisection.")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON report.")
+    parser.add_argument("--workdir_root", default=None, help="Directory for the scratch libraries.")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch libraries for inspection.")
+    parser.add_argument("--stage", choices=["prescreen", "extract", "tracker", "summary"], default=None,
+                        help=argparse.SUPPRESS)  # Internal: runs one in-process stage in the current directory
+    args = parser.parse_args()
+
+    if args.stage:
+        stage_functions = {"prescreen": stage_prescreen, "extract": lambda: stage_extract(args.batch_size),
+                           "tracker": stage_tracker, "summary": stage_summary}
+        print(json.dumps(stage_functions[args.stage]()))
+        sys.exit(0)
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    settings = {
+        "workers": args.workers, "batch_size": args.batch_size,
+        "stub": {"BENCH_TRADES": args.trades, "BENCH_BATCH_LATENCY": args.batch_latency,
+                 "BENCH_STRATEGY_LATENCY": args.strategy_latency, "BENCH_FAIL_RATE": args.fail_rate},
+    }
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = run_benchmark(sizes, stages, settings, args.workdir_root, args.keep)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=4)
+    print(f"Benchmark report written to {args.output}")
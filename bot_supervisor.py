@@ -0,0 +1,253 @@
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+from pathlib import Path
+
+PING_PATH = "/api/v1/ping"  # freqtrade API endpoint answering {"status": "pong"} once the bot is up
+
+
+def port_is_free(port, host="127.0.0.1"):
+    """Returns True if nothing is listening on the port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((host, port))
+        except OSError:
+            return False
+    return True
+
+
+def pick_free_port(start_port, taken=(), host="127.0.0.1"):
+    """Returns the first free port at or above start_port that isn't in taken."""
+    port = start_port
+    while port in taken or not port_is_free(port, host):
+        port += 1
+    return port
+
+
+async def http_status(host, port, path, timeout):
+    """Sends a plain HTTP GET and returns the status code, or None if the server didn't answer in time."""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        parts = status_line.split()
+        return int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+    except (OSError, asyncio.TimeoutError):
+        return None
+    finally:
+        writer.close()
+
+
+class Bot:
+    """
+    One supervised freqtrade bot.
+
+    Attributes:
+        strategy (dict): The strategy's row from selected_top_strategies.csv.
+        name (str): Strategy name.
+        port (int): API port the bot listens on, assigned by the supervisor.
+        process: The asyncio subprocess, or None while stopped.
+        state (str): "pending", "starting", "running", "backoff" or "stopped".
+        restarts (int): Restarts so far, used for the backoff delay.
+        failures (int): Consecutive failed health checks.
+    """
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.name = strategy['strategy_name']
+        self.port = None
+        self.process = None
+        self.state = "pending"
+        self.restarts = 0
+        self.failures = 0
+        self.started_at = None
+        self.config_path = None
+
+    @property
+    def url(self):
+        return f"http://localhost:{self.port}"
+
+
+class BotSupervisor:
+    """
+    Starts freqtrade bots as subprocesses and keeps them running.
+
+    Bots are started concurrently, at most start_concurrency at a time, and each one is
+    polled on its API until it answers. After that every bot is health-checked in the
+    background. Only a bot whose process exited or that stopped answering is restarted, on a
+    fresh free port if its old one was taken, after an exponential backoff.
+
+    Attributes:
+        bots (dict): Strategy name -> Bot.
+        write_config (callable): (strategy, port) -> config path, writes the bot's generated config.
+        command (callable): (strategy, config path) -> freqtrade command line.
+        on_remove (callable): Optional (strategy) callback once a removed bot has stopped.
+        mappings_file (Path): strategy_url_mappings.json, rewritten whenever a port changes.
+    """
+
+    def __init__(self, strategies, write_config, command, initial_port=6900, mappings_file='strategy_url_mappings.json',
+                 log_dir='user_data/logs', start_concurrency=8, ready_timeout=180, health_interval=15,
+                 unhealthy_after=3, backoff_base=5, backoff_max=300, on_remove=None):
+        self.bots = {strategy['strategy_name']: Bot(strategy) for strategy in strategies}
+        self.write_config = write_config
+        self.command = command
+        self.initial_port = initial_port
+        self.mappings_file = Path(mappings_file)
+        self.log_dir = Path(log_dir)
+        self.start_concurrency = start_concurrency
+        self.start_slots = asyncio.Semaphore(start_concurrency)
+        self.ready_timeout = ready_timeout
+        self.health_interval = health_interval
+        self.unhealthy_after = unhealthy_after
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stopping = asyncio.Event()
+        self.tasks = {}
+        self.on_remove = on_remove
+
+    def assign_port(self, bot):
+        """Keeps the bot's port if it is still free, otherwise picks the next free one."""
+        taken = {other.port for other in self.bots.values() if other is not bot and other.port is not None}
+        if bot.port is None or bot.port in taken or not port_is_free(bot.port):
+            bot.port = pick_free_port(self.initial_port, taken)
+
+    def save_mappings(self):
+        """Writes strategy -> API URL for every bot that has a port, for open_all_frequi.py and friends."""
+        mappings = {bot.name: bot.url for bot in self.bots.values() if bot.port is not None}
+        tmp_file = self.mappings_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as file:
+            json.dump(mappings, file, indent=4)
+        os.replace(tmp_file, self.mappings_file)
+
+    async def ping(self, bot, timeout=5):
+        return await http_status("127.0.0.1", bot.port, PING_PATH, timeout) == 200
+
+    async def start(self, bot):
+        """Starts a bot and waits until its API answers. Returns True once it is up."""
+        async with self.start_slots:
+            if self.stopping.is_set():
+                return False
+            self.assign_port(bot)
+            self.save_mappings()
+            config_path = bot.config_path = self.write_config(bot.strategy, bot.port)
+
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.log_dir / f"{bot.name}.log", 'ab') as log_file:
+                process = bot.process = await asyncio.create_subprocess_exec(
+                    *self.command(bot.strategy, config_path), stdout=log_file, stderr=asyncio.subprocess.STDOUT,
+                    start_new_session=True)
+            bot.state = "starting"
+            bot.started_at = time.monotonic()
+            print(f"Launching {bot.name} on port {bot.port} (pid {process.pid})...")
+
+            deadline = time.monotonic() + self.ready_timeout
+            while time.monotonic() < deadline and not self.stopping.is_set():
+                if process.returncode is not None:
+                    print(f"{bot.name} exited with code {process.returncode} while starting.")
+                    return False
+                if await self.ping(bot):
+                    bot.state = "running"
+                    bot.failures = 0
+                    print(f"{bot.name} is up at {bot.url} after {time.monotonic() - bot.started_at:.0f}s.")
+                    return True
+                await asyncio.sleep(1)
+
+            if not self.stopping.is_set():
+                print(f"{bot.name} did not answer within {self.ready_timeout}s.")
+            return False
+
+    async def stop(self, bot, grace=20):
+        """Stops a bot's process: SIGTERM first, SIGKILL if it doesn't exit within grace seconds."""
+        process, bot.process = bot.process, None
+        if process is None or process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            await asyncio.wait_for(process.wait(), grace)
+        except asyncio.TimeoutError:
+            os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+        except ProcessLookupError:
+            pass
+
+    async def keep_running(self, bot):
+        """Starts a bot, then restarts it with backoff whenever it crashes or stops answering."""
+        while not self.stopping.is_set():
+            if await self.start(bot):
+                await self.watch(bot)
+            if self.stopping.is_set():
+                break
+
+            await self.stop(bot)
+            delay = min(self.backoff_base * 2 ** bot.restarts, self.backoff_max)
+            bot.restarts += 1
+            bot.state = "backoff"
+            print(f"Restarting {bot.name} in {delay}s (restart {bot.restarts}).")
+            try:
+                await asyncio.wait_for(self.stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        bot.state = "stopped"
+
+    async def watch(self, bot):
+        """Returns when a running bot has crashed or failed unhealthy_after health checks in a row."""
+        process = bot.process
+        while not self.stopping.is_set():
+            try:
+                await asyncio.wait_for(asyncio.shield(process.wait()), self.health_interval)
+                if not self.stopping.is_set():
+                    print(f"{bot.name} exited with code {process.returncode}.")
+                return
+            except asyncio.TimeoutError:
+                pass
+
+            if await self.ping(bot):
+                bot.failures = 0
+                if time.monotonic() - bot.started_at > self.backoff_max:
+                    bot.restarts = 0  # Stable again, so the next crash starts from the shortest backoff
+                continue
+            bot.failures += 1
+            if bot.failures >= self.unhealthy_after:
+                print(f"{bot.name} failed {bot.failures} health checks in a row.")
+                return
+
+    def add(self, strategy):
+        """Starts supervising another strategy while running. Returns its Bot."""
+        bot = self.bots.setdefault(strategy['strategy_name'], Bot(strategy))
+        if bot.name not in self.tasks:
+            self.tasks[bot.name] = asyncio.create_task(self.keep_running(bot))
+        return bot
+
+    async def remove(self, name):
+        """Stops a bot and stops supervising it."""
+        task = self.tasks.pop(name, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        bot = self.bots.pop(name, None)
+        if bot is not None:
+            await self.stop(bot)
+            self.save_mappings()
+            if self.on_remove is not None:
+                self.on_remove(bot.strategy)
+
+    async def run(self):
+        """Supervises every bot until SIGINT/SIGTERM, then stops them all."""
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, self.stopping.set)
+
+        for bot in list(self.bots.values()):
+            self.add(bot.strategy)
+        await self.stopping.wait()
+        print("Stopping all bots...")
+        await asyncio.gather(*(self.stop(bot) for bot in self.bots.values()))
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
@@ -0,0 +1,314 @@
+import argparse
+import asyncio
+import hmac
+import json
+import time
+from pathlib import Path
+
+from aiohttp import web, BasicAuth, ClientError, ClientSession, ClientTimeout, ClientWSTimeout, TCPConnector, WSMsgType
+
+# Seconds a bot's GET response is shared between dashboard clients, by endpoint prefix
+CACHE_TTLS = {
+    "/api/v1/show_config": 60,
+    "/api/v1/version": 300,
+    "/api/v1/strategy": 300,
+    "/api/v1/ping": 1,
+}
+DEFAULT_TTL = 2.0
+NO_CACHE_PREFIXES = ("/api/v1/token", "/api/v1/message/ws")
+WEBSOCKET_PREFIX = "/api/v1/message/ws"
+AUTH_CHECK_PATH = "/api/v1/version"  # Cheap endpoint that needs authentication, used to validate clients
+AUTH_TTL = 60.0  # Seconds a client's Authorization stays validated for a bot
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "[::1]")  # Host headers accepted, to shut out DNS rebinding
+FREQUI_STORAGE_KEY = "ftAuthLoginInfo"  # Where FreqUI keeps its list of bots in the browser's localStorage
+
+
+class FleetGateway:
+    """
+    One local entry point for every bot in strategy_url_mappings.json.
+
+    /bot/<name>/api/v1/... is proxied to that bot. GET responses are cached for a short TTL
+    and identical in-flight requests are coalesced, so any number of dashboards polling the
+    same endpoints cost each bot one request per TTL. Cached GETs are made with the gateway's
+    own API credentials and shared by all clients, but only served to a client whose own
+    Authorization the bot accepted: each (bot, Authorization) is checked against AUTH_CHECK_PATH
+    once per AUTH_TTL, so viewers add one cheap request per minute rather than a copy of every
+    poll. Everything else (logins, POSTs, DELETEs) passes straight through with the client's
+    credentials, and a write drops the bot's cached responses. FreqUI's message websocket is proxied frame by frame. The gateway listens on
+    127.0.0.1 only and rejects requests whose Host isn't local, so a web page can't reach it
+    through DNS rebinding.
+
+    /fleet/api/v1/... fans a GET out to every bot concurrently and returns {bot: response}.
+    /register logs FreqUI into every bot through the gateway in one step, replacing the
+    Selenium form filling of the old open_all_frequi.py. It hands out tokens only to callers
+    presenting the bots' api_server credentials (HTTP basic auth). Any other path serves
+    FreqUI's static files from the first bot.
+
+    Attributes:
+        mappings (dict): Bot name -> bot URL, re-read when the mappings file changes.
+        cache (dict): (bot, path with query) -> (expires, status, content type, body).
+        in_flight (dict): Cache key -> task fetching it.
+        authorized (dict): (bot, Authorization) -> when its validation expires.
+    """
+
+    def __init__(self, mappings_file='strategy_url_mappings.json', api_auth=None, timeout=30):
+        self.mappings_file = Path(mappings_file)
+        self.api_auth = BasicAuth(*api_auth) if api_auth else None
+        self.timeout = timeout
+        self.mappings = {}
+        self.mappings_mtime = None
+        self.cache = {}
+        self.in_flight = {}
+        self.authorized = {}
+        self.auth_checks = {}
+        self.stats = {'requests': 0, 'upstream': 0, 'coalesced': 0, 'cache_hits': 0}
+        self.session = None
+
+    def load_mappings(self):
+        mtime = self.mappings_file.stat().st_mtime if self.mappings_file.exists() else None
+        if mtime != self.mappings_mtime:
+            self.mappings_mtime = mtime
+            self.mappings = {}
+            if mtime is not None:
+                with open(self.mappings_file, 'r') as file:
+                    self.mappings = {name: url.rstrip('/') for name, url in json.load(file).items()}
+        return self.mappings
+
+    @staticmethod
+    def ttl(path):
+        for prefix, ttl in CACHE_TTLS.items():
+            if path.startswith(prefix):
+                return ttl
+        return DEFAULT_TTL
+
+    async def cached_get(self, bot, path_qs):
+        """Returns (status, content type, body) of a GET to a bot, shared across concurrent and recent callers."""
+        key = (bot, path_qs)
+        entry = self.cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.stats['cache_hits'] += 1
+            return entry[1:]
+        if key in self.in_flight:
+            self.stats['coalesced'] += 1
+            return (await asyncio.shield(self.in_flight[key]))[1:]
+
+        async def load():
+            self.stats['upstream'] += 1
+            async with self.session.get(self.mappings[bot] + path_qs, auth=self.api_auth) as response:
+                body = await response.read()
+                entry = (time.monotonic() + self.ttl(path_qs), response.status, response.content_type, body)
+            if entry[1] == 200:
+                self.cache[key] = entry
+            return entry
+
+        task = asyncio.ensure_future(load())
+        self.in_flight[key] = task
+        try:
+            return (await asyncio.shield(task))[1:]
+        finally:
+            self.in_flight.pop(key, None)
+
+    async def passthrough(self, request, base_url, path_qs):
+        """Forwards a request unchanged, including the client's own Authorization header."""
+        headers = {name: value for name, value in request.headers.items()
+                   if name.lower() not in ('host', 'content-length', 'accept-encoding')}
+        async with self.session.request(request.method, base_url + path_qs, headers=headers,
+                                        data=await request.read()) as response:
+            body = await response.read()
+            return web.Response(body=body, status=response.status, content_type=response.content_type)
+
+    async def proxy_websocket(self, request, base_url, path_qs):
+        """Relays a websocket (FreqUI's message stream, authenticated by its token parameter) to the bot."""
+        client = web.WebSocketResponse(heartbeat=30)
+        await client.prepare(request)
+        # The session's total timeout would cut the stream off, so only the handshake is bounded
+        async with self.session.ws_connect('ws' + base_url[len('http'):] + path_qs, heartbeat=30,
+                                           timeout=ClientWSTimeout(ws_close=10)) as upstream:
+            async def relay(source, target):
+                async for message in source:
+                    if message.type == WSMsgType.TEXT:
+                        await target.send_str(message.data)
+                    elif message.type == WSMsgType.BINARY:
+                        await target.send_bytes(message.data)
+                    else:
+                        break
+
+            relays = [asyncio.ensure_future(relay(client, upstream)), asyncio.ensure_future(relay(upstream, client))]
+            await asyncio.wait(relays, return_when=asyncio.FIRST_COMPLETED)
+            for task in relays:
+                task.cancel()
+        await client.close()
+        return client
+
+    @staticmethod
+    def client_authorization(request):
+        """The client's Authorization header; API requests without one are refused before reaching the cache."""
+        authorization = request.headers.get('Authorization')
+        if not authorization:
+            raise web.HTTPUnauthorized(text="Authorization required.")
+        return authorization
+
+    async def check_client(self, bot, authorization):
+        """Raises HTTPUnauthorized unless the bot accepts authorization, asking it at most once per AUTH_TTL."""
+        key = (bot, authorization)
+        now = time.monotonic()
+        if self.authorized.get(key, 0) > now:
+            return
+        if key not in self.auth_checks:
+            async def check():
+                async with self.session.get(self.mappings[bot] + AUTH_CHECK_PATH,
+                                            headers={'Authorization': authorization}) as response:
+                    return response.status
+
+            self.auth_checks[key] = asyncio.ensure_future(check())
+            self.auth_checks[key].add_done_callback(lambda _: self.auth_checks.pop(key, None))
+        status = await asyncio.shield(self.auth_checks[key])
+        if status != 200:
+            raise web.HTTPUnauthorized(text=f"{bot} did not accept the credentials.")
+        if len(self.authorized) > 10000:
+            self.authorized = {entry: expires for entry, expires in self.authorized.items() if expires > now}
+        self.authorized[key] = now + AUTH_TTL
+
+    async def handle_bot(self, request):
+        self.stats['requests'] += 1
+        bot = request.match_info['bot']
+        if bot not in self.load_mappings():
+            raise web.HTTPNotFound(text=f"Unknown bot {bot}")
+        path_qs = '/' + request.match_info['tail'] + (f"?{request.query_string}" if request.query_string else '')
+
+        try:
+            if path_qs.startswith(WEBSOCKET_PREFIX) and request.headers.get('Upgrade', '').lower() == 'websocket':
+                return await self.proxy_websocket(request, self.mappings[bot], path_qs)
+            if request.method != 'GET' or path_qs.startswith(NO_CACHE_PREFIXES):
+                if request.method != 'GET':
+                    self.cache = {key: entry for key, entry in self.cache.items() if key[0] != bot}
+                return await self.passthrough(request, self.mappings[bot], path_qs)
+            await self.check_client(bot, self.client_authorization(request))
+            status, content_type, body = await self.cached_get(bot, path_qs)
+        except (ClientError, asyncio.TimeoutError) as error:
+            raise web.HTTPBadGateway(text=f"{bot}: {error}")
+        return web.Response(body=body, status=status, content_type=content_type)
+
+    async def handle_fleet(self, request):
+        """GET /fleet/<path> -> {bot: JSON response or {"error": ...}} from every bot at once."""
+        self.stats['requests'] += 1
+        path_qs = '/' + request.match_info['tail'] + (f"?{request.query_string}" if request.query_string else '')
+        authorization = self.client_authorization(request)
+        bots = list(self.load_mappings())
+
+        async def one(bot):
+            try:
+                await self.check_client(bot, authorization)
+                status, _, body = await self.cached_get(bot, path_qs)
+                return json.loads(body) if status == 200 else {"error": f"HTTP {status}"}
+            except web.HTTPUnauthorized as error:
+                return {"error": error.text}
+            except (ClientError, asyncio.TimeoutError, ValueError) as error:
+                return {"error": str(error) or type(error).__name__}
+
+        results = await asyncio.gather(*(one(bot) for bot in bots))
+        return web.json_response(dict(zip(bots, results)))
+
+    async def handle_bots(self, request):
+        return web.json_response({bot: f"/bot/{bot}" for bot in self.load_mappings()})
+
+    async def handle_stats(self, request):
+        return web.json_response({**self.stats, 'cached': len(self.cache), 'bots': len(self.mappings)})
+
+    def check_api_credentials(self, request):
+        """Refuses callers that don't present the bots' api_server credentials as HTTP basic auth."""
+        try:
+            credentials = BasicAuth.decode(request.headers.get('Authorization', ''))
+        except ValueError:
+            credentials = None
+        expected = self.api_auth or BasicAuth('')
+        if credentials is None or not (hmac.compare_digest(credentials.login.encode(), expected.login.encode())
+                                       & hmac.compare_digest(credentials.password.encode(),
+                                                             expected.password.encode())):
+            raise web.HTTPUnauthorized(text="Log in with the bots' api_server username and password.",
+                                       headers={'WWW-Authenticate': 'Basic realm="fleet gateway"'})
+
+    async def handle_register(self, request):
+        """Logs into every bot concurrently and hands FreqUI the whole bot list in one page load."""
+        self.check_api_credentials(request)
+        bots = list(self.load_mappings())
+        origin = f"{request.scheme}://{request.host}"
+
+        async def login(bot):
+            async with self.session.post(self.mappings[bot] + "/api/v1/token/login", auth=self.api_auth) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+        tokens = await asyncio.gather(*(login(bot) for bot in bots), return_exceptions=True)
+        login_info = {}
+        for index, (bot, token) in enumerate(zip(bots, tokens)):
+            if isinstance(token, BaseException):
+                print(f"Gateway: login to {bot} failed: {token}")
+                continue
+            login_info[f"ftbot.{index}"] = {
+                "botName": bot,
+                "apiUrl": f"{origin}/bot/{bot}",
+                "username": self.api_auth.login if self.api_auth else "",
+                "accessToken": token.get("access_token"),
+                "refreshToken": token.get("refresh_token"),
+                "autoRefresh": True,
+                "sortId": index,
+            }
+
+        page = (f"<script>localStorage.setItem({json.dumps(FREQUI_STORAGE_KEY)}, {json.dumps(json.dumps(login_info))});"
+                f"window.location.replace('/');</script>Registered {len(login_info)} of {len(bots)} bots.")
+        return web.Response(text=page, content_type="text/html")
+
+    async def handle_ui(self, request):
+        """Serves FreqUI's static files from the first bot, so the UI and /bot/ share one origin."""
+        if not self.load_mappings():
+            raise web.HTTPServiceUnavailable(text="No bots in the mappings file yet.")
+        if request.path.startswith('/api/'):
+            raise web.HTTPNotFound(text="API requests go through /bot/<name>/api/...")
+        first_bot = next(iter(self.mappings))
+        try:
+            status, content_type, body = await self.cached_get(first_bot, request.path_qs)
+        except (ClientError, asyncio.TimeoutError) as error:
+            raise web.HTTPBadGateway(text=str(error))
+        return web.Response(body=body, status=status, content_type=content_type)
+
+    @web.middleware
+    async def local_host_only(self, request, handler):
+        host = request.host.rsplit(':', 1)[0] if not request.host.endswith(']') else request.host
+        if host not in LOCAL_HOSTS:
+            raise web.HTTPForbidden(text=f"Host {request.host} not allowed.")
+        return await handler(request)
+
+    def app(self):
+        app = web.Application(middlewares=[self.local_host_only])
+        app.router.add_route('*', '/bot/{bot}/{tail:.*}', self.handle_bot)
+        app.router.add_get('/fleet/{tail:.*}', self.handle_fleet)
+        app.router.add_get('/bots', self.handle_bots)
+        app.router.add_get('/gateway/stats', self.handle_stats)
+        app.router.add_get('/register', self.handle_register)
+        app.router.add_get('/{tail:.*}', self.handle_ui)
+        app.on_startup.append(self.on_startup)
+        app.on_cleanup.append(self.on_cleanup)
+        return app
+
+    async def on_startup(self, app):
+        connector = TCPConnector(limit=200, limit_per_host=8, keepalive_timeout=60)
+        self.session = ClientSession(connector=connector, timeout=ClientTimeout(total=self.timeout))
+
+    async def on_cleanup(self, app):
+        await self.session.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Single API gateway and FreqUI entry point for all live bots.")
+    parser.add_argument('--mappings', default='strategy_url_mappings.json')
+    parser.add_argument('--config', default='user_data/configs/config_kraken_backtest.json',
+                        help="Config whose api_server credentials the bots use.")
+    parser.add_argument('--port', type=int, default=6899)
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as file:
+        api_server = json.load(file).get('api_server', {})
+    gateway = FleetGateway(args.mappings, (api_server.get('username', ''), api_server.get('password', '')))
+    print(f"Fleet gateway on http://127.0.0.1:{args.port} (FreqUI: /register, bulk: /fleet/api/v1/...)")
+    web.run_app(gateway.app(), host='127.0.0.1', port=args.port)
@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from aiohttp import web, BasicAuth, ClientError, ClientSession, ClientTimeout, TCPConnector
+
+METRICS_DB = "user_data/fleet_metrics.sqlite"
+
+# Downsampling tiers: (bucket seconds, retention seconds). Every sample is folded into each tier's
+# bucket as it arrives, so no separate rollup pass is needed; old buckets are pruned per tier.
+TIERS = [
+    (1, 6 * 3600),          # Raw samples for 6 hours
+    (60, 7 * 86400),        # 1-minute buckets for a week
+    (900, 90 * 86400),      # 15-minute buckets for 90 days
+]
+
+# freqtrade REST endpoints polled per bot
+ENDPOINTS = {
+    "profit": "/api/v1/profit",
+    "status": "/api/v1/status",
+    "health": "/api/v1/health",
+    "logs": "/api/v1/logs?limit=100",
+}
+
+
+class MetricsStore:
+    """
+    Compact SQLite time series of fleet metrics, downsampled on write.
+
+    One WITHOUT ROWID table holds every tier: (tier, bot, metric, bucket) -> count, sum, min,
+    max and last value, so averages and extremes survive downsampling.
+
+    Attributes:
+        db_file (Path): The SQLite file.
+    """
+
+    def __init__(self, db_file=METRICS_DB):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.db_file, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS series (tier INTEGER, bot TEXT, metric TEXT, bucket INTEGER, "
+            "count INTEGER, sum REAL, min REAL, max REAL, last REAL, "
+            "PRIMARY KEY (tier, bot, metric, bucket)) WITHOUT ROWID")
+        self.connection.commit()
+        self.last_prune = 0.0
+
+    def add(self, timestamp, samples):
+        """Stores samples [(bot, metric, value)] taken at timestamp in every tier."""
+        rows = [(tier, bot, metric, int(timestamp // resolution * resolution), value, value, value, value)
+                for tier, (resolution, _) in enumerate(TIERS)
+                for bot, metric, value in samples if value is not None]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO series VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?) "
+                "ON CONFLICT (tier, bot, metric, bucket) DO UPDATE SET count = count + 1, "
+                "sum = sum + excluded.sum, min = MIN(min, excluded.min), max = MAX(max, excluded.max), "
+                "last = excluded.last", rows)
+        if timestamp - self.last_prune > 600:
+            self.prune(timestamp)
+
+    def prune(self, now):
+        """Drops buckets older than their tier's retention."""
+        with self.connection:
+            for tier, (_, retention) in enumerate(TIERS):
+                self.connection.execute("DELETE FROM series WHERE tier = ? AND bucket < ?", (tier, now - retention))
+        self.last_prune = now
+
+    def query(self, bot, metric, since, until=None):
+        """Returns [(bucket, avg, min, max)] from the finest tier that still covers since."""
+        until = until or time.time()
+        age = until - since
+        tier = next((index for index, (_, retention) in enumerate(TIERS) if retention >= age), len(TIERS) - 1)
+        return self.connection.execute(
+            "SELECT bucket, sum / count, min, max FROM series WHERE tier = ? AND bot = ? AND metric = ? "
+            "AND bucket BETWEEN ? AND ? ORDER BY bucket", (tier, bot, metric, since, until)).fetchall()
+
+
+class FleetMetricsCollector:
+    """
+    Polls every bot in strategy_url_mappings.json concurrently and records its metrics.
+
+    All requests go through one pooled, keep-alive aiohttp session. Each bot is asked for its
+    profit, open trades, last loop time and recent log errors; bots that don't answer are
+    recorded as down. The mappings file is re-read when it changes, so bots started or
+    stopped by the supervisor are picked up.
+
+    Attributes:
+        latest (dict): Bot name -> {metric: value} from the most recent poll, for /metrics.
+    """
+
+    def __init__(self, store, mappings_file='strategy_url_mappings.json', api_auth=None, interval=15, timeout=10):
+        self.store = store
+        self.mappings_file = Path(mappings_file)
+        self.api_auth = BasicAuth(*api_auth) if api_auth else None
+        self.interval = interval
+        self.timeout = timeout
+        self.mappings = {}
+        self.mappings_mtime = None
+        self.latest = {}
+        self.last_error_time = {}  # Bot -> timestamp of the newest ERROR log line already counted
+        self.poll_seconds = 0.0
+
+    def load_mappings(self):
+        mtime = self.mappings_file.stat().st_mtime if self.mappings_file.exists() else None
+        if mtime != self.mappings_mtime:
+            self.mappings_mtime = mtime
+            if mtime is not None:
+                with open(self.mappings_file, 'r') as file:
+                    self.mappings = json.load(file)
+            else:
+                self.mappings = {}
+            self.latest = {bot: values for bot, values in self.latest.items() if bot in self.mappings}
+
+    async def get_json(self, session, url):
+        async with session.get(url, auth=self.api_auth) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def poll_bot(self, session, bot, url):
+        """Returns {metric: value} for one bot."""
+        start = time.monotonic()
+        results = await asyncio.gather(*(self.get_json(session, url + path) for path in ENDPOINTS.values()),
+                                       return_exceptions=True)
+        metrics = {"up": 0.0, "response_ms": (time.monotonic() - start) * 1000}
+        profit, status, health, logs = (None if isinstance(result, BaseException) else result for result in results)
+        metrics["api_errors"] = float(sum(isinstance(result, BaseException) for result in results))
+        if profit is None and status is None and health is None:
+            return metrics
+
+        metrics["up"] = 1.0
+        if profit:
+            metrics["profit_all_coin"] = profit.get("profit_all_coin")
+            metrics["profit_closed_coin"] = profit.get("profit_closed_coin")
+            metrics["trade_count"] = profit.get("trade_count")
+        if status is not None:
+            metrics["open_trades"] = float(len(status))
+        if health and health.get("last_process_ts"):
+            metrics["loop_age_secs"] = time.time() - health["last_process_ts"]
+        if logs:
+            # Log rows are [timestamp text, epoch seconds, logger, level, message]
+            newest = self.last_error_time.get(bot, 0)
+            errors = [row for row in logs.get("logs", []) if row[3] in ("ERROR", "CRITICAL") and row[1] > newest]
+            metrics["log_errors"] = float(len(errors))
+            if errors:
+                self.last_error_time[bot] = max(row[1] for row in errors)
+        return metrics
+
+    async def poll(self, session):
+        """Polls the whole fleet once and stores the samples."""
+        self.load_mappings()
+        start = time.monotonic()
+        bots = list(self.mappings.items())
+        results = await asyncio.gather(*(self.poll_bot(session, bot, url.rstrip('/')) for bot, url in bots))
+        self.poll_seconds = time.monotonic() - start
+
+        now = time.time()
+        samples = []
+        for (bot, _), metrics in zip(bots, results):
+            self.latest[bot] = metrics
+            samples.extend((bot, metric, value) for metric, value in metrics.items())
+        self.store.add(now, samples)
+
+    async def run(self, stopping=None):
+        """Polls every interval seconds until stopping is set."""
+        stopping = stopping or asyncio.Event()
+        connector = TCPConnector(limit=100, limit_per_host=4, keepalive_timeout=60)
+        async with ClientSession(connector=connector, timeout=ClientTimeout(total=self.timeout)) as session:
+            while not stopping.is_set():
+                try:
+                    await self.poll(session)
+                except (ClientError, OSError, sqlite3.Error) as error:
+                    print(f"Fleet metrics poll failed: {error}")
+                try:
+                    await asyncio.wait_for(stopping.wait(), max(0.0, self.interval - self.poll_seconds))
+                except asyncio.TimeoutError:
+                    pass
+
+    def prometheus_text(self):
+        """The latest metrics in Prometheus text exposition format."""
+        lines = ["# HELP fleet_poll_seconds Time taken by the last poll of all bots.",
+                 "# TYPE fleet_poll_seconds gauge",
+                 f"fleet_poll_seconds {self.poll_seconds:.6f}"]
+        metric_names = sorted({metric for metrics in self.latest.values() for metric in metrics})
+        for metric in metric_names:
+            lines.append(f"# TYPE freqtrade_{metric} gauge")
+            for bot, metrics in sorted(self.latest.items()):
+                value = metrics.get(metric)
+                if value is not None:
+                    lines.append(f'freqtrade_{metric}{{bot="{bot}"}} {float(value)}')
+        return "\n".join(lines) + "\n"
+
+    async def handle_metrics(self, request):
+        return web.Response(text=self.prometheus_text(), content_type="text/plain")
+
+    async def handle_series(self, request):
+        """GET /series?bot=...&metric=...&since=<epoch seconds> -> [[bucket, avg, min, max], ...]"""
+        missing = [name for name in ("bot", "metric") if not request.query.get(name)]
+        if missing:
+            raise web.HTTPBadRequest(text=f"Missing query parameter: {', '.join(missing)}")
+        try:
+            since = float(request.query.get("since", time.time() - 3600))
+        except ValueError:
+            raise web.HTTPBadRequest(text=f"since must be epoch seconds, got {request.query['since']!r}")
+        rows = self.store.query(request.query["bot"], request.query["metric"], since)
+        return web.json_response(rows)
+
+    async def serve(self, host='127.0.0.1', port=9108):
+        """Serves /metrics and /series in the running event loop. Returns the runner."""
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle_metrics)
+        app.router.add_get('/series', self.handle_series)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        print(f"Fleet metrics on http://{host}:{port}/metrics")
+        return runner
+
+
+async def main(args):
+    api_auth = None
+    if args.config:
+        with open(args.config, 'r') as file:
+            api_server = json.load(file).get('api_server', {})
+        api_auth = (api_server.get('username', ''), api_server.get('password', ''))
+
+    collector = FleetMetricsCollector(MetricsStore(args.db), args.mappings, api_auth, args.interval)
+    runner = await collector.serve(port=args.port)
+    try:
+        await collector.run()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Collect metrics from every live bot.")
+    parser.add_argument('--mappings', default='strategy_url_mappings.json')
+    parser.add_argument('--config', default='user_data/configs/config_kraken_backtest.json',
+                        help="Config whose api_server credentials the bots use.")
+    parser.add_argument('--db', default=METRICS_DB)
+    parser.add_argument('--interval', type=float, default=15)
+    parser.add_argument('--port', type=int, default=9108)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
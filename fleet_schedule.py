@@ -0,0 +1,154 @@
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+# Loop interval each timeframe got before scheduling; candidates are spread around it
+DEFAULT_THROTTLE_SECS = {'1m': 5, '5m': 45}
+THROTTLE_SPREAD = (0.75, 0.875, 1.0, 1.125, 1.25)
+FREQTRADE_CANDLE_DELAY = 1  # freqtrade wakes one second after a candle closes
+UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def timeframe_seconds(timeframe):
+    """'5m' -> 300."""
+    return int(timeframe[:-1]) * UNITS[timeframe[-1]]
+
+
+def default_throttle(timeframe):
+    """The loop interval used before scheduling: per-timeframe defaults, else a tenth of the candle."""
+    return DEFAULT_THROTTLE_SECS.get(timeframe, max(5, timeframe_seconds(timeframe) // 10))
+
+
+class FleetScheduler:
+    """
+    Spreads the loop wake-ups of all live bots over each candle.
+
+    Each bot's load is modelled over one hyperperiod (the least common multiple of the fleet's
+    timeframes) in one-second bins. freqtrade wakes every bot FREQTRADE_CANDLE_DELAY seconds
+    after each candle opens and fetches the new candles (candle_requests) before anything else
+    runs, so that burst can't be moved by a bot. With shared_candles the bots fetch through the
+    MarketDataProxy, which makes one upstream fetch per timeframe however many bots ask, and
+    the burst is modelled once per timeframe. After it, each bot makes loop_requests per
+    throttle loop for the rest of the candle.
+
+    Bots are placed one at a time. Each gets the process_throttle_secs that keeps the fleet's
+    busiest second lowest. Ties go to the throttle with the least load over the request budget,
+    then the one whose loops land on the fewest busy seconds (least sum of squared load), then
+    the one closest to the timeframe's default.
+
+    Attributes:
+        request_budget (float): Requests per second the fleet should stay under.
+        hyperperiod (int): Length of the modelled schedule in seconds.
+        load (ndarray): Modelled fleet requests per second over the hyperperiod.
+        slots (dict): Bot name -> its slot (see assign()).
+    """
+
+    def __init__(self, timeframes, request_budget, candle_requests=1, loop_requests=1, shared_candles=False):
+        self.hyperperiod = math.lcm(*(timeframe_seconds(timeframe) for timeframe in set(timeframes)))
+        self.request_budget = request_budget
+        self.candle_requests = candle_requests
+        self.loop_requests = loop_requests
+        self.shared_candles = shared_candles
+        self.load = np.zeros(self.hyperperiod)
+        self.slots = {}
+        self.patterns = {}
+        self.timeframes = {}  # Bot name -> timeframe
+        self.timeframe_bots = {}  # Timeframe -> bots using it, for the shared candle bursts
+        self.shared_patterns = {}  # Timeframe -> its shared candle burst
+
+    def candle_pattern(self, timeframe, candle_requests):
+        """Requests per second of the candle fetches at the start of every candle."""
+        candle = timeframe_seconds(timeframe)
+        one_candle = np.zeros(candle)
+        one_candle[FREQTRADE_CANDLE_DELAY % candle] = candle_requests
+        return np.tile(one_candle, self.hyperperiod // candle)
+
+    def loop_pattern(self, timeframe, throttle):
+        """Requests per second of one bot's loops after the candle fetch."""
+        candle = timeframe_seconds(timeframe)
+        one_candle = np.zeros(candle)
+        # Loops every throttle seconds, until freqtrade waits for the next candle instead
+        loops = np.arange(FREQTRADE_CANDLE_DELAY + throttle, candle + FREQTRADE_CANDLE_DELAY, throttle)
+        np.add.at(one_candle, loops % candle, self.loop_requests)
+        return np.tile(one_candle, self.hyperperiod // candle)
+
+    def assign(self, name, timeframe, candle_requests=None):
+        """Chooses and records a bot's slot: {"slot", "process_throttle_secs"}."""
+        self.release(name)
+        candle_requests = self.candle_requests if candle_requests is None else candle_requests
+        if self.shared_candles:
+            if not self.timeframe_bots.get(timeframe):
+                self.shared_patterns[timeframe] = self.candle_pattern(timeframe, candle_requests)
+                self.load += self.shared_patterns[timeframe]
+            self.timeframe_bots[timeframe] = self.timeframe_bots.get(timeframe, 0) + 1
+            candles = np.zeros(self.hyperperiod)
+        else:
+            candles = self.candle_pattern(timeframe, candle_requests)
+
+        base_throttle = default_throttle(timeframe)
+        best = None
+        for throttle in sorted({max(1, round(base_throttle * factor)) for factor in THROTTLE_SPREAD}):
+            pattern = candles + self.loop_pattern(timeframe, throttle)
+            combined = self.load + pattern
+            over_budget = np.clip(combined - self.request_budget, 0, None).sum()
+            collisions = float((combined ** 2).sum())
+            candidate = (combined.max(), over_budget, collisions, abs(throttle - base_throttle), throttle)
+            if best is None or candidate < best[:5]:
+                best = (*candidate, pattern)
+
+        throttle, pattern = best[4], best[5]
+        self.load += pattern
+        self.patterns[name] = pattern
+        self.timeframes[name] = timeframe
+        self.slots[name] = {"slot": self.next_slot_number(), "process_throttle_secs": throttle}
+        return self.slots[name]
+
+    def next_slot_number(self):
+        used = {slot["slot"] for slot in self.slots.values()}
+        return next(number for number in range(len(used) + 1) if number not in used)
+
+    def release(self, name):
+        """Frees a stopped bot's slot."""
+        if name in self.patterns:
+            self.load -= self.patterns.pop(name)
+            del self.slots[name]
+            timeframe = self.timeframes.pop(name)
+            if self.shared_candles:
+                self.timeframe_bots[timeframe] -= 1
+                if not self.timeframe_bots[timeframe]:
+                    self.load -= self.shared_patterns.pop(timeframe)
+
+    def report(self):
+        """Worst-case and typical per-second load of the current schedule."""
+        worst_second = int(np.argmax(self.load)) if len(self.load) else 0
+        peak = float(self.load[worst_second]) if len(self.load) else 0.0
+        return {
+            "bots": len(self.slots),
+            "request_budget": self.request_budget,
+            "worst_case_per_second": peak,
+            "worst_second_of_hyperperiod": worst_second,
+            "p95_per_second": float(np.percentile(self.load, 95)) if len(self.load) else 0.0,
+            "mean_per_second": float(self.load.mean()) if len(self.load) else 0.0,
+            "seconds_over_budget": int((self.load > self.request_budget).sum()),
+            "hyperperiod_secs": self.hyperperiod,
+            "slots": self.slots,
+        }
+
+    def save_report(self, report_file):
+        """Writes report() as JSON, atomically."""
+        report_file = Path(report_file)
+        tmp_file = report_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as file:
+            json.dump(self.report(), file, indent=4)
+        os.replace(tmp_file, report_file)
+
+
+def print_schedule_report(report):
+    status = "over" if report["worst_case_per_second"] > report["request_budget"] else "within"
+    print(f"Fleet schedule: {report['bots']} bots, worst case {report['worst_case_per_second']:.0f} requests/s "
+          f"at second {report['worst_second_of_hyperperiod']} of {report['hyperperiod_secs']} "
+          f"({status} the budget of {report['request_budget']}/s, {report['seconds_over_budget']}s over), "
+          f"p95 {report['p95_per_second']:.1f}/s.")
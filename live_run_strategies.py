@@ -1,13 +1,18 @@
 import pandas as pd
-from tqdm import tqdm
-import webbrowser
-from multiprocessing import Pool, Manager
-import time
+import asyncio
 import sys
-import random
 import subprocess
 import os
 import json
+from copy import deepcopy
+
+from bot_supervisor import BotSupervisor
+from backtest_cache import deep_merge
+from market_data_proxy import MarketDataProxy, EXCHANGE_PUBLIC_APIS, proxy_config_overrides
+from admission_control import AdmissionController
+from fleet_schedule import FleetScheduler, print_schedule_report
+
+FLEET_REQUEST_BUDGET = 10  # Requests per second the whole fleet should stay under at its busiest second
 
 
 def kill_freqtrade_sessions(strategy_objects):
@@ -18,80 +23,113 @@ def kill_freqtrade_sessions(strategy_objects):
     print("All specified Freqtrade sessions terminated.")
 
 
-def run_strategy(strategy_object, base_config, configs_dir, database_dir, port):
+def write_strategy_config(strategy_object, base_config, configs_dir, port, proxy_url=None, schedule_slot=None):
+    """Writes the generated config of one bot and returns its path.
+
+    With a proxy_url the bot fetches public market data through the shared MarketDataProxy.
+    A schedule_slot from FleetScheduler sets the bot's loop interval.
+    """
     strategy_name = strategy_object['strategy_name']
-    positive_ev = strategy_object['positive_ev']
     timeframe = strategy_object['timeframe']
 
-    random_port = int(port)
-    print(
-        f"Launching {strategy_name} strategy on port {random_port} with total profit% {positive_ev}...")
-
-    strategy_config = dict(base_config)
+    strategy_config = deepcopy(base_config)
     strategy_config['timeframe'] = timeframe
-    strategy_config['api_server']['listen_port'] = random_port
+    strategy_config['api_server']['listen_port'] = int(port)
 
+    if schedule_slot:
+        strategy_config['internals']['process_throttle_secs'] = schedule_slot['process_throttle_secs']
+        strategy_config['fleet_schedule'] = schedule_slot
 
-    if timeframe == '1m':
+    elif timeframe == '1m':
         strategy_config['internals']['process_throttle_secs'] = 5
 
     elif timeframe == '5m':
         strategy_config['internals']['process_throttle_secs'] = 45
 
+    if proxy_url:
+        strategy_config['exchange'] = deep_merge(strategy_config['exchange'], proxy_config_overrides(proxy_url))
+
     strategy_config_path = os.path.join(configs_dir, f'config_{strategy_name}.json')
     with open(strategy_config_path, 'w') as file:
         json.dump(strategy_config, file, indent=4)
+    return strategy_config_path
+
 
-    cmd = [
+def freqtrade_command(strategy_object, strategy_config_path, database_dir):
+    strategy_name = strategy_object['strategy_name']
+    return [
         'freqtrade', 'trade', '-c', strategy_config_path,
         '-s', strategy_name,
         '--db-url', f'sqlite:///{database_dir}{strategy_name}.live.sqlite'
     ]
-    subprocess.run(cmd)
 
 
-def select_top_strategies(strategy_objects, max_processes):
+def select_top_strategies(strategy_objects, max_processes=None):
     # Sort the strategy objects by total profit percentage in descending order
     sorted_strategies = sorted(
         strategy_objects, key=lambda x: x['positive_ev'], reverse=True)
     # Select the top strategies up to the max number of parallel processes
     return sorted_strategies[:max_processes]
 
-    import subprocess
-
-import requests
-def make_ping_request(url, retry=3):
-    for attempt in range(retry):
-        try:
-            response = requests.get(url)
-            print(f"Response: {response}")
-            print(f"status code: {response.status_code} raw: {response.raw}")
-            if response.status_code == 200:
-                print(f"Successful ping to {url}. Response: {response.text}")
-                return True
-            else:
-                print(f"Server responded with status code: {response.status_code}")
-        except requests.RequestException as e:
-            print(f"Attempt {attempt + 1}: Failed to ping {url}. Error: {e}")
-        time.sleep(5)  # Wait before retrying
-    return False
+
+async def supervise_strategies(ranked_strategies, base_config, configs_dir, db_dir, use_proxy=True, proxy_port=6890,
+                               max_bots=None):
+    """Runs the ranked strategies under a BotSupervisor until interrupted.
+
+    An AdmissionController starts them best first, for as long as the host keeps up, and
+    stops the lowest-ranked ones under pressure. Unless disabled, a MarketDataProxy runs in the
+    same event loop so the bots share one stream of candle requests to the exchange.
+    """
+    proxy_runner = proxy_url = None
+    exchange_name = base_config['exchange']['name']
+    if use_proxy and exchange_name in EXCHANGE_PUBLIC_APIS:
+        proxy_runner = await MarketDataProxy(EXCHANGE_PUBLIC_APIS[exchange_name]).start(port=proxy_port)
+        proxy_url = f"http://127.0.0.1:{proxy_port}"
+    elif use_proxy:
+        print(f"No market data proxy route for {exchange_name}; bots will query the exchange directly.")
+
+    # freqtrade fetches candles when each candle opens, for every bot at once; only the proxy can
+    # collapse that burst. Each bot's loop interval is chosen to spread the loops in between.
+    scheduler = FleetScheduler([strategy['timeframe'] for strategy in ranked_strategies], FLEET_REQUEST_BUDGET,
+                               candle_requests=len(base_config['exchange'].get('pair_whitelist', [])) or 1,
+                               shared_candles=proxy_url is not None)
+    schedule_file = os.path.join(configs_dir, 'fleet_schedule.json')
+
+    def write_config(strategy, port):
+        slot = scheduler.assign(strategy['strategy_name'], strategy['timeframe'])
+        scheduler.save_report(schedule_file)
+        print_schedule_report(scheduler.report())
+        return write_strategy_config(strategy, base_config, configs_dir, port, proxy_url, slot)
+
+    def release_slot(strategy):
+        scheduler.release(strategy['strategy_name'])
+        scheduler.save_report(schedule_file)
+
+    supervisor = BotSupervisor(
+        [],
+        write_config=write_config,
+        command=lambda strategy, config_path: freqtrade_command(strategy, config_path, db_dir),
+        initial_port=6900,
+        on_remove=release_slot,
+    )
+    api_server = base_config.get('api_server', {})
+    controller = AdmissionController(supervisor, ranked_strategies, max_bots=max_bots,
+                                     api_auth=(api_server.get('username', ''), api_server.get('password', '')))
+    try:
+        await asyncio.gather(supervisor.run(), controller.run())
+    finally:
+        if proxy_runner is not None:
+            await proxy_runner.cleanup()
+
 
 if __name__ == '__main__':
     # Load the CSV file
     top_strategies_loaded = pd.read_csv('selected_top_strategies.csv')
 
     # Convert DataFrame to a list of dictionaries
-    strategies_list = top_strategies_loaded.to_dict(orient='records')
-
-    # # Display each dictionary
-    # for strategy in strategies_list:
-    #     print(strategy)
-
-    strategy_objects_updated = strategies_list
+    strategy_objects_updated = top_strategies_loaded.to_dict(orient='records')
 
     print(f"ensure you activate venv!")
-    # maybe not
-    # subprocess.call(["source", ".venv/bin/activate"], shell=True)
 
     config_base_path = 'user_data/configs/config_kraken_backtest.json'
     new_configs_dir = 'user_data/configs/generated/'
@@ -102,150 +140,12 @@ if __name__ == '__main__':
     with open(config_base_path, 'r') as file:
         base_config = json.load(file)
 
-    # TODO: shrink: 12 good mid range no ddoss hits! 35 works but may fail to hit every candle
-    max_parallel_processes = 3
-
     if '--kill' in sys.argv:
         kill_freqtrade_sessions(strategy_objects_updated)
     else:
-        # selected_strategies = select_top_strategies(
-        #     strategy_objects_updated, max_parallel_processes)
-
-        # print("\nLaunching Strategies. API URLs:")
-
-        # initial_port = 6900  # Start from this port
-
-        # strategy_url_mappings = {}
-        
-        # for i, strategy_object in enumerate(selected_strategies):
-        #     port = initial_port + i
-        #     #print(f"Launching {strategy_object['strategy_name']} strategy on port {port}...")
-
-        #     url = f"http://localhost:{port}"
-        #     strategy_url_mappings[strategy_object['strategy_name']] = url
-        #     #print(f"Strategy: {strategy_object['strategy_name']} URL: {url}")
-
-        # with open('strategy_url_mappings.json', 'w') as file:
-        #     json.dump(strategy_url_mappings, file, indent=4)
-
-        # args_list = [(strategy_object, base_config, new_configs_dir, db_dir, port)
-        #              for strategy_object, port in zip(selected_strategies, range(initial_port, initial_port + len(selected_strategies)))]
-
-        # with Manager():
-        #     with Pool(processes=min(len(selected_strategies), max_parallel_processes)) as pool:
-        #         launched_strategies_count = 0  # Counter for the number of launched strategies
-
-        #         for args in args_list:
-        #             # # Clear screen
-        #             # os.system('cls' if os.name == 'nt' else 'clear')
-
-        #             launched_strategies_count += 1  # Increment the counter for each launched strategy
-        #             print(f"Launching {args[0]['strategy_name']} strategy on port {args[4]}...")
-        #             # Print the progress bar based on the number of launched strategies
-        #             print(
-        #                 f"PROGRESS | {'=' * launched_strategies_count}{' ' * (len(selected_strategies) - launched_strategies_count)} | {launched_strategies_count}/{len(selected_strategies)}")
-
-                    
-                    
-        #             pool.apply_async(run_strategy, args=args)
-                    
-        #             # Introduce a random delay before launching the next task
-        #             time.sleep(10)
-
-
-        #         pool.close()
-        #         pool.join()  # Wait for all the processes to finish
-        
-        def launch_strategies(strategy_objects_updated, max_parallel_processes, base_config, new_configs_dir, db_dir):
-            selected_strategies = select_top_strategies(strategy_objects_updated, max_parallel_processes)
-
-            print("\nLaunching Strategies. API URLs:")
-
-            initial_port = 6900  # Start from this port
-            strategy_url_mappings = create_strategy_url_mappings(selected_strategies, initial_port)
-
-            with open('strategy_url_mappings.json', 'w') as file:
-                json.dump(strategy_url_mappings, file, indent=4)
-
-            args_list = create_args_list(selected_strategies, base_config, new_configs_dir, db_dir, initial_port)
-
-            with Manager():
-                with Pool(processes=min(len(selected_strategies), max_parallel_processes)) as pool:
-                    launch_strategies_in_pool(pool, args_list, selected_strategies)
-
-            return selected_strategies, strategy_url_mappings
-
-        def create_strategy_url_mappings(selected_strategies, initial_port):
-            strategy_url_mappings = {}
-            for i, strategy_object in enumerate(selected_strategies):
-                port = initial_port + i
-                url = f"http://localhost:{port}"
-                strategy_url_mappings[strategy_object['strategy_name']] = url
-            return strategy_url_mappings
-
-
-        def create_args_list(selected_strategies, base_config, new_configs_dir, db_dir, initial_port):
-            return [(strategy_object, base_config, new_configs_dir, db_dir, port)
-                    for strategy_object, port in zip(selected_strategies, range(initial_port, initial_port + len(selected_strategies)))]
-
-
-        def launch_strategies_in_pool(pool, args_list, selected_strategies):
-            launched_strategies_count = 0  # Counter for the number of launched strategies
-            for args in args_list:
-                launched_strategies_count += 1  # Increment the counter for each launched strategy
-                print(f"Launching {args[0]['strategy_name']} strategy on port {args[4]}...")
-                # Print the progress bar based on the number of launched strategies
-                print_progress_bar(launched_strategies_count, selected_strategies)
-
-                pool.apply_async(run_strategy, args=args)
-
-                # Introduce a random delay before launching the next task
-                time.sleep(10 + random.random()*10)
-
-            pool.close()
-            #pool.join()  # Wait for all the processes to finish
-
-
-        def print_progress_bar(launched_strategies_count, selected_strategies):
-            print(
-                f"PROGRESS | {'=' * launched_strategies_count}{' ' * (len(selected_strategies) - launched_strategies_count)} | {launched_strategies_count}/{len(selected_strategies)}")
-
-
-        # now going to ping so see which ones are up
-            
-        def make_ping_request(url):
-            try:
-                response = requests.get(url)
-                if response.status_code == 200:
-                    return True
-            except requests.RequestException:
-                return False
-            return False
-
-        def launch_and_ping_strategies(strategy_objects_updated, max_parallel_processes, base_config, new_configs_dir, db_dir):
-            for attempt in range(3):
-                print(f"Attempt {attempt + 1} to launch and ping strategies...")
-
-                # Launch the strategies using the helper functions
-                selected_strategies, strategy_url_mappings = launch_strategies(strategy_objects_updated, max_parallel_processes, base_config, new_configs_dir, db_dir)
-
-                # Sleep a bit waiting for last stratagy to start
-                time.sleep(10)
-                # clear
-                os.system('cls' if os.name == 'nt' else 'clear')
-                not_up = []
-                for strategy_name, url in strategy_url_mappings.items():
-                    if not make_ping_request(url):
-                        not_up.append(strategy_name)
-                        print(f"Strategy {strategy_name} is not up at {url}")
-
-                if not not_up:
-                    print(f"DONE: Launched {len(selected_strategies)} strategies.")
-                    return
-
-                print(f"Failed to launch {len(not_up)} strategies. Retrying...")
-
-            print(f"Failed to launch the following strategies after 3 attempts: {', '.join(not_up)}")
-            
-            
-        launch_and_ping_strategies(strategy_objects_updated, max_parallel_processes, base_config, new_configs_dir, db_dir)
\ No newline at end of file
+        # As many strategies run as the host sustains, measured live rather than a fixed process count
+        ranked_strategies = select_top_strategies(strategy_objects_updated)
+        print(f"\nAdmitting up to {len(ranked_strategies)} strategies by rank. API URLs are kept in strategy_url_mappings.json.")
+        # Bots start concurrently and only crashed or unresponsive ones are restarted; Ctrl+C stops them all
+        asyncio.run(supervise_strategies(ranked_strategies, base_config, new_configs_dir, db_dir,
+                                         use_proxy='--no_market_proxy' not in sys.argv))
@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+
+from aiohttp import web, ClientSession, ClientTimeout
+
+# Public REST endpoints the live bots' ccxt clients are pointed at, per freqtrade exchange name
+EXCHANGE_PUBLIC_APIS = {
+    'kraken': 'https://api.kraken.com',
+}
+
+# Candle endpoints: path -> (interval query parameter, seconds per interval unit, since parameter).
+# Their responses are cached per (pair, interval) until the next candle boundary, whatever "since" a
+# bot asks for, and filtered down to the rows that bot asked for. A fetch within the settle window
+# after a boundary waits for it to pass, so the closed candle is final.
+CANDLE_ROUTES = {
+    '/0/public/OHLC': ('interval', 60, 'since'),  # Kraken: interval in minutes, since in seconds
+}
+
+DEFAULT_TTL = 2.0  # Seconds other public GET responses are shared between bots
+CANDLE_SETTLE_SECONDS = 3.0  # Wait after a candle boundary before fetching the closed candle
+
+
+def next_boundary(timestamp, interval_seconds):
+    """Returns the start of the candle after the one containing timestamp."""
+    return (math.floor(timestamp / interval_seconds) + 1) * interval_seconds
+
+
+def filter_kraken_since(payload, since):
+    """Keeps only the candles at or after since in a Kraken OHLC response."""
+    result = payload.get('result', {})
+    for key, rows in result.items():
+        if key != 'last':
+            result[key] = [row for row in rows if row[0] >= since]
+    return payload
+
+
+def oldest_kraken_candle(payload):
+    """Returns the time of the first candle in a Kraken OHLC response, or None if it has none."""
+    for key, rows in payload.get('result', {}).items():
+        if key != 'last' and rows:
+            return rows[0][0]
+    return None
+
+
+class MarketDataProxy:
+    """
+    Local caching proxy for an exchange's public REST API, shared by every live bot.
+
+    Bots' ccxt clients send their public requests here instead of to the exchange. Candle
+    requests for one (pair, interval) are fetched from the exchange once per candle and
+    served to every bot. Other public GETs are shared for DEFAULT_TTL seconds. Identical
+    requests that arrive while a fetch is in flight wait for that fetch instead of
+    starting their own.
+
+    Attributes:
+        upstream (str): Base URL of the real (or stand-in) exchange API.
+        cache (dict): Cache key -> (expires, status, content type, body or parsed payload).
+        in_flight (dict): Cache key -> task fetching it from upstream.
+        stats (dict): Requests served, upstream fetches and coalesced requests.
+    """
+
+    def __init__(self, upstream, candle_routes=CANDLE_ROUTES, ttl=DEFAULT_TTL, settle_seconds=CANDLE_SETTLE_SECONDS):
+        self.upstream = upstream.rstrip('/')
+        self.candle_routes = candle_routes
+        self.ttl = ttl
+        self.settle_seconds = settle_seconds
+        self.cache = {}
+        self.in_flight = {}
+        self.stats = {'requests': 0, 'upstream': 0, 'coalesced': 0, 'cache_hits': 0}
+        self.session = None
+
+    async def fetch(self, key, path, query, expires_at, parse_json=False, not_before=None):
+        """
+        Returns the cached entry for key, fetching it once from upstream for all concurrent callers.
+        A fetch doesn't start before the epoch time not_before; callers arriving meanwhile wait for it.
+        With parse_json the body is decoded, unless it isn't JSON: then it is returned as bytes.
+        """
+        entry = self.cache.get(key)
+        if entry and entry[0] > time.time():
+            self.stats['cache_hits'] += 1
+            return entry
+        if key in self.in_flight:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        async def load():
+            if not_before is not None and not_before > time.time():
+                await asyncio.sleep(not_before - time.time())
+            self.stats['upstream'] += 1
+            async with self.session.get(self.upstream + path, params=query) as response:
+                body = await response.read()
+                entry = (expires_at(), response.status, response.content_type, body)
+            if parse_json:
+                try:
+                    entry = (*entry[:3], json.loads(body))
+                except ValueError:
+                    # An error page rather than data: passed on as it came, and never cached
+                    return entry
+            if entry[1] == 200:
+                self.cache[key] = entry
+            return entry
+
+        task = asyncio.ensure_future(load())
+        self.in_flight[key] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self.in_flight.pop(key, None)
+
+    async def handle(self, request):
+        self.stats['requests'] += 1
+        path = request.path
+        query = dict(request.query)
+
+        if path in self.candle_routes:
+            interval_param, unit_seconds, since_param = self.candle_routes[path]
+            interval_seconds = int(query.get(interval_param, 1)) * unit_seconds
+            since = query.pop(since_param, None)
+            key = (path, tuple(sorted(query.items())))
+            # Stale from the boundary on; a fetch right after it waits out the settle window instead
+            expires_at = lambda: next_boundary(time.time(), interval_seconds)
+            settled_at = next_boundary(time.time(), interval_seconds) - interval_seconds + self.settle_seconds
+            _, status, content_type, payload = await self.fetch(key, path, query, expires_at, parse_json=True,
+                                                                not_before=settled_at)
+
+            if status == 200 and since is not None and not isinstance(payload, bytes):
+                oldest = oldest_kraken_candle(payload)
+                if oldest is not None and int(since) < oldest:
+                    # Asks for more history than the shared response holds: fetch exactly what was asked
+                    query[since_param] = since
+                    key = (path, tuple(sorted(query.items())))
+                    _, status, content_type, payload = await self.fetch(
+                        key, path, query, lambda: time.time() + self.ttl, parse_json=True)
+                else:
+                    payload = filter_kraken_since({**payload, 'result': dict(payload['result'])}, int(since))
+            if isinstance(payload, bytes):
+                return web.Response(body=payload, status=status, content_type=content_type)
+            return web.json_response(payload, status=status)
+
+        key = (path, tuple(sorted(query.items())))
+        _, status, content_type, body = await self.fetch(key, path, query, lambda: time.time() + self.ttl)
+        return web.Response(body=body, status=status, content_type=content_type)
+
+    async def handle_stats(self, request):
+        return web.json_response({**self.stats, 'cached': len(self.cache)})
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/proxy/stats', self.handle_stats)
+        app.router.add_get('/{tail:.*}', self.handle)
+        app.on_startup.append(self.on_startup)
+        app.on_cleanup.append(self.on_cleanup)
+        return app
+
+    async def on_startup(self, app):
+        self.session = ClientSession(timeout=ClientTimeout(total=30))
+
+    async def on_cleanup(self, app):
+        await self.session.close()
+
+    async def start(self, host='127.0.0.1', port=6890):
+        """Starts serving in the running event loop. Returns the runner, for runner.cleanup()."""
+        runner = web.AppRunner(self.app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        print(f"Market data proxy for {self.upstream} listening on http://{host}:{port}")
+        return runner
+
+
+def proxy_config_overrides(proxy_url):
+    """freqtrade exchange settings that send a bot's public ccxt requests through the proxy."""
+    return {'ccxt_config': {'urls': {'api': {'public': proxy_url}}}}
+
+
+def stand_in_exchange():
+    """A local stand-in for Kraken's public API serving synthetic candles, for trying the proxy offline.
+
+    GET /stats returns how many requests reached it.
+    """
+    counts = {'requests': 0}
+
+    async def ohlc(request):
+        counts['requests'] += 1
+        interval = int(request.query.get('interval', 1)) * 60
+        now = math.floor(time.time() / interval) * interval
+        rows = [[t, "1.0", "1.1", "0.9", "1.05", "1.0", "10.0", 5] for t in range(now - 719 * interval, now + 1, interval)]
+        since = int(request.query.get('since', 0))
+        rows = [row for row in rows if row[0] >= since]
+        return web.json_response({'error': [], 'result': {request.query.get('pair', 'XBTUSDT'): rows, 'last': now}})
+
+    async def other(request):
+        counts['requests'] += 1
+        return web.json_response({'error': [], 'result': {'path': request.path}})
+
+    async def stats(request):
+        return web.json_response(counts)
+
+    app = web.Application()
+    app.router.add_get('/0/public/OHLC', ohlc)
+    app.router.add_get('/stats', stats)
+    app.router.add_get('/{tail:.*}', other)
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Shared market data cache for live bots.")
+    parser.add_argument('--exchange', default='kraken', help="Exchange whose public API is proxied.")
+    parser.add_argument('--upstream', default=None, help="Override the upstream API URL, e.g. a stand-in exchange.")
+    parser.add_argument('--port', type=int, default=6890)
+    parser.add_argument('--stand_in', action='store_true', help="Run the local stand-in exchange on --port instead.")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        web.run_app(stand_in_exchange(), host='127.0.0.1', port=args.port)
+    else:
+        proxy = MarketDataProxy(args.upstream or EXCHANGE_PUBLIC_APIS[args.exchange])
+        web.run_app(proxy.app(), host='127.0.0.1', port=args.port)
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+OHLCV_CACHE_DIR = "user_data/ohlcv_cache"
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+FORMAT_VERSION = 1
+
+# A prepared dataset is a directory of fixed-layout arrays covering every pair of one
+# (pairs, timeframe, timerange) combination, with the warmup candles in its manifest:
+#   dates.npy     int64 nanoseconds since the epoch (UTC), all pairs back to back
+#   ohlcv.npy     float64, one row per candle with the columns of OHLCV_COLUMNS
+#   manifest.json rows of each pair ({pair: [start, stop]}), startup_candles and the source files
+# A dataset with more warmup serves any request for less; a request for more rebuilds it.
+# Workers open the arrays with np.load(mmap_mode='c'), so every process on a host maps the
+# same page-cache copy and pays nothing to decode candles. Pages are copy-on-write: a strategy
+# that writes into its dataframe gets a private copy of those pages, never touching the file.
+
+
+def dataset_id(pairs, timeframe, timerange, candle_type):
+    description = json.dumps([sorted(pairs), timeframe, timerange, candle_type, FORMAT_VERSION])
+    return hashlib.sha256(description.encode()).hexdigest()[:16]
+
+
+def source_fingerprint(datadir, pairs, timeframe):
+    """{file name: [size, mtime_ns]} of the downloaded candle files of the pairs, to detect re-downloads."""
+    fingerprint = {}
+    datadir = Path(datadir)
+    for pair in pairs:
+        stem = pair.replace('/', '_').replace(':', '_')
+        for path in sorted(datadir.glob(f"{stem}-{timeframe}*")) + sorted(datadir.glob(f"futures/{stem}-{timeframe}*")):
+            stat = path.stat()
+            fingerprint[str(path.relative_to(datadir))] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+
+class OHLCVCache:
+    """
+    Memory-mapped, read-mostly view of one prepared dataset.
+
+    Attributes:
+        path (Path): The dataset directory.
+        manifest (dict): Layout and provenance, see the module comment.
+        dates (ndarray): Candle open times of all pairs, int64 nanoseconds (memory-mapped).
+        ohlcv (ndarray): Candle values of all pairs, shape (rows, 5) (memory-mapped).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "manifest.json", 'r') as file:
+            self.manifest = json.load(file)
+        self.dates = np.load(self.path / "dates.npy", mmap_mode='c')
+        self.ohlcv = np.load(self.path / "ohlcv.npy", mmap_mode='c')
+        if not len(self.dates) == len(self.ohlcv) == self.manifest["rows"]:
+            raise ValueError(f"{self.path} was replaced while it was being opened")
+
+    @property
+    def pairs(self):
+        return list(self.manifest["pairs"])
+
+    def arrays(self, pair, start=None, end=None):
+        """(dates, ohlcv) views of pair's candles with start <= date < end (datetime64 or ns ints)."""
+        first, stop = self.manifest["pairs"][pair]
+        dates = self.dates[first:stop]
+        lower = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, 'ns').astype(np.int64)))
+        upper = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end, 'ns').astype(np.int64)))
+        return dates[lower:upper], self.ohlcv[first + lower:first + upper]
+
+    def dataframe(self, pair, start=None, end=None):
+        """pair's candles as the DataFrame freqtrade's data loader returns, backed by the mapped arrays."""
+        import pandas as pd
+
+        dates, values = self.arrays(pair, start, end)
+        dataframe = pd.DataFrame(values, columns=OHLCV_COLUMNS, copy=False)
+        dataframe.insert(0, "date", pd.DatetimeIndex(dates.view("datetime64[ns]")).tz_localize("UTC"))
+        return dataframe
+
+    def dataframes(self):
+        """{pair: DataFrame} for every pair, as history.load_data() returns them."""
+        return {pair: self.dataframe(pair) for pair in self.pairs}
+
+
+def write_dataset(path, data, manifest):
+    """
+    Writes {pair: DataFrame with date + OHLCV columns} as a dataset directory, atomically.
+
+    The arrays are written to a temporary directory that is renamed into place, so workers
+    never see a half-written dataset and concurrent writers don't corrupt each other. An
+    existing dataset is renamed aside before it is removed, so the path is only ever missing
+    for the instant between two renames; workers that mapped it keep their (unlinked) files.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pairs = {}
+    rows = 0
+    for pair, dataframe in data.items():
+        pairs[pair] = [rows, rows + len(dataframe)]
+        rows += len(dataframe)
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{path.name}.", dir=path.parent))
+    try:
+        dates = np.lib.format.open_memmap(tmp_dir / "dates.npy", mode='w+', dtype=np.int64, shape=(rows,))
+        ohlcv = np.lib.format.open_memmap(tmp_dir / "ohlcv.npy", mode='w+', dtype=np.float64,
+                                          shape=(rows, len(OHLCV_COLUMNS)))
+        for pair, (start, stop) in pairs.items():
+            dataframe = data[pair]
+            dates[start:stop] = dataframe["date"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+            ohlcv[start:stop] = dataframe[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+        dates.flush()
+        ohlcv.flush()
+        del dates, ohlcv
+
+        with open(tmp_dir / "manifest.json", 'w') as file:
+            json.dump(dict(manifest, pairs=pairs, rows=rows, columns=OHLCV_COLUMNS, version=FORMAT_VERSION),
+                      file, indent=4)
+        old_dir = None
+        if path.exists():
+            old_dir = Path(tempfile.mkdtemp(prefix=f".{path.name}.old.", dir=path.parent))
+            os.rename(path, old_dir / path.name)
+        os.rename(tmp_dir, path)
+        if old_dir is not None:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not (path / "manifest.json").exists():
+            raise  # Not a lost race with another writer of the same dataset
+    return path
+
+
+def candle_type_of(config):
+    from freqtrade.enums import CandleType
+
+    return config.get("candle_type_def", CandleType.get_default(config.get("trading_mode", "spot")))
+
+
+def dataset_path(config, params, cache_dir=OHLCV_CACHE_DIR):
+    candle_type = str(candle_type_of(config))
+    return Path(cache_dir) / dataset_id(params["pairs"], params["timeframe"], params["timerange"], candle_type)
+
+
+def open_dataset(config, params, startup_candles, cache_dir=OHLCV_CACHE_DIR):
+    """
+    The prepared dataset for params with at least startup_candles of warmup, or None if it is
+    missing, has less warmup, or its source candles changed since.
+    """
+    path = dataset_path(config, params, cache_dir)
+    for _ in range(2):  # Once more if a writer swapped the dataset in between
+        try:
+            cache = OHLCVCache(path)
+            break
+        except (FileNotFoundError, ValueError):
+            cache = None
+    if cache is None:
+        return None
+    if cache.manifest.get("startup_candles", 0) < startup_candles:
+        return None
+    if cache.manifest.get("sources") != source_fingerprint(config["datadir"], params["pairs"], params["timeframe"]):
+        return None
+    return cache
+
+
+def prepare_dataset(config, params, startup_candles, cache_dir=OHLCV_CACHE_DIR):
+    """
+    Builds the memory-mapped dataset for params unless an up-to-date one with at least
+    startup_candles of warmup exists. Returns its path.
+
+    Candles are loaded with freqtrade's own loader and the same arguments as
+    Backtesting.load_bt_data(), so backtests see identical data either way.
+
+    Parameters:
+        config (dict): Processed freqtrade config (datadir, dataformat_ohlcv, trading_mode).
+        params (dict): Run parameters with pairs, timeframe and timerange.
+        startup_candles (int): Warmup candles loaded ahead of the timerange.
+    """
+    if open_dataset(config, params, startup_candles, cache_dir) is not None:
+        return dataset_path(config, params, cache_dir)
+
+    from freqtrade.configuration import TimeRange
+    from freqtrade.data import history
+
+    data = history.load_data(
+        datadir=config["datadir"],
+        pairs=list(params["pairs"]),
+        timeframe=params["timeframe"],
+        timerange=TimeRange.parse_timerange(params["timerange"]),
+        startup_candles=startup_candles,
+        fail_without_data=True,
+        data_format=config.get("dataformat_ohlcv", "feather"),
+        candle_type=candle_type_of(config),
+    )
+    manifest = {"timeframe": params["timeframe"], "timerange": params["timerange"],
+                "startup_candles": startup_candles, "candle_type": str(candle_type_of(config)),
+                "sources": source_fingerprint(config["datadir"], params["pairs"], params["timeframe"])}
+    path = write_dataset(dataset_path(config, params, cache_dir), data, manifest)
+    print(f"Prepared OHLCV cache for {len(data)} pairs ({params['timeframe']}, {params['timerange']}) in {path}")
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert downloaded candles into a memory-mapped backtest cache.")
+    parser.add_argument('--config', action='append', required=True, help="freqtrade config file, may be repeated.")
+    parser.add_argument('--pairs', nargs='+', default=["BTC/USDT", "SOL/USDT", "ETH/USDT"])
+    parser.add_argument('--timeframe', default="5m")
+    parser.add_argument('--timerange', default="20230101-20230201")
+    parser.add_argument('--startup_candles', type=int, default=500)
+    parser.add_argument('--cache_dir', default=OHLCV_CACHE_DIR)
+    args = parser.parse_args()
+
+    from freqtrade.configuration import Configuration
+
+    run_params = {"pairs": args.pairs, "timeframe": args.timeframe, "timerange": args.timerange}
+    print(prepare_dataset(Configuration.from_files(args.config), run_params, args.startup_candles, args.cache_dir))
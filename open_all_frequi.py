@@ -1,124 +1,55 @@
-
 """
 Usage Instructions:
 
-    Ensure Python and Selenium WebDriver are installed in your environment.
-    Install the Chrome WebDriver and ensure it's accessible in your system's PATH or specify its path when initializing the webdriver.Chrome() instance.
-    Place the strategy_url_mappings.json file in the same directory as this script or provide the absolute path to the file when initializing StrategyActionExecutor.
-    Run the script using python3 script_name.py, where script_name.py is the name you've given to this script.
+    Start the fleet gateway first:
+
+        python fleet_gateway.py
 
-JSON File Format:
+    then run this script to open FreqUI with every bot registered:
 
-The strategy_url_mappings.json file should contain a JSON object with strategy names as keys and their corresponding URLs as values, similar to the example provided.
+        python open_all_frequi.py
+
+The gateway reads strategy_url_mappings.json (written by live_run_strategies.py), which contains
+a JSON object with strategy names as keys and their bot URLs as values:
 
 json
 
 {
-    "StrategyName1": "http://localhost:6970",
-    "StrategyName2": "http://localhost:6971",
+    "StrategyName1": "http://localhost:6900",
+    "StrategyName2": "http://localhost:6901",
     ...
 }
 
-Note:
-
-This script uses hardcoded placeholder values ('1') for some form fields and assumes a certain structure of the web page it interacts with. Adjust the script accordingly to fit the specific requirements and structure of your web interface.
+Its /register page logs into every bot at once and hands FreqUI the full bot list, so there is
+no browser automation or per-bot form filling. The browser asks once for the bots' api_server
+username and password before the gateway hands out their tokens. All of FreqUI's polling then goes through the
+gateway, which shares identical requests between open dashboards.
 
 """
 
 
 import json
-import time
-from selenium import webdriver
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-
-class StrategyActionExecutor:
-    """
-    A class to execute predefined actions for a list of strategies on a web interface.
-
-    Attributes:
-        mappings_file (str): The path to the JSON file containing strategy-url mappings.
-        initial_url (str): The initial URL to start automation on, defaults to 'http://localhost:6970'.
-        driver: Instance of Selenium WebDriver for browser automation.
-        mappings (dict): Dictionary loaded from the JSON file containing strategy-url mappings.
-    """
-
-    def __init__(self, mappings_file, initial_url='http://localhost:6900'):
-        """
-        Initializes the StrategyActionExecutor with mappings file and initial URL.
-
-        Parameters:
-            mappings_file (str): The path to the JSON file containing strategy-url mappings.
-            initial_url (str): The initial URL to start automation on.
-        """
-        self.mappings_file = mappings_file
-        self.initial_url = initial_url
-        self.driver = webdriver.Chrome()  # Initialize the Chrome WebDriver
-        self.load_mappings()
-
-    def load_mappings(self):
-        """Loads strategy-url mappings from the specified JSON file."""
-        with open(self.mappings_file, 'r') as file:
-            self.mappings = json.load(file)
-
-    def execute_actions(self):
-        """
-        Executes predefined actions for each strategy defined in mappings.
-        Actions include navigating to initial_url, clicking buttons, and filling out forms.
-        """
-        self.driver.get(self.initial_url)
-        time.sleep(1)  # Ensure the page has loaded
-
-        first_run = True  # Flag to check if it's the first strategy being executed
-
-        for strategy, url in self.mappings.items():
-            print(f"Executing actions for {strategy} at {url}")
-            try:
-                # Click the 'Login' button on the first run, else click 'Add new bot'
-                button_text = "Login" if first_run else "Add new bot"
-                action_button = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, f'//button[text()="{button_text}"]'))
-                    )
-                action_button.click()
-                print(f'Clicked the {button_text} button')
-            except Exception as e:
-                print(f"Error clicking the button for {strategy}: {e}")
-                return
-
-            try:
-
-                time.sleep(0.3)
-
-                # Use ActionChains to simulate form filling
-                actions = ActionChains(self.driver)
-                actions.send_keys(Keys.TAB * 2)  # Skip to the form
-                actions.send_keys(strategy)  # Input strategy name
-                actions.send_keys(Keys.TAB).send_keys(url)  # Input strategy URL
-                actions.send_keys(Keys.TAB).send_keys('1')  # Input a placeholder value
-                actions.send_keys(Keys.TAB).send_keys('1')  # Input another placeholder value
-                actions.send_keys(Keys.TAB * 2).send_keys(Keys.ENTER)  # Submit the form
-                actions.perform()
-
-                print(f"Form submitted for {strategy}")
-                time.sleep(0.3)
-
-                first_run = False  # Update flag after the first iteration
-
-            except Exception as e:
-                print(f"Error executing actions for {strategy}: {e}")
-                input("\n\n\n\nPress Enter to continue...")
-                continue
-
-        input("\n\n\n\nPress Enter to close the browser...")
-        self.driver.quit()
-        print('Browser closed')
+import sys
+import webbrowser
+from urllib.error import URLError
+from urllib.request import urlopen
+
+GATEWAY_URL = 'http://localhost:6899'
+
+
+def open_frequi(gateway_url=GATEWAY_URL):
+    """Opens FreqUI through the gateway with every bot in strategy_url_mappings.json registered."""
+    try:
+        with urlopen(f"{gateway_url}/bots", timeout=5) as response:
+            bots = json.load(response)
+    except URLError as e:
+        print(f"Fleet gateway not reachable at {gateway_url} ({e}). Start it with: python fleet_gateway.py")
+        return False
+
+    print(f"Registering {len(bots)} bots in FreqUI: {', '.join(bots)}")
+    webbrowser.open(f"{gateway_url}/register")
+    return True
 
 
 if __name__ == "__main__":
-    # Ensure the JSON file with mappings is in the same directory as this script or provide the full path.
-    executor = StrategyActionExecutor('strategy_url_mappings.json')
-    executor.execute_actions()
+    open_frequi(sys.argv[1] if len(sys.argv) > 1 else GATEWAY_URL)
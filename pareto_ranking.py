@@ -0,0 +1,115 @@
+import heapq
+
+import numpy as np
+
+# Objectives are given as "field:max,field:min,...", e.g.
+# "profit_total_abs:max,max_drawdown_abs:min,trades:max,winrate:max,duration_avg_s:min".
+# Fields must be typed columns of the results index.
+DEFAULT_OBJECTIVES = "profit_total_abs:max,max_drawdown_abs:min,trades:max,winrate:max"
+
+
+def parse_objectives(spec, allowed_fields):
+    """Parses an objectives spec into [(field, sign)], sign +1 to maximize and -1 to minimize."""
+    objectives = []
+    for item in spec.split(','):
+        field, _, direction = item.strip().partition(':')
+        direction = direction or 'max'
+        if field not in allowed_fields:
+            raise ValueError(f"Unknown objective field '{field}'. Choose from: {', '.join(allowed_fields)}")
+        if direction not in ('max', 'min'):
+            raise ValueError(f"Objective direction must be 'max' or 'min', got '{direction}'")
+        objectives.append((field, 1.0 if direction == 'max' else -1.0))
+    return objectives
+
+
+def to_maximization(rows, objectives):
+    """Turns rows of raw objective values into an (n, d) array where larger is always better."""
+    values = np.array([[np.nan if value is None else value for value in row] for row in rows], dtype=float)
+    values = values.reshape(len(rows), len(objectives))
+    values *= np.array([sign for _, sign in objectives])
+    return np.nan_to_num(values, nan=-np.inf)  # Missing values never win
+
+
+def _skyline_2d(values, candidates):
+    """Non-dominated subset for two objectives: sort on the first, sweep on the second. O(n log n)."""
+    order = candidates[np.lexsort((-values[candidates, 1], -values[candidates, 0]))]
+    front = []
+    best_second = -np.inf
+    for index in order:
+        if not front or values[index, 1] > best_second:  # The best first value is never dominated
+            front.append(index)
+            best_second = values[index, 1]
+        elif values[index, 1] == best_second and front and np.array_equal(values[index], values[front[-1]]):
+            front.append(index)  # Exact duplicates of a front member don't dominate each other
+    return np.array(front, dtype=int)
+
+
+def _monotone_order(values, candidates):
+    """Candidates ordered so that no point comes after one it dominates.
+
+    The key is the sum of min-max normalized values (missing values below every real one),
+    ties broken lexicographically on the values. If a dominates b, a's sum is at least b's
+    and, when the sums tie, a wins the lexicographic comparison, so a sorts first.
+    """
+    points = values[candidates]
+    finite = np.isfinite(points)
+    low = np.where(finite, points, np.inf).min(axis=0)
+    high = np.where(finite, points, -np.inf).max(axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    normalized = np.where(finite, (points - np.where(np.isfinite(low), low, 0.0)) / span, -1.0)
+    score = normalized.sum(axis=1)
+    # np.lexsort sorts by the last key first
+    keys = [-points[:, column] for column in reversed(range(points.shape[1]))] + [-score]
+    return candidates[np.lexsort(keys)]
+
+
+def _skyline_sfs(values, candidates):
+    """Non-dominated subset for any number of objectives using sort-filter-skyline.
+
+    After sorting with _monotone_order(), no point can be dominated by one that comes after
+    it, so each point is only checked against the skyline found so far, with one vectorised
+    comparison. Members a new point dominates are evicted all the same, so the result
+    doesn't hinge on the order alone.
+    """
+    skyline = np.empty((0, values.shape[1]))
+    front = []
+    for index in _monotone_order(values, candidates):
+        point = values[index]
+        if np.any(np.all(skyline >= point, axis=1) & np.any(skyline > point, axis=1)):
+            continue
+        dominated = np.all(point >= skyline, axis=1) & np.any(point > skyline, axis=1)
+        if np.any(dominated):
+            keep = ~dominated
+            skyline = skyline[keep]
+            front = [member for member, kept in zip(front, keep) if kept]
+        front.append(index)
+        skyline = np.vstack([skyline, point])
+    return np.array(front, dtype=int)
+
+
+def skyline(values, candidates=None):
+    """Returns the indices of the Pareto-optimal rows of `values` (all objectives maximized)."""
+    candidates = np.arange(len(values)) if candidates is None else np.asarray(candidates, dtype=int)
+    if len(candidates) == 0:
+        return candidates
+    if values.shape[1] == 1:
+        return candidates[values[candidates, 0] == values[candidates, 0].max()]
+    if values.shape[1] == 2:
+        return _skyline_2d(values, candidates)
+    return _skyline_sfs(values, candidates)
+
+
+def pareto_fronts(values, n_fronts=1):
+    """Peels successive Pareto fronts: front 0 is the skyline, front 1 the skyline of the rest, ..."""
+    remaining = np.arange(len(values))
+    fronts = []
+    while len(remaining) and len(fronts) < n_fronts:
+        front = skyline(values, remaining)
+        fronts.append(front)
+        remaining = np.setdiff1d(remaining, front, assume_unique=True)
+    return fronts
+
+
+def top_k(items, k, key):
+    """Heap-based top-k, without sorting everything."""
+    return heapq.nlargest(k, items, key=key)
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import numpy as np
+
+from backtest_results_io import load_trades
+
+CORRELATION_CHUNK = 1024  # Rows of the correlation matrix computed per matrix product
+
+
+def return_series(strategies, trades_dir, freq='1D'):
+    """Builds per-strategy return series from the Parquet trades of each strategy.
+
+    Each trade's profit_abs is booked in the period (day by default, or a candle length such as
+    '5min') it closed in. Returns (names, periods, matrix) where matrix has one row per
+    strategy that has trades and one column per period. Strategies without a trades file are
+    left out.
+    """
+    import pandas as pd
+
+    names, period_lists, profit_lists = [], [], []
+    for strategy in strategies:
+        if not (Path(trades_dir) / f"{strategy}.parquet").exists():
+            continue
+        trades = load_trades(strategy, trades_dir, columns=['close_date', 'profit_abs'])
+        if trades.empty:
+            continue
+        names.append(strategy)
+        period_lists.append(pd.to_datetime(trades['close_date'], utc=True).dt.floor(freq).to_numpy())
+        profit_lists.append(trades['profit_abs'].to_numpy(dtype=float))
+
+    if not names:
+        return [], np.array([], dtype='datetime64[ns]'), np.zeros((0, 0))
+
+    # One shared timeline, then every trade is scattered into its (strategy, period) cell at once
+    periods, period_index = np.unique(np.concatenate(period_lists), return_inverse=True)
+    row_index = np.repeat(np.arange(len(names)), [len(profits) for profits in profit_lists])
+    matrix = np.zeros((len(names), len(periods)))
+    np.add.at(matrix, (row_index, period_index), np.concatenate(profit_lists))
+    return names, periods, matrix
+
+
+def standardize(matrix):
+    """Scales each row to zero mean and unit norm, so row dot products are Pearson correlations.
+
+    Rows with no variance become all zeros, i.e. uncorrelated with everything.
+    """
+    centered = matrix - matrix.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(centered, axis=1, keepdims=True)
+    return np.divide(centered, norms, out=np.zeros_like(centered), where=norms > 0)
+
+
+def correlation_matrix(matrix, chunk_size=CORRELATION_CHUNK):
+    """Pairwise correlation of the rows of matrix, computed in row chunks as float32."""
+    normalized = standardize(matrix).astype(np.float32)
+    n = len(normalized)
+    correlations = np.empty((n, n), dtype=np.float32)
+    for start in range(0, n, chunk_size):
+        correlations[start:start + chunk_size] = normalized[start:start + chunk_size] @ normalized.T
+    return correlations
+
+
+def select_uncorrelated(matrix, scores, n_select, max_correlation=0.5):
+    """Greedily picks up to n_select rows that are good and weakly correlated with each other.
+
+    The best-scoring row is picked first. After that, the next pick is the best-scoring row
+    whose correlation with every pick so far stays at or below max_correlation. When no row
+    qualifies, the row least correlated with the picks is taken. Only one correlation column
+    per pick is computed, so memory stays O(n) even for 10k candidates.
+
+    Returns the indices of the picked rows, in order of selection.
+    """
+    normalized = standardize(matrix).astype(np.float32)
+    scores = np.asarray(scores, dtype=float)
+    n_select = min(n_select, len(scores))
+
+    max_seen = np.full(len(scores), -np.inf)  # Highest correlation with any pick so far
+    available = np.ones(len(scores), dtype=bool)
+    selected = []
+    while len(selected) < n_select:
+        eligible = available & (max_seen <= max_correlation)
+        if eligible.any():
+            pick = int(np.argmax(np.where(eligible, scores, -np.inf)))
+        else:
+            pick = int(np.argmin(np.where(available, max_seen, np.inf)))
+        selected.append(pick)
+        available[pick] = False
+        max_seen = np.maximum(max_seen, normalized @ normalized[pick])
+    return selected
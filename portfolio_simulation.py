@@ -0,0 +1,186 @@
+from pathlib import Path
+
+import numpy as np
+
+from backtest_results_io import load_trades
+
+SIMULATION_BATCH = 1024  # Portfolios simulated together in one pass over the trade timeline
+# positive_ev divides by at least this many stakes of drawdown, so a portfolio that never lost
+# is still scored as a ratio rather than in currency
+DRAWDOWN_FLOOR_STAKES = 0.1
+
+
+class TradeBook:
+    """
+    The exported trades of a set of strategies merged onto one timeline.
+
+    Loaded once from the Parquet trades, then used to simulate any number of portfolios
+    (subsets of the strategies) sharing one wallet, without running freqtrade again.
+
+    Attributes:
+        strategies (list): Strategy names; portfolio membership columns follow this order.
+        pairs (list): Pair names referenced by pair_index.
+        strategy_index, pair_index (ndarray): Per-trade strategy and pair.
+        open_ns, close_ns (ndarray): Per-trade open and close time, in epoch nanoseconds.
+        profit_ratio (ndarray): Per-trade profit as a fraction of the stake.
+    """
+
+    def __init__(self, strategies, trades_dir):
+        import pandas as pd
+
+        frames = []
+        self.strategies = []
+        for strategy in strategies:
+            if not (Path(trades_dir) / f"{strategy}.parquet").exists():
+                continue
+            trades = load_trades(strategy, trades_dir, columns=['pair', 'open_date', 'close_date', 'profit_ratio'])
+            trades['strategy_index'] = len(self.strategies)
+            self.strategies.append(strategy)
+            frames.append(trades)
+
+        trades = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=['pair', 'open_date', 'close_date', 'profit_ratio', 'strategy_index'])
+        pairs, self.pair_index = np.unique(trades['pair'].astype(str), return_inverse=True)
+        self.pairs = list(pairs)
+        self.strategy_index = trades['strategy_index'].to_numpy(dtype=int)
+        self.open_ns = pd.to_datetime(trades['open_date'], utc=True).to_numpy(dtype='datetime64[ns]').view('int64')
+        self.close_ns = pd.to_datetime(trades['close_date'], utc=True).to_numpy(dtype='datetime64[ns]').view('int64')
+        self.profit_ratio = trades['profit_ratio'].to_numpy(dtype=float)
+
+    def membership(self, portfolios):
+        """Turns portfolios given as lists of strategy names into a (portfolios, strategies) bool mask."""
+        position = {strategy: index for index, strategy in enumerate(self.strategies)}
+        mask = np.zeros((len(portfolios), len(self.strategies)), dtype=bool)
+        for row, portfolio in enumerate(portfolios):
+            mask[row, [position[strategy] for strategy in portfolio if strategy in position]] = True
+        return mask
+
+    def simulate(self, members, starting_balance=1000.0, max_open_trades=10, stake_amount=None,
+                 max_open_trades_per_pair=None, return_curves=False):
+        """Simulates portfolios that share one wallet.
+
+        members is a (portfolios, strategies) bool mask, see membership(). A trade is taken
+        only if the portfolio has a free slot under max_open_trades, and, when given, fewer
+        than max_open_trades_per_pair trades open on that pair across its strategies (the same
+        gate IStrategyWithEntryOrderBlocking applies live). Every trade uses a fixed stake,
+        starting_balance / max_open_trades by default. Trades are not compounded.
+
+        Every portfolio is stepped through the timeline together: each open or close event is
+        one vectorised update over all portfolios.
+
+        Returns a dict of per-portfolio arrays: profit_total_abs, max_drawdown_abs,
+        max_drawdown_pct, positive_ev, trades, rejected, peak_open_trades, mean_open_trades,
+        plus "close_ns" and "equity" curves when return_curves is set.
+        """
+        members = np.atleast_2d(np.asarray(members, dtype=bool))
+        n_portfolios = len(members)
+        stake_amount = stake_amount or starting_balance / max_open_trades
+
+        # Only trades of strategies used by at least one portfolio matter
+        trades = np.flatnonzero(members.any(axis=0)[self.strategy_index])
+        n_trades = len(trades)
+        strategy_index = self.strategy_index[trades]
+        pair_index = self.pair_index[trades]
+
+        # Events sorted by time; at equal times closes (0) free their slot before opens (1), except
+        # the close of a zero-duration trade (2), which must follow its own open
+        times = np.concatenate([self.close_ns[trades], self.open_ns[trades]])
+        zero_duration = self.close_ns[trades] == self.open_ns[trades]
+        kinds = np.concatenate([np.where(zero_duration, 2, 0), np.ones(n_trades, dtype=int)])
+        order = np.lexsort((kinds, times))
+        event_trades = np.concatenate([np.arange(n_trades), np.arange(n_trades)])[order]
+        event_kinds = kinds[order]
+        strategy_index_list = strategy_index.tolist()
+        pair_index_list = pair_index.tolist()
+
+        # Laid out (trade, portfolio) and (pair, portfolio) so each event touches one contiguous row
+        accepted = np.zeros((n_trades, n_portfolios), dtype=bool)
+        members_by_strategy = np.ascontiguousarray(members.T)
+        open_count = np.zeros(n_portfolios, dtype=int)
+        pair_open = np.zeros((len(self.pairs), n_portfolios), dtype=int) if max_open_trades_per_pair else None
+        peak_open = np.zeros(n_portfolios, dtype=int)
+        open_total = np.zeros(n_portfolios, dtype=int)
+        taken = np.empty(n_portfolios, dtype=bool)
+
+        # Plain Python ints keep the per-event overhead down; the work per event is the row updates
+        for trade, kind in zip(event_trades.tolist(), event_kinds.tolist()):
+            pair = pair_index_list[trade]
+            if kind != 1:
+                open_count -= accepted[trade]
+                if pair_open is not None:
+                    pair_open[pair] -= accepted[trade]
+                continue
+            np.less(open_count, max_open_trades, out=taken)
+            taken &= members_by_strategy[strategy_index_list[trade]]
+            if pair_open is not None:
+                taken &= pair_open[pair] < max_open_trades_per_pair
+                pair_open[pair] += taken
+            accepted[trade] = taken
+            np.add(open_total, open_count, out=open_total, where=taken)  # Trades already open when this one was taken
+            open_count += taken
+            np.maximum(peak_open, open_count, out=peak_open)
+
+        # Profits are realised at close, so the equity curve follows close order (one row per close)
+        close_order = np.argsort(self.close_ns[trades], kind='stable')
+        pnl = accepted[close_order] * (stake_amount * self.profit_ratio[trades][close_order])[:, None]
+        equity = starting_balance + np.cumsum(pnl, axis=0)
+        running_peak = np.maximum.accumulate(np.maximum(equity, starting_balance), axis=0)
+        drawdown = running_peak - equity
+
+        n_taken = accepted.sum(axis=0)
+        n_wanted = members.astype(int) @ np.bincount(strategy_index, minlength=members.shape[1])
+        profit = equity[-1] - starting_balance if n_trades else np.zeros(n_portfolios)
+        max_drawdown = drawdown.max(axis=0) if n_trades else np.zeros(n_portfolios)
+        max_drawdown_pct = (drawdown / running_peak).max(axis=0) if n_trades else np.zeros(n_portfolios)
+
+        stats = {
+            "profit_total_abs": profit,
+            "max_drawdown_abs": max_drawdown,
+            "max_drawdown_pct": max_drawdown_pct,
+            # The ratio of backtest_results_io.positive_ev on the combined curve, with a floored drawdown
+            "positive_ev": profit / np.maximum(max_drawdown, DRAWDOWN_FLOOR_STAKES * stake_amount),
+            "trades": n_taken,
+            "rejected": n_wanted - n_taken,
+            "peak_open_trades": peak_open,
+            # Including the trade itself, so a portfolio that never overlaps scores 1
+            "mean_open_trades": np.divide(open_total + n_taken, n_taken, out=np.zeros(n_portfolios), where=n_taken > 0),
+        }
+        if return_curves:
+            stats["close_ns"] = self.close_ns[trades][close_order]
+            stats["equity"] = equity.T
+        return stats
+
+    def simulate_many(self, members, batch_size=SIMULATION_BATCH, **simulation_kwargs):
+        """simulate() over any number of portfolios, in batches to bound memory. Curves are not returned."""
+        members = np.atleast_2d(np.asarray(members, dtype=bool))
+        simulation_kwargs.pop("return_curves", None)
+        batches = [self.simulate(members[start:start + batch_size], **simulation_kwargs)
+                   for start in range(0, len(members), batch_size)]
+        if not batches:
+            return {}
+        return {key: np.concatenate([batch[key] for batch in batches]) for key in batches[0]}
+
+
+def optimize_portfolio(book, candidates, n_select, metric="positive_ev", **simulation_kwargs):
+    """Builds a portfolio by forward selection on the simulated combined metric.
+
+    Each round simulates the current portfolio plus every remaining candidate in one batch and
+    keeps the candidate that scores best, even when the score drops, until n_select strategies
+    are chosen or candidates run out. Returns (strategy names, stats of the final portfolio).
+    """
+    position = {strategy: index for index, strategy in enumerate(book.strategies)}
+    remaining = [strategy for strategy in candidates if strategy in position]
+    selected = []
+    best_stats = None
+
+    while remaining and len(selected) < n_select:
+        members = np.zeros((len(remaining), len(book.strategies)), dtype=bool)
+        members[:, [position[strategy] for strategy in selected]] = True
+        members[np.arange(len(remaining)), [position[strategy] for strategy in remaining]] = True
+
+        stats = book.simulate_many(members, **simulation_kwargs)
+        best = int(np.argmax(stats[metric]))
+        best_stats = {key: values[best] for key, values in stats.items()}
+        selected.append(remaining.pop(best))
+
+    return selected, best_stats
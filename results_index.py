@@ -0,0 +1,153 @@
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+from backtest_results_io import positive_ev
+
+INDEX_FILE_NAME = "results_index.sqlite"
+PARAMS_FILE_NAME = "params.json"  # Run parameters backtest_strategies.py writes next to its results
+
+# strategy_comparison fields kept as typed columns so they can be filtered and sorted in SQL.
+# The complete record is also kept as JSON in the "data" column.
+NUMERIC_FIELDS = ['trades', 'profit_mean', 'profit_mean_pct', 'profit_sum', 'profit_sum_pct',
+                  'profit_total_abs', 'profit_total', 'profit_total_pct', 'max_drawdown_account',
+                  'max_drawdown_abs', 'winrate', 'wins', 'draws', 'losses']
+# Computed once at ingest instead of on every summary
+DERIVED_FIELDS = ['positive_ev', 'duration_avg_s']
+
+DURATION_PATTERN = re.compile(r'(?:(\d+) days?, )?(\d+):(\d+):(\d+)')
+
+
+def duration_seconds(duration):
+    """Parses freqtrade's duration_avg text (e.g. '1 day, 2:05:00') into seconds."""
+    match = DURATION_PATTERN.match(str(duration or ''))
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(group or 0) for group in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def to_number(value):
+    """Converts a strategy_comparison value (sometimes a quoted string) to float, or None."""
+    if value is None:
+        return None
+    try:
+        return float(str(value).replace('"', ''))
+    except ValueError:
+        return None
+
+
+class ResultsIndex:
+    """
+    Incrementally maintained SQLite index over a directory of *_result.json files.
+
+    Only files whose mtime or size changed since the last ingest are parsed, so summaries
+    over tens of thousands of results don't re-open every file on every run.
+
+    Each row also records the timeframe the result was backtested at, from the params.json
+    of the directory, or None for directories from before it was written.
+
+    Attributes:
+        directory (Path): The results directory being indexed.
+        index_file (Path): The SQLite file, stored inside the results directory.
+    """
+
+    def __init__(self, directory, index_file=None):
+        self.directory = Path(directory)
+        self.index_file = Path(index_file) if index_file else self.directory / INDEX_FILE_NAME
+        self.connection = sqlite3.connect(self.index_file, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        columns = ", ".join(f"{field} REAL" for field in NUMERIC_FIELDS + DERIVED_FIELDS)
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS results (strategy_name TEXT PRIMARY KEY, mtime_ns INTEGER, "
+            f"size INTEGER, duration_avg TEXT, timeframe TEXT, {columns}, data TEXT)")
+        existing = {row[1] for row in self.connection.execute("PRAGMA table_info(results)")}
+        if 'timeframe' not in existing:
+            self.connection.execute("ALTER TABLE results ADD COLUMN timeframe TEXT")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_positive_ev ON results (positive_ev)")
+        self.connection.commit()
+
+    def ingest(self):
+        """Brings the index up to date with the directory. Returns (updated, removed) counts."""
+        timeframe = self.timeframe()
+        known = {row[0]: (row[1], row[2]) for row in
+                 self.connection.execute("SELECT strategy_name, mtime_ns, size FROM results")}
+
+        rows = []
+        seen = set()
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('_result.json'):
+                continue
+            strategy_name = entry.name[:-len('_result.json')]
+            seen.add(strategy_name)
+            stat = entry.stat()
+            if known.get(strategy_name) == (stat.st_mtime_ns, stat.st_size):
+                continue
+            with open(entry.path, 'r') as file:
+                data = json.load(file)
+            rows.append(self._row(strategy_name, stat, data, timeframe))
+
+        removed = [(name,) for name in known if name not in seen]
+        placeholders = ", ".join("?" * (5 + len(NUMERIC_FIELDS) + len(DERIVED_FIELDS)))
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO results (strategy_name, mtime_ns, size, duration_avg, timeframe, "
+                f"{', '.join(NUMERIC_FIELDS + DERIVED_FIELDS)}, data) VALUES ({placeholders}, ?)", rows)
+            self.connection.executemany("DELETE FROM results WHERE strategy_name = ?", removed)
+            if timeframe:
+                # Rows indexed before the directory recorded its parameters
+                self.connection.execute("UPDATE results SET timeframe = ? WHERE timeframe IS NULL", (timeframe,))
+        return len(rows), len(removed)
+
+    def timeframe(self):
+        """The timeframe of the directory's backtests from its params.json, or None."""
+        try:
+            with open(self.directory / PARAMS_FILE_NAME, 'r') as file:
+                return json.load(file).get('timeframe')
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _row(strategy_name, stat, data, timeframe=None):
+        """Builds the index row of one result file, computing the derived metrics."""
+        # Same record shape the summary always used: "key" renamed to strategy_name, positive_ev added
+        data['positive_ev'] = positive_ev(data)
+        data.pop('key', None)
+        data['strategy_name'] = strategy_name
+
+        numeric = [to_number(data.get(field)) for field in NUMERIC_FIELDS]
+        derived = [data['positive_ev'], duration_seconds(data.get('duration_avg'))]
+        return (strategy_name, stat.st_mtime_ns, stat.st_size, data.get('duration_avg'), timeframe,
+                *numeric, *derived, json.dumps(data))
+
+    def query(self, where="1", params=(), order_by="positive_ev DESC", limit=None, offset=0):
+        """Returns full result records matching a SQL filter over the typed columns."""
+        sql = f"SELECT data FROM results WHERE {where} ORDER BY {order_by}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+        return [json.loads(row[0]) for row in self.connection.execute(sql, params)]
+
+    def count(self, where="1", params=()):
+        """Returns the number of results matching a SQL filter."""
+        return self.connection.execute(f"SELECT COUNT(*) FROM results WHERE {where}", params).fetchone()[0]
+
+    def dataframe(self, where="1", params=(), order_by="positive_ev DESC", limit=None):
+        """Returns the typed columns of matching results as a pandas DataFrame."""
+        import pandas as pd
+
+        sql = (f"SELECT strategy_name, duration_avg, timeframe, {', '.join(NUMERIC_FIELDS + DERIVED_FIELDS)} "
+               f"FROM results WHERE {where} ORDER BY {order_by}")
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+
+def open_results_index(directory):
+    """Opens the index of a results directory and ingests whatever changed since last time."""
+    index = ResultsIndex(directory)
+    updated, removed = index.ingest()
+    if updated or removed:
+        print(f"Results index: {updated} results ingested, {removed} removed.")
+    return index
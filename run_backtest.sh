@@ -1,12 +1,28 @@
 #!/bin/bash
+# Usage: ./run_backtest.sh "<Strategy1> <Strategy2> ..." [export_filename]
+# Passing a distinct export filename per worker keeps parallel runs from
+# overwriting each other's BACKTESTING_RESULT files.
+# Run parameters can be overridden through the environment (backtest_strategies.py
+# sets them from BACKTEST_PARAMS so they are part of the result cache key).
+EXPORT_FILENAME=${2:-BACKTESTING_RESULT.json}
+TIMERANGE=${TIMERANGE:-20230101-20230201}
+TIMEFRAME=${TIMEFRAME:-5m}
+FEE=${FEE:-0.001}
+PAIRS=${PAIRS:-"BTC/USDT SOL/USDT ETH/USDT"}
+CONFIGS=${CONFIGS:-"user_data/configs/config_binance_backtest.json user_data/configs/config_static_pairlist.json"}
+
+CONFIG_ARGS=""
+for config in $CONFIGS; do
+    CONFIG_ARGS="$CONFIG_ARGS --config $config"
+done
+
 source .venv/bin/activate
 freqtrade backtesting \
     --strategy-list $1 \
-    --fee 0.001 \
-    --timerange 20230101-20230201 \
-    --config user_data/configs/config_binance_backtest.json \
-    --config user_data/configs/config_static_pairlist.json \
-    --timeframe 5m \
+    --fee $FEE \
+    --timerange $TIMERANGE \
+    $CONFIG_ARGS \
+    --timeframe $TIMEFRAME \
     --export trades \
-    --export-filename BACKTESTING_RESULT.json \
-    --pairs BTC/USDT SOL/USDT ETH/USDT
+    --export-filename "$EXPORT_FILENAME" \
+    --pairs $PAIRS
@@ -0,0 +1,204 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from backtest_cache import file_digest, strategy_dependencies
+
+VENV_PYTHON = ".venv/bin/python"  # The interpreter run_backtest.sh activates, used to resolve imports
+PRESCREEN_STATUS_PREFIX = "prescreen: "  # Tracker status of strategies rejected before backtesting
+IMPORT_TIMEOUT = 300
+
+# Runs in a separate isolated interpreter so importing third-party packages can't affect this process.
+# Reads [module, ...] on stdin and prints {module: error message or null}.
+RESOLVE_IMPORTS_SCRIPT = """
+import importlib.util, json, sys
+sys.path[:0] = sys.argv[1:]
+errors = {}
+for module in json.load(sys.stdin):
+    try:
+        errors[module] = None if importlib.util.find_spec(module) else "not found"
+    except BaseException as error:
+        errors[module] = f"{type(error).__name__}: {error}"
+print(json.dumps(errors))
+"""
+
+
+def constant_assignments(class_node):
+    """{name: value} of the constant class attributes, e.g. timeframe = '5m'."""
+    values = {}
+    for node in class_node.body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        if isinstance(value, ast.Constant):
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    values[target.id] = value.value
+    return values
+
+
+def analyze_strategy_file(strategy_file):
+    """
+    Static checks of one strategy file, without importing it.
+
+    Returns {"digest", "error", "timeframe", "startup_candle_count", "imports"}. error is None
+    when the file defines a class named like the file that derives from something.
+    """
+    strategy_file = Path(strategy_file)
+    verdict = {"digest": file_digest(strategy_file), "error": None, "timeframe": None,
+               "startup_candle_count": None, "imports": []}
+    try:
+        tree = ast.parse(strategy_file.read_text(), filename=str(strategy_file))
+    except (SyntaxError, UnicodeDecodeError, ValueError) as error:
+        verdict["error"] = f"does not parse: {error}"
+        return verdict
+
+    imports = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            imports.add(node.module)
+    verdict["imports"] = sorted(imports)
+
+    class_node = next((node for node in tree.body
+                       if isinstance(node, ast.ClassDef) and node.name == strategy_file.stem), None)
+    if class_node is None:
+        verdict["error"] = f"no class named {strategy_file.stem}"
+    elif not class_node.bases:
+        verdict["error"] = f"class {strategy_file.stem} does not derive from IStrategy"
+    else:
+        attributes = constant_assignments(class_node)
+        if isinstance(attributes.get("timeframe"), str):
+            verdict["timeframe"] = attributes["timeframe"]
+        if isinstance(attributes.get("startup_candle_count"), int):
+            verdict["startup_candle_count"] = attributes["startup_candle_count"]
+    return verdict
+
+
+def resolve_imports(modules, search_dirs, python=None):
+    """{module: error message} for the modules that can't be imported by freqtrade's interpreter."""
+    if not modules:
+        return {}
+    python = python or (VENV_PYTHON if Path(VENV_PYTHON).exists() else sys.executable)
+    completed = subprocess.run([python, "-I", "-c", RESOLVE_IMPORTS_SCRIPT, *map(str, search_dirs)],
+                               input=json.dumps(sorted(modules)), capture_output=True, text=True,
+                               timeout=IMPORT_TIMEOUT)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Import resolution failed: {completed.stderr[-2000:]}")
+    return {module: error for module, error in json.loads(completed.stdout).items() if error}
+
+
+def load_verdict_cache(cache_file):
+    cache_file = Path(cache_file)
+    if cache_file.exists():
+        with open(cache_file, 'r') as file:
+            return json.load(file)
+    return {}
+
+
+def save_verdict_cache(cache, cache_file):
+    """Saves the verdict cache atomically."""
+    cache_file = Path(cache_file)
+    tmp_file = cache_file.with_suffix('.tmp')
+    with open(tmp_file, 'w') as file:
+        json.dump(cache, file)
+    os.replace(tmp_file, cache_file)
+
+
+def prescreen_strategies(strategies, strategy_dir, cache_file, workers=None, python=None):
+    """
+    Checks strategy files in parallel before they are scheduled for backtesting.
+
+    Static verdicts are cached by file hash, so only new or edited files are parsed. The
+    imports of every strategy and its local helper modules are then resolved in one isolated
+    subprocess running freqtrade's interpreter, fresh on every run so installing a missing
+    package is picked up.
+
+    Returns {strategy: verdict}, where verdict["error"] is None for strategies worth
+    backtesting; see analyze_strategy_file() for the other fields.
+    """
+    strategy_dir = Path(strategy_dir)
+    search_dirs = [strategy_dir, Path('.')]
+    cache = load_verdict_cache(cache_file)
+
+    verdicts = {}
+    to_analyze = []
+    for strategy in strategies:
+        strategy_file = strategy_dir / f"{strategy}.py"
+        if not strategy_file.exists():
+            verdicts[strategy] = {"error": "file not found", "timeframe": None, "startup_candle_count": None,
+                                  "imports": []}
+            continue
+        cached = cache.get(strategy)
+        if cached and cached["digest"] == file_digest(strategy_file):
+            verdicts[strategy] = cached
+        else:
+            to_analyze.append(strategy)
+
+    if to_analyze:
+        files = [strategy_dir / f"{strategy}.py" for strategy in to_analyze]
+        if len(files) > 64 and workers != 1:  # Process start-up outweighs parsing a handful of files
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                analyzed = list(executor.map(analyze_strategy_file, files, chunksize=64))
+        else:
+            analyzed = [analyze_strategy_file(file) for file in files]
+        for strategy, verdict in zip(to_analyze, analyzed):
+            verdicts[strategy] = cache[strategy] = verdict
+        save_verdict_cache(cache, cache_file)
+
+    # Imports of local helper modules count too, e.g. the ones of IStrategyWithEntryOrderBlocking.py
+    helper_imports = {}
+    imports_by_strategy = {}
+    for strategy, verdict in verdicts.items():
+        if verdict["error"]:
+            continue
+        modules = set(verdict["imports"])
+        for helper in strategy_dependencies(strategy_dir / f"{strategy}.py", search_dirs)[1:]:
+            if helper not in helper_imports:
+                helper_imports[helper] = analyze_strategy_file(helper)["imports"]
+            modules.update(helper_imports[helper])
+        imports_by_strategy[strategy] = modules
+
+    missing = resolve_imports(set().union(*imports_by_strategy.values()), search_dirs, python)
+    for strategy, modules in imports_by_strategy.items():
+        unresolved = sorted(module for module in modules if module in missing)
+        if unresolved:
+            verdicts[strategy] = dict(verdicts[strategy], error=f"cannot import {unresolved[0]} "
+                                                               f"({missing[unresolved[0]]})")
+    return verdicts
+
+
+def rejection_reason(verdict, timeframe):
+    """Why a strategy shouldn't be backtested at timeframe, or None if it should."""
+    if verdict["error"]:
+        return verdict["error"]
+    if verdict["timeframe"] and verdict["timeframe"] != timeframe:
+        return f"targets timeframe {verdict['timeframe']}, run uses {timeframe}"
+    return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Statically check strategy files before backtesting.")
+    parser.add_argument('--strategy_dir', default="user_data/strategies")
+    parser.add_argument('--cache', default="MY_HELPER_SCRIPTS/MY_BACKTESTING_RESULTS/prescreen_cache.json")
+    parser.add_argument('--timeframe', default="5m")
+    args = parser.parse_args()
+
+    Path(args.cache).parent.mkdir(parents=True, exist_ok=True)
+    names = sorted(file[:-3] for file in os.listdir(args.strategy_dir) if file.endswith(".py"))
+    results = prescreen_strategies(names, args.strategy_dir, args.cache)
+    rejected = {name: rejection_reason(verdict, args.timeframe) for name, verdict in results.items()}
+    rejected = {name: reason for name, reason in rejected.items() if reason}
+    for name, reason in sorted(rejected.items()):
+        print(f"{name}: {reason}")
+    print(f"{len(results) - len(rejected)} of {len(results)} strategies are viable at {args.timeframe}.")
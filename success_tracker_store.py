@@ -0,0 +1,114 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class SuccessTracker:
+    """
+    Journaled replacement for success_tracker.json, backed by SQLite in WAL mode.
+
+    Behaves like the old {strategy: status} dict, but every assignment is a single-row
+    upsert instead of a full-file rewrite, so updates are O(1), a crash can't corrupt the
+    tracker, and several runners can write to it at the same time. Status values keep the
+    old meanings: 0 pending, 1 done, "error", "No results found".
+
+    Attributes:
+        db_file (Path): The SQLite database file.
+    """
+
+    def __init__(self, db_file, legacy_json_file=None):
+        """
+        Opens (or creates) the tracker database, migrating a legacy JSON tracker once.
+
+        Parameters:
+            db_file (str): Path of the SQLite database.
+            legacy_json_file (str): Old success_tracker.json to import when the database is new.
+        """
+        self.db_file = Path(db_file)
+        self._local = threading.local()
+        is_new = not self.db_file.exists()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        # status has no declared type so ints and strings are stored as-is
+        connection.execute("CREATE TABLE IF NOT EXISTS tracker (strategy TEXT PRIMARY KEY, status, updated REAL)")
+        connection.execute("CREATE INDEX IF NOT EXISTS tracker_status ON tracker (status)")
+        connection.commit()
+
+        if is_new and legacy_json_file and Path(legacy_json_file).exists():
+            self.migrate_from_json(legacy_json_file)
+
+    def _connection(self):
+        """Returns this thread's connection; sqlite3 connections can't be shared across threads."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_file, timeout=60)
+            connection.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints, safe against corruption
+            self._local.connection = connection
+        return connection
+
+    def migrate_from_json(self, json_file):
+        """Imports an old success_tracker.json in one transaction and renames it out of the way."""
+        with open(json_file, 'r') as file:
+            statuses = json.load(file)
+        self.update(statuses)
+        os.replace(json_file, f"{json_file}.migrated")
+        print(f"Migrated {len(statuses)} strategies from {json_file} to {self.db_file}.")
+
+    def __getitem__(self, strategy):
+        row = self._connection().execute(
+            "SELECT status FROM tracker WHERE strategy = ?", (strategy,)).fetchone()
+        if row is None:
+            raise KeyError(strategy)
+        return row[0]
+
+    def __setitem__(self, strategy, status):
+        self.update({strategy: status})
+
+    def __contains__(self, strategy):
+        return self._connection().execute(
+            "SELECT 1 FROM tracker WHERE strategy = ?", (strategy,)).fetchone() is not None
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM tracker").fetchone()[0]
+
+    def get(self, strategy, default=None):
+        try:
+            return self[strategy]
+        except KeyError:
+            return default
+
+    def update(self, statuses):
+        """Sets several statuses in a single transaction."""
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT INTO tracker (strategy, status, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(strategy) DO UPDATE SET status = excluded.status, updated = excluded.updated",
+                [(strategy, status, now) for strategy, status in statuses.items()])
+
+    def add_missing(self, strategies, status=0):
+        """Registers strategies that aren't tracked yet, leaving existing statuses untouched."""
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO tracker (strategy, status, updated) VALUES (?, ?, ?)",
+                [(strategy, status, time.time()) for strategy in strategies])
+
+    def items(self):
+        """Returns a snapshot of all (strategy, status) pairs."""
+        return self._connection().execute("SELECT strategy, status FROM tracker ORDER BY rowid").fetchall()
+
+    def with_status(self, status):
+        """Returns the strategies currently in the given status, using the status index."""
+        rows = self._connection().execute(
+            "SELECT strategy FROM tracker WHERE status = ? ORDER BY rowid", (status,)).fetchall()
+        return [row[0] for row in rows]
+
+    def status_counts(self):
+        """Returns {status: number of strategies}."""
+        return dict(self._connection().execute("SELECT status, COUNT(*) FROM tracker GROUP BY status").fetchall())
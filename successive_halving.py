@@ -0,0 +1,57 @@
+import heapq
+import json
+import math
+from pathlib import Path
+
+from backtest_results_io import positive_ev
+
+# Successive halving: every candidate is screened on a short window, and only the best
+# fraction of each stage is promoted to the next, longer one. The last screening stage
+# promotes into the regular full-timerange run.
+
+
+def parse_stage_values(spec, n_stages, cast):
+    """Parses a comma-separated per-stage setting; a single value applies to every stage."""
+    values = [cast(value) for value in str(spec).split(',') if value.strip()]
+    if len(values) == 1:
+        return values * n_stages
+    if len(values) != n_stages:
+        raise ValueError(f"Expected 1 or {n_stages} values, got {len(values)}: {spec}")
+    return values
+
+
+def build_stages(timeranges, keep_fractions, min_keeps):
+    """Returns the screening stages: [{"index", "timerange", "keep_fraction", "min_keep"}]."""
+    timeranges = [timerange.strip() for timerange in timeranges.split(',') if timerange.strip()]
+    keep_fractions = parse_stage_values(keep_fractions, len(timeranges), float)
+    min_keeps = parse_stage_values(min_keeps, len(timeranges), int)
+    return [{"index": index, "timerange": timerange, "keep_fraction": keep_fraction, "min_keep": min_keep}
+            for index, (timerange, keep_fraction, min_keep)
+            in enumerate(zip(timeranges, keep_fractions, min_keeps))]
+
+
+def strategy_score(result, metric):
+    """Score of one strategy_comparison record under the ranking metric."""
+    if metric == "positive_ev":
+        return positive_ev(result)
+    return float(str(result.get(metric, "-inf")).replace('"', ''))
+
+
+def stage_scores(results_dir, candidates, metric):
+    """Reads the stage result of every candidate. Candidates without results score -inf."""
+    scores = {}
+    for strategy in candidates:
+        result_file = Path(results_dir) / f"{strategy}_result.json"
+        try:
+            with open(result_file, 'r') as file:
+                scores[strategy] = strategy_score(json.load(file), metric)
+        except (FileNotFoundError, ValueError):
+            scores[strategy] = -math.inf
+    return scores
+
+
+def promote(scores, keep_fraction, min_keep):
+    """Returns the strategies moving on: the top keep_fraction, but at least min_keep of them."""
+    n_keep = max(math.ceil(len(scores) * keep_fraction), min_keep)
+    ranked = heapq.nlargest(n_keep, scores.items(), key=lambda item: item[1])
+    return [strategy for strategy, score in ranked if score > -math.inf]
@@ -1,48 +1,40 @@
-import os
 import json
 import shutil
 from pathlib import Path
 from tabulate import tabulate
-import sys
+import argparse
+import numpy as np
+from results_index import open_results_index, NUMERIC_FIELDS, DERIVED_FIELDS
+from pareto_ranking import DEFAULT_OBJECTIVES, parse_objectives, to_maximization, pareto_fronts, top_k
 
 
-def generate_and_filter_summary(directory='MY_HELPER_SCRIPTS/MY_BACKTESTING_RESULTS', top_n=80):
-    results = []
-    for filename in os.listdir(directory):
-        if filename.endswith('_result.json'):
-            filepath = Path(directory) / filename
-            with open(filepath, 'r') as file:
-                data = json.load(file)
+def print_page(index, where="1", page=1, page_size=50):
+    """Prints one page of results sorted by positive_ev instead of the full grid."""
+    total = index.count(where)
+    n_pages = max(1, -(-total // page_size))
+    page = min(max(page, 1), n_pages)
+    results = index.query(where, limit=page_size, offset=(page - 1) * page_size)
+    if results:
+        print(tabulate([list(result.values()) for result in results],
+              headers=results[0].keys(), tablefmt="grid"))
+    print(f"Page {page}/{n_pages} ({total} results). Use --page to see more.")
 
-                profit_total_abs = float(data.get('profit_total_abs', 0))
-                max_drawdown_abs = data.get('max_drawdown_abs')
 
-                # Handle missing or zero max_drawdown_abs by setting positive_ev to profit_total_abs
-                if max_drawdown_abs is None or float(max_drawdown_abs.replace('"', '')) == 0:
-                    data['positive_ev'] = profit_total_abs
-                else:
-                    max_drawdown_abs = float(max_drawdown_abs.replace('"', ''))
-                    data['positive_ev'] = profit_total_abs / max_drawdown_abs
+def generate_and_filter_summary(directory='MY_HELPER_SCRIPTS/MY_BACKTESTING_RESULTS', top_n=80,
+                                min_positive_ev=0.5, min_profit=100, where="1", page=1, page_size=50):
+    # Only result files changed since the last summary are parsed; positive_ev is computed at ingest
+    index = open_results_index(directory)
 
-                # rename "key" column to "strategy_name"
-                data['strategy_name'] = data.pop('key')
-                results.append(data)
+    # Filter and sort results based on criteria
+    sorted_filtered_results = index.query(f"({where}) AND positive_ev > ? AND profit_total_abs > ?",
+                                          (min_positive_ev, min_profit), limit=top_n)
 
-    # Filter and sort results based on criteria, ignoring entries without positive_ev
-    filtered_results = [res for res in results if 'positive_ev' in res and res['positive_ev']
-                        > 0.5 and res['profit_total_abs'] > 100]
+    # Print one page of the data summary sorted by positive_ev
+    print_page(index, where, page, page_size)
 
-    sorted_filtered_results = sorted(
-        filtered_results, key=lambda x: x['positive_ev'], reverse=True)[:top_n]
-
-    # Print full data summary sorted by positive_ev
-    sorted_results = sorted(results, key=lambda x: x.get('positive_ev', 0), reverse=True)
-    print(tabulate([list(result.values()) for result in sorted_results],
-          headers=sorted_results[0].keys(), tablefmt="grid"))
-
-    # Print top 20 filtered results
+    # Print top filtered results
     if sorted_filtered_results:
-        print("\nTop 20 Results based on Positive EV and Profit Total Absolute:")
+        print(f"\nTop {len(sorted_filtered_results)} Results based on Positive EV and Profit Total Absolute:")
         print(tabulate([list(result.values()) for result in sorted_filtered_results],
               headers=sorted_filtered_results[0].keys(), tablefmt="grid"))
     else:
@@ -75,5 +67,122 @@ def generate_and_filter_summary(directory='MY_HELPER_SCRIPTS/MY_BACKTESTING_RESU
             f"Filtered summary and top strategy files have been saved to {top_strategies_dir} and {summary_filepath}, respectively.")
 
 
-# Call the function to generate and filter the summary
-generate_and_filter_summary()
+def generate_matrix_summary(directory='MY_HELPER_SCRIPTS/MY_BACKTESTING_RESULTS', top_n=80):
+    """Ranks strategies on how stable they are across the cells of a backtest sweep matrix.
+
+    Each cell (timerange x pair set x timeframe x fee) lives in cells/<cell id>/. A strategy's
+    stability is its mean positive_ev across cells minus the standard deviation, so a strategy
+    that only shines in one market regime ranks below one that is consistently good.
+    """
+    import pandas as pd
+
+    rows = []
+    cells_dir = Path(directory) / 'cells'
+    for cell_dir in sorted(path for path in cells_dir.iterdir() if path.is_dir()):
+        with open(cell_dir / 'params.json', 'r') as file:
+            params = json.load(file)
+        for data in open_results_index(cell_dir).query():
+            rows.append({'strategy_name': data['strategy_name'], 'cell': cell_dir.name,
+                         'timeframe': params['timeframe'], 'positive_ev': data['positive_ev'],
+                         'profit_total_abs': float(data.get('profit_total_abs', 0))})
+
+    if not rows:
+        print(f"No matrix results found in {cells_dir}.")
+        return
+
+    df = pd.DataFrame(rows)
+    n_cells = df['cell'].nunique()
+    summary = df.groupby('strategy_name').agg(
+        cells=('cell', 'nunique'),
+        mean_ev=('positive_ev', 'mean'),
+        min_ev=('positive_ev', 'min'),
+        std_ev=('positive_ev', 'std'),
+        profitable_cells=('profit_total_abs', lambda profits: (profits > 0).mean()),
+        timeframe=('timeframe', lambda timeframes: timeframes.mode().iat[0]),
+    )
+    summary['std_ev'] = summary['std_ev'].fillna(0)
+    summary['stability'] = summary['mean_ev'] - summary['std_ev']
+
+    # Only strategies with results in every cell can be compared fairly
+    summary = summary[summary['cells'] == n_cells].sort_values('stability', ascending=False)
+    top = summary.head(top_n).reset_index()
+
+    print(f"\nTop {len(top)} strategies by cross-regime stability over {n_cells} cells:")
+    print(tabulate(top.values.tolist(), headers=list(top.columns), tablefmt="grid"))
+
+    output_dir = Path(directory) / 'TOP_STRATEGIES'
+    output_dir.mkdir(parents=True, exist_ok=True)
+    top.to_csv(output_dir / 'matrix_results.csv', index=False)
+    print(f"Matrix summary saved to {output_dir / 'matrix_results.csv'}")
+
+
+def generate_pareto_summary(directory='MY_HELPER_SCRIPTS/MY_BACKTESTING_RESULTS', objectives=DEFAULT_OBJECTIVES,
+                            n_fronts=1, where="1", top_n=80, page=1, page_size=50):
+    """Ranks results by Pareto dominance over several objectives instead of positive_ev alone.
+
+    Front 1 holds the strategies no other strategy beats on every objective; with n_fronts > 1
+    the next fronts are peeled off the remaining results. Within a front, strategies are listed
+    by positive_ev, and at most top_n per front are kept.
+    """
+    import pandas as pd
+
+    objectives = parse_objectives(objectives, NUMERIC_FIELDS + DERIVED_FIELDS)
+    fields = [field for field, _ in objectives]
+    index = open_results_index(directory)
+
+    # Only the objective columns are read, not the full records
+    rows = index.connection.execute(
+        f"SELECT strategy_name, positive_ev, {', '.join(fields)} FROM results WHERE {where}").fetchall()
+    if not rows:
+        print("No results match the filter.")
+        return
+
+    names = [row[0] for row in rows]
+    evs = [row[1] if row[1] is not None else -np.inf for row in rows]
+    values = to_maximization([row[2:] for row in rows], objectives)
+
+    records = []
+    for front_number, front in enumerate(pareto_fronts(values, n_fronts), start=1):
+        for position in top_k(front, top_n, key=lambda position: evs[position]):
+            records.append({'front': front_number, 'strategy_name': names[position],
+                            'positive_ev': evs[position],
+                            **{field: rows[position][2 + column] for column, field in enumerate(fields)}})
+
+    df = pd.DataFrame(records)
+    n_pages = max(1, -(-len(df) // page_size))
+    page = min(max(page, 1), n_pages)
+    shown = df.iloc[(page - 1) * page_size:page * page_size]
+    print(f"\nPareto fronts over {', '.join(fields)} ({len(rows)} results):")
+    print(tabulate(shown.values.tolist(), headers=list(shown.columns), tablefmt="grid"))
+    print(f"Page {page}/{n_pages} ({len(df)} strategies on {df['front'].nunique()} fronts). Use --page to see more.")
+
+    output_dir = Path(directory) / 'TOP_STRATEGIES'
+    output_dir.mkdir(parents=True, exist_ok=True)
+    df.to_csv(output_dir / 'pareto_front.csv', index=False)
+    print(f"Pareto fronts saved to {output_dir / 'pareto_front.csv'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize backtest results.")
+    parser.add_argument("--matrix", action="store_true", help="Rank strategies by stability across sweep matrix cells.")
+    parser.add_argument("--pareto", nargs="?", const=DEFAULT_OBJECTIVES, default=None,
+                        help=f"Rank by Pareto dominance over objectives 'field:max|min,...' (default: {DEFAULT_OBJECTIVES}).")
+    parser.add_argument("--fronts", type=int, default=1, help="Number of successive Pareto fronts to report.")
+    parser.add_argument("--where", default="1",
+                        help="SQL filter over the results index columns, e.g. \"trades >= 50 AND winrate > 0.5\".")
+    parser.add_argument("--top_n", type=int, default=80, help="Number of top strategies to keep (per front with --pareto).")
+    parser.add_argument("--min_positive_ev", type=float, default=0.5, help="Minimum positive_ev for the top strategies.")
+    parser.add_argument("--min_profit", type=float, default=100, help="Minimum profit_total_abs for the top strategies.")
+    parser.add_argument("--page", type=int, default=1, help="Page of the listing to print.")
+    parser.add_argument("--page_size", type=int, default=50, help="Rows per printed page.")
+    args = parser.parse_args()
+
+    if args.matrix:
+        generate_matrix_summary(top_n=args.top_n)
+    elif args.pareto:
+        generate_pareto_summary(objectives=args.pareto, n_fronts=args.fronts, where=args.where,
+                                top_n=args.top_n, page=args.page, page_size=args.page_size)
+    else:
+        generate_and_filter_summary(top_n=args.top_n, min_positive_ev=args.min_positive_ev,
+                                    min_profit=args.min_profit, where=args.where,
+                                    page=args.page, page_size=args.page_size)
@@ -0,0 +1,70 @@
+from copy import deepcopy
+
+import pytest
+
+pytest.importorskip("freqtrade")
+
+import backtest_engine
+from backtest_engine import InProcessBacktester
+
+PARAMS = {"pairs": ["BTC/USDT"], "timeframe": "5m", "timerange": "20230101-20230201", "fee": 0.001}
+
+# Strategy attributes that freqtrade's resolver copies into the config when the config doesn't set them
+STRATEGIES = {
+    "Tight": {"minimal_roi": {"0": 0.01}, "stoploss": -0.02, "startup_candle_count": 10},
+    "Loose": {"minimal_roi": {"0": 0.2}, "stoploss": -0.3, "startup_candle_count": 20},
+}
+
+
+class FakeStrategy:
+    def __init__(self, config):
+        self.name = config["strategy"]
+        self.minimal_roi = config["minimal_roi"]
+        self.stoploss = config["stoploss"]
+        self.startup_candle_count = STRATEGIES[self.name]["startup_candle_count"]
+
+
+def load_strategy(config):
+    """Like StrategyResolver.load_strategy: the config wins, and gets the strategy's values otherwise."""
+    for attribute, value in STRATEGIES[config["strategy"]].items():
+        config.setdefault(attribute, value)
+    return FakeStrategy(config)
+
+
+class FakeBacktesting:
+    def __init__(self, config):
+        self.config = config
+        config["dry_run"] = True
+        if config.get("strategy_list"):
+            for name in config["strategy_list"]:
+                load_strategy(dict(deepcopy(config), strategy=name))
+        else:
+            load_strategy(config)
+        self.all_results = {}
+        self.required_startup = 0
+
+    def load_bt_data_detail(self):
+        pass
+
+    def backtest_one_strategy(self, strategy, data, timerange):
+        self.all_results[strategy.name] = {"minimal_roi": strategy.minimal_roi, "stoploss": strategy.stoploss}
+        return None, None
+
+
+def test_each_strategy_keeps_its_own_roi_and_stoploss(monkeypatch):
+    monkeypatch.setattr(backtest_engine, "Backtesting", FakeBacktesting)
+    monkeypatch.setattr(backtest_engine.StrategyResolver, "load_strategy", staticmethod(load_strategy))
+    monkeypatch.setattr(backtest_engine, "generate_backtest_stats", lambda data, results, **kwargs: {
+        "strategy": {}, "strategy_comparison": [dict(results[name], key=name) for name in results]})
+    backtester = InProcessBacktester(["config.json"])
+    monkeypatch.setattr(backtester, "_config", lambda params: {"timeframe": params["timeframe"]})
+    monkeypatch.setattr(backtester, "_candles", lambda params, startup: ({}, None))
+
+    # Twice, so the second batch runs on the engine built for the first
+    for batch in (["Tight", "Loose"], ["Loose", "Tight"]):
+        result = backtester.run_batch(batch, PARAMS)
+        assert result["errors"] == {}
+        comparison = {record["key"]: record for record in result["comparison"]}
+        for name, expected in STRATEGIES.items():
+            assert comparison[name]["minimal_roi"] == expected["minimal_roi"]
+            assert comparison[name]["stoploss"] == expected["stoploss"]
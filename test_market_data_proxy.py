@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import pytest
+
+web = pytest.importorskip("aiohttp.web")
+from aiohttp.test_utils import TestClient, TestServer
+
+from market_data_proxy import MarketDataProxy, next_boundary, stand_in_exchange
+
+OHLC_PATH = '/0/public/OHLC'
+CANDLE_SECONDS = 2
+# The stand-in serves minute candles, but the proxy only needs an interval to expire them on
+SHORT_CANDLES = {OHLC_PATH: ('interval', 1, 'since')}
+
+
+async def proxy_client(upstream_app, **kwargs):
+    upstream = TestServer(upstream_app)
+    await upstream.start_server()
+    proxy = MarketDataProxy(str(upstream.make_url('')), candle_routes=SHORT_CANDLES, settle_seconds=0, **kwargs)
+    client = TestClient(TestServer(proxy.app()))
+    await client.start_server()
+    return upstream, client
+
+
+async def upstream_requests(upstream, client):
+    """Requests that reached the stand-in exchange, asked of it directly."""
+    async with client.session.get(upstream.make_url('/stats')) as response:
+        return (await response.json())['requests']
+
+
+def test_candle_requests_are_coalesced_and_cached_until_the_boundary():
+    async def scenario():
+        upstream, client = await proxy_client(stand_in_exchange())
+        try:
+            # Start just after a boundary, so the whole candle is ahead
+            await asyncio.sleep(next_boundary(time.time(), CANDLE_SECONDS) - time.time() + 0.1)
+            params = {'pair': 'XBTUSDT', 'interval': CANDLE_SECONDS}
+            responses = await asyncio.gather(*(client.get(OHLC_PATH, params=params) for _ in range(10)))
+            assert [response.status for response in responses] == [200] * 10
+            assert await upstream_requests(upstream, client) == 1
+
+            response = await client.get(OHLC_PATH, params=params)
+            assert response.status == 200
+            assert await upstream_requests(upstream, client) == 1
+
+            await asyncio.sleep(next_boundary(time.time(), CANDLE_SECONDS) - time.time() + 0.1)
+            response = await client.get(OHLC_PATH, params=params)
+            assert response.status == 200
+            assert await upstream_requests(upstream, client) == 2
+        finally:
+            await client.close()
+            await upstream.close()
+
+    asyncio.run(scenario())
+
+
+def test_non_json_error_is_passed_through_uncached():
+    requests = []
+
+    async def unavailable(request):
+        requests.append(request.path)
+        return web.Response(text="<html>502 Bad Gateway</html>", status=502, content_type='text/html')
+
+    async def scenario():
+        upstream_app = web.Application()
+        upstream_app.router.add_get(OHLC_PATH, unavailable)
+        upstream, client = await proxy_client(upstream_app)
+        try:
+            for _ in range(2):
+                response = await client.get(OHLC_PATH, params={'pair': 'XBTUSDT', 'interval': CANDLE_SECONDS,
+                                                               'since': 0})
+                assert response.status == 502
+                assert response.content_type == 'text/html'
+                assert await response.text() == "<html>502 Bad Gateway</html>"
+        finally:
+            await client.close()
+            await upstream.close()
+        assert len(requests) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,40 @@
+import numpy as np
+
+from pareto_ranking import skyline, pareto_fronts
+
+
+def brute_force_skyline(values):
+    """Indices of the rows no other row dominates, by comparing every pair."""
+    front = []
+    for i, point in enumerate(values):
+        if not any(np.all(other >= point) and np.any(other > point) for other in values):
+            front.append(i)
+    return front
+
+
+def test_skyline_reported_case():
+    values = np.array([[1, 0, 2], [1, 1, 2], [0, 1, 0], [0, 0, 0]], dtype=float)
+    assert sorted(skyline(values)) == [1]
+
+
+def test_skyline_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for case in range(2000):
+        n = int(rng.integers(1, 30))
+        d = int(rng.integers(1, 6))
+        # Few distinct values, so ties and duplicates are common
+        values = rng.integers(0, 4, size=(n, d)).astype(float)
+        if case % 4 == 0:
+            values[rng.random((n, d)) < 0.1] = -np.inf  # Missing values, as to_maximization() encodes them
+        assert sorted(skyline(values)) == brute_force_skyline(values), values
+
+
+def test_pareto_fronts_partition_rows():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=(200, 4))
+    fronts = pareto_fronts(values, n_fronts=200)
+    assert sorted(np.concatenate(fronts)) == list(range(200))
+    remaining = np.arange(200)
+    for front in fronts:
+        assert sorted(front) == [remaining[i] for i in brute_force_skyline(values[remaining])]
+        remaining = np.setdiff1d(remaining, front)
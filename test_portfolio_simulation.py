@@ -0,0 +1,31 @@
+import pandas as pd
+
+from backtest_results_io import save_trades_columnar
+from portfolio_simulation import TradeBook
+
+
+def trade(pair, open_date, close_date, profit_ratio=0.01):
+    return {"pair": pair, "open_date": open_date, "close_date": close_date, "profit_ratio": profit_ratio}
+
+
+def test_zero_duration_trade_frees_its_slot(tmp_path):
+    trades = [trade("BTC/USDT", "2023-01-01T00:00:00Z", "2023-01-01T00:00:00Z")]
+    start = pd.Timestamp("2023-01-01T01:00:00Z")
+    for hour in range(5):
+        open_date = start + pd.Timedelta(hours=hour)
+        trades.append(trade("ETH/USDT", open_date.isoformat(), (open_date + pd.Timedelta(minutes=30)).isoformat()))
+    save_trades_columnar("Strategy", trades, tmp_path)
+
+    book = TradeBook(["Strategy"], tmp_path)
+    stats = book.simulate([[True]], max_open_trades=1)
+    assert stats["trades"][0] == 6
+    assert stats["rejected"][0] == 0
+
+
+def test_close_frees_slot_for_open_at_same_time(tmp_path):
+    trades = [trade("BTC/USDT", "2023-01-01T00:00:00Z", "2023-01-01T01:00:00Z"),
+              trade("ETH/USDT", "2023-01-01T01:00:00Z", "2023-01-01T02:00:00Z")]
+    save_trades_columnar("Strategy", trades, tmp_path)
+
+    stats = TradeBook(["Strategy"], tmp_path).simulate([[True]], max_open_trades=1)
+    assert stats["trades"][0] == 2
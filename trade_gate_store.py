@@ -0,0 +1,110 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+TRADE_GATE_DB = "user_data/trade_gate.sqlite"
+
+
+class TradeGate:
+    """
+    Per-pair entry gate shared by every bot on the host, backed by SQLite in WAL mode.
+
+    Replaces trade_counts.json. Each bot owns one row per pair with its open entry count and
+    last entry time; a pair's fleet-wide totals are the sum over bots. try_enter() checks and
+    increments in one IMMEDIATE transaction, so two bots can't both take the last slot of a
+    pair. Commits use synchronous=NORMAL, so they append to the WAL without an fsync and are
+    made durable in batches at checkpoints, which keeps an entry check well under a millisecond.
+
+    Counts go down again when a bot's trade closes (release()). reconcile() resets a bot's rows
+    to its actual open trades, which repairs entries whose orders never filled and counts left
+    over from a crash.
+
+    Each thread gets its own connection: freqtrade calls the strategy callbacks from its API
+    server's thread too, when entries and exits are forced through the REST API.
+
+    Attributes:
+        db_file (Path): The SQLite database file.
+    """
+
+    def __init__(self, db_file=TRADE_GATE_DB):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (pair TEXT, bot TEXT, open_count INTEGER, last_entry REAL, "
+            "PRIMARY KEY (pair, bot)) WITHOUT ROWID")
+
+    @property
+    def connection(self):
+        """This thread's connection; sqlite3 connections can't be shared across threads."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Autocommit mode so transactions are opened explicitly with BEGIN IMMEDIATE
+            connection = sqlite3.connect(self.db_file, timeout=60, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints, safe against corruption
+            self._local.connection = connection
+        return connection
+
+    def try_enter(self, bot, pair, now, max_open, wait_secs):
+        """
+        Records an entry for bot if the pair has fewer than max_open open entries across the
+        fleet and none started in the last wait_secs. Returns whether the entry is allowed.
+
+        Parameters:
+            now (float): Epoch seconds of the entry.
+        """
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            open_count, last_entry = connection.execute(
+                "SELECT TOTAL(open_count), MAX(last_entry) FROM entries WHERE pair = ?", (pair,)).fetchone()
+            allowed = open_count < max_open and (last_entry is None or now - last_entry >= wait_secs)
+            if allowed:
+                connection.execute(
+                    "INSERT INTO entries VALUES (?, ?, 1, ?) ON CONFLICT (pair, bot) DO UPDATE SET "
+                    "open_count = open_count + 1, last_entry = MAX(COALESCE(last_entry, 0), excluded.last_entry)",
+                    (pair, bot, now))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return allowed
+
+    def release(self, bot, pair):
+        """Frees one of bot's open entries on pair, after its trade closed."""
+        self.connection.execute(
+            "UPDATE entries SET open_count = MAX(open_count - 1, 0) WHERE pair = ? AND bot = ?", (pair, bot))
+
+    def reconcile(self, bot, open_counts):
+        """Sets bot's open entry counts to open_counts {pair: open trades}, keeping last entry times."""
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("UPDATE entries SET open_count = 0 WHERE bot = ?", (bot,))
+            connection.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, NULL) ON CONFLICT (pair, bot) DO UPDATE SET "
+                "open_count = excluded.open_count", [(pair, bot, count) for pair, count in open_counts.items()])
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def open_counts(self):
+        """{pair: open entries across the fleet}."""
+        return dict(self.connection.execute(
+            "SELECT pair, TOTAL(open_count) FROM entries GROUP BY pair HAVING TOTAL(open_count) > 0"))
+
+
+if __name__ == '__main__':
+    # Times try_enter()/release() round trips against the real database file
+    gate = TradeGate()
+    rounds = 2000
+    start = time.perf_counter()
+    for i in range(rounds):
+        gate.try_enter("benchmark", "BENCH/USDT", time.time(), max_open=1, wait_secs=0)
+        gate.release("benchmark", "BENCH/USDT")
+    elapsed = time.perf_counter() - start
+    gate.connection.execute("DELETE FROM entries WHERE bot = 'benchmark'")
+    print(f"{elapsed / rounds * 1e6:.0f} us per entry check and release")
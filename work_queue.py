@@ -0,0 +1,310 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+WORK_QUEUE_DB = "MY_HELPER_SCRIPTS/MY_BACKTESTING_RESULTS/work_queue.sqlite"
+LEASE_SECONDS = 120  # A job whose worker hasn't heartbeated for this long is handed to another worker
+MAX_ATTEMPTS = 3  # Leases of a job that may expire before it is failed instead of re-issued
+RATE_WINDOW_SECONDS = 600  # Window over which throughput and the ETA are measured
+
+
+class WorkQueue:
+    """
+    Durable backtest job queue shared by hosts through a common filesystem, backed by SQLite.
+
+    A coordinator enqueues batches of strategies with their run parameters. Workers on any
+    host lease one job at a time and keep the lease alive with heartbeats. A job whose
+    lease runs out (its worker died or lost the filesystem) goes back to the next worker
+    that asks, up to MAX_ATTEMPTS times. Finished jobs carry their strategy_comparison
+    records back to the coordinator, which saves them like a local run would.
+
+    The database uses a rollback journal rather than WAL, since WAL's shared memory index
+    doesn't work across hosts. Every operation is one short IMMEDIATE transaction, so the
+    queue isn't the bottleneck as hosts are added. Lease times are wall-clock, so hosts
+    need roughly synchronised clocks (NTP).
+
+    Attributes:
+        db_file (Path): The SQLite database file, on storage every host can reach.
+    """
+
+    def __init__(self, db_file=WORK_QUEUE_DB):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=DELETE")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT, cell_id TEXT, "
+            "strategies TEXT, params TEXT, trades_dir TEXT, bisect INTEGER, status TEXT, worker TEXT, "
+            "lease_expires REAL, attempts INTEGER DEFAULT 0, enqueued REAL, started REAL, finished REAL, "
+            "result TEXT, error TEXT, collected INTEGER DEFAULT 0)")
+        connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+        connection.execute("CREATE INDEX IF NOT EXISTS jobs_run ON jobs (run_id, collected, status)")
+
+    def _connection(self):
+        """Returns this thread's connection; heartbeats run in their own thread."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Autocommit mode so transactions are opened explicitly with BEGIN IMMEDIATE
+            connection = sqlite3.connect(self.db_file, timeout=60, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self, work):
+        """Runs work(connection) in one IMMEDIATE transaction and returns its result."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return result
+
+    @staticmethod
+    def _job(row):
+        job = dict(row)
+        for field in ("strategies", "params", "result"):
+            if job.get(field) is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+    def enqueue(self, run_id, jobs):
+        """Adds jobs [(cell_id, strategies, params, trades_dir, bisect)] for run_id."""
+        now = time.time()
+        rows = [(run_id, cell_id, json.dumps(strategies), json.dumps(params),
+                 str(trades_dir) if trades_dir else None, int(bisect), "queued", now)
+                for cell_id, strategies, params, trades_dir, bisect in jobs]
+        self._transaction(lambda connection: connection.executemany(
+            "INSERT INTO jobs (run_id, cell_id, strategies, params, trades_dir, bisect, status, enqueued) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows))
+
+    def lease(self, worker, lease_seconds=LEASE_SECONDS):
+        """Hands the oldest runnable job to worker, re-issuing expired leases. Returns the job or None."""
+        def work(connection):
+            now = time.time()
+            while True:
+                row = connection.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY id LIMIT 1", (now,)).fetchone()
+                if row is None:
+                    return None
+                if row["status"] == "leased":
+                    if row["attempts"] >= MAX_ATTEMPTS:
+                        connection.execute(
+                            "UPDATE jobs SET status = 'failed', finished = ?, error = ? WHERE id = ?",
+                            (now, f"Lease expired {row['attempts']} times, last held by {row['worker']}", row["id"]))
+                        continue
+                    print(f"Re-issuing job {row['id']}: {row['worker']} stopped heartbeating.")
+                connection.execute(
+                    "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "started = ? WHERE id = ?", (worker, now + lease_seconds, now, row["id"]))
+                return self._job(row)
+        return self._transaction(work)
+
+    def heartbeat(self, job_id, worker, lease_seconds=LEASE_SECONDS):
+        """Extends worker's lease on a job. Returns False if the lease was lost to another worker."""
+        cursor = self._connection().execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + lease_seconds, job_id, worker))
+        return cursor.rowcount == 1
+
+    def _finish(self, job_id, worker, status, result=None, error=None):
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = ?, finished = ?, result = ?, error = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (status, time.time(), json.dumps(result) if result is not None else None, error, job_id, worker))
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, result):
+        """Stores a finished job's result. Returns False if the lease was lost and the result discarded."""
+        return self._finish(job_id, worker, "done", result=result)
+
+    def fail(self, job_id, worker, error):
+        return self._finish(job_id, worker, "failed", error=error)
+
+    def release(self, job_id, worker):
+        """Puts a job back in the queue, e.g. when its worker is shut down."""
+        self._connection().execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL, attempts = attempts - 1 "
+            "WHERE id = ? AND worker = ? AND status = 'leased'", (job_id, worker))
+
+    def split(self, job, worker, halves):
+        """Replaces a failed batch by its halves, to isolate the strategies that break freqtrade."""
+        def work(connection):
+            cursor = connection.execute(
+                "UPDATE jobs SET status = 'split', finished = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time(), job["id"], worker))
+            if cursor.rowcount != 1:
+                return False
+            connection.executemany(
+                "INSERT INTO jobs (run_id, cell_id, strategies, params, trades_dir, bisect, status, enqueued) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'queued', ?)",
+                [(job["run_id"], job["cell_id"], json.dumps(half), json.dumps(job["params"]), job["trades_dir"],
+                  job["bisect"], time.time()) for half in halves])
+            return True
+        return self._transaction(work)
+
+    def collect(self, run_id):
+        """Returns run_id's finished ('done' or 'failed') jobs not collected before, marking them collected."""
+        def work(connection):
+            rows = connection.execute(
+                "SELECT * FROM jobs WHERE run_id = ? AND collected = 0 AND status IN ('done', 'failed')",
+                (run_id,)).fetchall()
+            connection.executemany("UPDATE jobs SET collected = 1 WHERE id = ?", [(row["id"],) for row in rows])
+            return [self._job(row) for row in rows]
+        return self._transaction(work)
+
+    def active(self, run_id):
+        """Number of run_id's jobs still queued or leased."""
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM jobs WHERE run_id = ? AND status IN ('queued', 'leased')", (run_id,)).fetchone()[0]
+
+    def cancel(self, run_id):
+        """Withdraws run_id's jobs nobody has leased yet."""
+        self._connection().execute("UPDATE jobs SET status = 'cancelled' WHERE run_id = ? AND status = 'queued'",
+                                   (run_id,))
+
+    def progress(self, run_id=None):
+        """Strategy counts by job status, live workers, recent throughput and ETA, for one run or all."""
+        where, params = ("run_id = ?", (run_id,)) if run_id else ("1", ())
+        connection = self._connection()
+        now = time.time()
+        counts = {status: strategies for status, strategies in connection.execute(
+            f"SELECT status, SUM(json_array_length(strategies)) FROM jobs WHERE {where} GROUP BY status", params)}
+        workers = connection.execute(
+            f"SELECT COUNT(DISTINCT worker) FROM jobs WHERE {where} AND status = 'leased' AND lease_expires >= ?",
+            (*params, now)).fetchone()[0]
+        recent = connection.execute(
+            f"SELECT SUM(json_array_length(strategies)) FROM jobs WHERE {where} AND status IN ('done', 'failed') "
+            f"AND finished >= ?", (*params, now - RATE_WINDOW_SECONDS)).fetchone()[0] or 0
+
+        summary = {status: counts.get(status, 0) for status in ("queued", "leased", "done", "failed")}
+        remaining = summary["queued"] + summary["leased"]
+        rate = recent / RATE_WINDOW_SECONDS * 60
+        summary.update({"total": remaining + summary["done"] + summary["failed"], "workers": workers,
+                        "strategies_per_minute": rate, "eta_seconds": remaining / rate * 60 if rate else None})
+        return summary
+
+
+def print_progress(progress):
+    eta = f", ETA {progress['eta_seconds'] / 60:.0f} min" if progress["eta_seconds"] else ""
+    print(f"Queue: {progress['done'] + progress['failed']}/{progress['total']} strategies finished "
+          f"({progress['failed']} in failed jobs), {progress['leased']} running on {progress['workers']} workers, "
+          f"{progress['queued']} queued, {progress['strategies_per_minute']:.1f} strategies/min{eta}")
+
+
+def run_job(job, export_dir):
+    """Backtests one leased job with run_backtest.sh. Returns ("done", result), ("split", halves) or ("failed", error)."""
+    from backtest_scheduler import run_with_rusage
+    from backtest_strategies import backtest_env, read_export
+
+    batch = job["strategies"]
+    command = ['./run_backtest.sh', " ".join(batch), str(export_dir / 'BACKTESTING_RESULT.json')]
+    returncode, _, stderr, wall_seconds, peak_rss_mb = run_with_rusage(command, env=backtest_env(job["params"]))
+    comparison = read_export(batch, export_dir, job["trades_dir"]) if returncode == 0 else None
+    if comparison is None:
+        # A run that exported nothing failed as surely as one that exited non-zero
+        if job["bisect"] and len(batch) > 1:
+            middle = len(batch) // 2
+            return "split", [batch[:middle], batch[middle:]]
+        return "failed", stderr if returncode != 0 else f"run_backtest.sh exported no results\n{stderr}"
+
+    return "done", {"comparison": comparison, "wall_seconds": wall_seconds, "peak_rss_mb": peak_rss_mb,
+                    "host": socket.gethostname()}
+
+
+def work(queue_file=WORK_QUEUE_DB, lease_seconds=LEASE_SECONDS, idle_exit=60, poll_interval=5):
+    """
+    Worker loop: leases jobs and runs them until the queue has stayed empty for idle_exit seconds.
+
+    Must run from the shared checkout, since jobs refer to run_backtest.sh, user_data and the
+    results directory by relative path. idle_exit=None keeps the worker waiting for new jobs.
+    """
+    from backtest_strategies import worker_export_dir
+
+    queue = WorkQueue(queue_file)
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    export_dir = worker_export_dir(worker)
+    idle_since = time.monotonic()
+    print(f"Worker {worker} polling {queue_file}")
+
+    while True:
+        job = queue.lease(worker, lease_seconds)
+        if job is None:
+            if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                print(f"Worker {worker}: queue empty for {idle_exit}s, exiting.")
+                return
+            time.sleep(poll_interval)
+            continue
+
+        stop_heartbeat = threading.Event()
+
+        def keep_lease():
+            while not stop_heartbeat.wait(lease_seconds / 3):
+                if not queue.heartbeat(job["id"], worker, lease_seconds):
+                    print(f"Worker {worker}: lease on job {job['id']} lost, its result will be discarded.")
+                    return
+
+        heartbeat = threading.Thread(target=keep_lease, daemon=True)
+        heartbeat.start()
+        try:
+            outcome, payload = run_job(job, export_dir)
+        except KeyboardInterrupt:
+            queue.release(job["id"], worker)
+            raise
+        except Exception as error:
+            outcome, payload = "failed", repr(error)
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+
+        if outcome == "done":
+            queue.complete(job["id"], worker, payload)
+        elif outcome == "split":
+            queue.split(job, worker, payload)
+            print(f"Worker {worker}: batch of {len(job['strategies'])} failed, bisecting.")
+        else:
+            queue.fail(job["id"], worker, payload)
+        print(f"Worker {worker}: job {job['id']} ({len(job['strategies'])} strategies) {outcome}.")
+        idle_since = time.monotonic()
+
+
+def run_workers(queue_file, processes, **kwargs):
+    """Runs several worker loops on this host, one process each."""
+    from multiprocessing import Process
+
+    workers = [Process(target=work, args=(queue_file,), kwargs=kwargs) for _ in range(processes)]
+    for process in workers:
+        process.start()
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        for process in workers:
+            process.join()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backtest work queue shared by several hosts.")
+    parser.add_argument('command', choices=["worker", "status"])
+    parser.add_argument('--queue', default=WORK_QUEUE_DB, help="Queue database on the shared filesystem.")
+    parser.add_argument('--processes', type=int, default=1, help="Worker processes to run on this host.")
+    parser.add_argument('--lease_seconds', type=float, default=LEASE_SECONDS)
+    parser.add_argument('--idle_exit', type=float, default=60,
+                        help="Exit after the queue has been empty this long; negative to wait forever.")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print_progress(WorkQueue(args.queue).progress())
+    else:
+        run_workers(args.queue, args.processes, lease_seconds=args.lease_seconds,
+                    idle_exit=None if args.idle_exit < 0 else args.idle_exit)